@@ -6,7 +6,7 @@ from typing import Any
 from providers import get_llm_model
 from dependencies import AgentDependencies
 from prompts import MAIN_SYSTEM_PROMPT
-from tools import semantic_search, hybrid_search
+from tools import semantic_search, hybrid_search, multi_search
 
 
 # Initialize the semantic search agent
@@ -19,3 +19,4 @@ search_agent = Agent(
 # Register search tools
 search_agent.tool(semantic_search)
 search_agent.tool(hybrid_search)
+search_agent.tool(multi_search)
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: converting search rows into serialized tool output.
+
+Compares the previous path (JSON text metadata decoded with json.loads, a
+Pydantic model per row) with the current one (metadata decoded by the
+connection codec, slotted SearchResult dataclass). Both are serialized
+with a Pydantic TypeAdapter, as the agent does for tool returns.
+
+Usage:
+    python -m benchmarks.bench_result_conversion [--results 50] [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import SearchResult
+from utils.db_codecs import json_loads, orjson
+
+
+class LegacySearchResult(BaseModel):
+    """Pydantic search result used before the JSONB codec."""
+    chunk_id: str
+    document_id: str
+    content: str
+    similarity: float
+    metadata: Dict[str, Any]
+    document_title: str
+    document_source: str
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """Create rows shaped like match_chunks() output, metadata as JSON text."""
+    metadata = {
+        "file_path": "documents/report.md",
+        "ingestion_date": "2025-01-01T00:00:00",
+        "embedding_model": "text-embedding-3-small",
+        "chunk_method": "semantic",
+        "total_chunks": 12
+    }
+    return [
+        {
+            "chunk_id": uuid.uuid4(),
+            "document_id": uuid.uuid4(),
+            "content": "Lorem ipsum dolor sit amet. " * 30,
+            "similarity": 0.9 - i / 100,
+            "metadata": json.dumps({**metadata, "chunk_index": i}),
+            "document_title": "Quarterly report",
+            "document_source": "documents/report.md"
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search result conversion")
+    parser.add_argument("--results", type=int, default=50, help="Rows per search call")
+    parser.add_argument("--repeat", type=int, default=2000, help="Calls to time")
+    args = parser.parse_args()
+
+    rows = make_rows(args.results)
+    legacy_adapter = TypeAdapter(List[LegacySearchResult])
+    adapter = TypeAdapter(List[SearchResult])
+
+    def legacy():
+        results = [
+            LegacySearchResult(
+                chunk_id=str(row["chunk_id"]),
+                document_id=str(row["document_id"]),
+                content=row["content"],
+                similarity=row["similarity"],
+                metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+                document_title=row["document_title"],
+                document_source=row["document_source"]
+            )
+            for row in rows
+        ]
+        return legacy_adapter.dump_json(results)
+
+    def current():
+        # json_loads stands in for the codec, which decodes while reading rows
+        results = [
+            SearchResult(
+                str(row["chunk_id"]),
+                str(row["document_id"]),
+                row["content"],
+                row["similarity"],
+                json_loads(row["metadata"]) or {},
+                row["document_title"],
+                row["document_source"]
+            )
+            for row in rows
+        ]
+        return adapter.dump_json(results)
+
+    assert json.loads(legacy()) == json.loads(current())
+
+    print(f"{args.results} results per call, {args.repeat} calls, orjson={'yes' if orjson else 'no'}")
+    for name, func in (("pydantic + json.loads", legacy), ("dataclass + codec", current)):
+        seconds = min(timeit.repeat(func, number=args.repeat, repeat=3))
+        print(f"  {name:<22} {seconds / args.repeat * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+End-to-end retrieval benchmark against a local Postgres + pgvector.
+
+Generates a synthetic corpus, ingests it through the ingestion pipeline,
+then runs concurrent semantic and hybrid search workloads through the agent
+tools. Embeddings come from the in-process stub server
+(benchmarks/embedding_stub.py), so runs are deterministic and free. The
+stub shares the benchmark's event loop by default; pass --stub-url to use
+one running in its own process and keep it out of client-side timings.
+
+Reports ingest docs/sec, query QPS, latency percentiles, per-stage
+timings, and recall@k of semantic search against exact nearest neighbours.
+
+The benchmark replaces all documents in the target database. Point it at
+a scratch database.
+
+Usage:
+    python -m benchmarks.bench_retrieval --database-url postgresql://localhost/rag_bench --init-schema
+    python -m benchmarks.bench_retrieval --docs 2000 --queries 500 --concurrency 16 --json results.json
+    python -m benchmarks.bench_retrieval --skip-ingest --search semantic
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.embedding_stub import embed_text, start_stub_server
+
+STUB_MODEL = "text-embedding-3-small"
+
+
+def configure_environment(database_url: str, base_url: str, dimension: int):
+    """Point the ingestion pipeline and agent at the database and stub server."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["EMBEDDING_MODEL"] = STUB_MODEL
+    os.environ["EMBEDDING_DIMENSION"] = str(dimension)
+
+
+async def run_ingestion(args, corpus: SyntheticCorpus) -> Dict[str, Any]:
+    """Write the corpus and ingest it, returning throughput figures."""
+    # Imported after configure_environment(); these modules read it at import time
+    from ingestion.ingest import DocumentIngestionPipeline
+    from utils.db_utils import apply_schema
+    from utils.models import IngestionConfig
+
+    directory = args.corpus or tempfile.mkdtemp(prefix="rag_bench_")
+    corpus.write(directory, args.docs, args.words)
+
+    pipeline = DocumentIngestionPipeline(
+        config=IngestionConfig(chunk_size=args.chunk_size, chunk_overlap=args.chunk_size // 5, use_semantic_chunking=False),
+        documents_folder=directory,
+        clean_before_ingest=True
+    )
+    try:
+        await pipeline.initialize()
+        if args.init_schema:
+            await apply_schema(args.dimension)
+
+        start = time.perf_counter()
+        results = await pipeline.ingest_documents()
+        elapsed = time.perf_counter() - start
+    finally:
+        await pipeline.close()
+
+    chunks = sum(r.chunks_created for r in results)
+    return {
+        "documents": len(results),
+        "chunks": chunks,
+        "errors": sum(len(r.errors) for r in results),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "chunks_per_sec": round(chunks / elapsed, 2) if elapsed else 0.0
+    }
+
+
+async def run_queries(
+    tool: Any,
+    ctx: Any,
+    queries: List[str],
+    concurrency: int,
+    k: int
+) -> Dict[str, Any]:
+    """Run queries through a search tool with bounded concurrency."""
+    from utils.telemetry import LatencyHistogram
+
+    histogram = LatencyHistogram(max_samples=len(queries))
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Any] = [None] * len(queries)
+
+    async def run(index: int, query: str):
+        async with semaphore:
+            start = time.perf_counter()
+            output = await tool(ctx, query, match_count=k)
+            failed = isinstance(output, str)
+            histogram.observe(time.perf_counter() - start, error=failed)
+            results[index] = None if failed else output
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(i, q) for i, q in enumerate(queries)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(queries),
+        "concurrency": concurrency,
+        "qps": round(len(queries) / elapsed, 2) if elapsed else 0.0,
+        **histogram.snapshot(),
+        "results": results
+    }
+
+
+def chunk_ids(results: List[Any]) -> List[str]:
+    """Chunk ids from semantic_search output (dataclasses or dicts)."""
+    return [r["chunk_id"] if isinstance(r, dict) else r.chunk_id for r in results]
+
+
+async def run_search_benchmark(args, corpus: SyntheticCorpus, base_url: str) -> Dict[str, Any]:
+    """Run the query workloads and measure recall."""
+    from dependencies import AgentDependencies
+    from exact_search import ExactSearchIndex, recall_at_k
+    from settings import Settings
+    from tools import hybrid_search, semantic_search
+    from utils.resources import registry
+    from utils.telemetry import recorder
+
+    settings = Settings(
+        database_url=args.database_url,
+        llm_api_key="benchmark",
+        llm_base_url=base_url,
+        embedding_model=STUB_MODEL,
+        embedding_dimension=args.dimension,
+        max_match_count=max(50, args.k),
+        search_prefetch=False
+    )
+    deps = AgentDependencies(settings=settings)
+    await deps.initialize()
+    # The tools only use ctx.deps
+    ctx = SimpleNamespace(deps=deps)
+
+    queries = [q.text for q in corpus.queries(args.queries)]
+    tools = {"semantic": semantic_search, "hybrid": hybrid_search}
+    selected = list(tools) if args.search == "both" else [args.search]
+
+    report: Dict[str, Any] = {}
+    try:
+        # Ground truth: exact cosine nearest neighbours over every stored embedding
+        async with deps.db_pool.acquire() as conn:
+            exact_index = await ExactSearchIndex.build(conn)
+
+        for name in selected:
+            # Warm connections and caches before timing
+            await run_queries(tools[name], ctx, queries[:args.warmup], args.concurrency, args.k)
+            recorder.reset()
+
+            outcome = await run_queries(tools[name], ctx, queries, args.concurrency, args.k)
+            results = outcome.pop("results")
+            outcome["stages"] = recorder.snapshot()
+
+            if name == "semantic":
+                recalls = [
+                    recall_at_k(
+                        chunk_ids(result),
+                        [chunk_id for chunk_id, _ in exact_index.search(embed_text(query, args.dimension), args.k)]
+                    )
+                    for query, result in zip(queries, results)
+                    if result is not None
+                ]
+                outcome[f"recall@{args.k}"] = round(sum(recalls) / len(recalls), 4) if recalls else 0.0
+
+            report[name] = outcome
+    finally:
+        await deps.cleanup()
+        await registry.close()
+
+    return report
+
+
+def print_report(report: Dict[str, Any], k: int):
+    """Print a human-readable summary."""
+    ingest = report.get("ingest")
+    if ingest:
+        print("\nIngestion")
+        print(f"  {ingest['documents']} docs, {ingest['chunks']} chunks, {ingest['errors']} errors in {ingest['seconds']}s")
+        print(f"  {ingest['docs_per_sec']} docs/sec, {ingest['chunks_per_sec']} chunks/sec")
+
+    for name in ("semantic", "hybrid"):
+        outcome = report.get(name)
+        if not outcome:
+            continue
+        print(f"\n{name.capitalize()} search ({outcome['queries']} queries, concurrency {outcome['concurrency']})")
+        print(f"  QPS {outcome['qps']}, errors {outcome['errors']}")
+        print(f"  latency ms: p50 {outcome['p50_ms']:.2f}  p95 {outcome['p95_ms']:.2f}  p99 {outcome['p99_ms']:.2f}  mean {outcome['mean_ms']:.2f}")
+        if f"recall@{k}" in outcome:
+            print(f"  recall@{k}: {outcome[f'recall@{k}']:.4f}")
+        print("  stages (p50 / p95 ms):")
+        for stage, stats in outcome["stages"].items():
+            print(f"    {stage:<18} {stats['p50_ms']:8.2f} / {stats['p95_ms']:8.2f}  (n={stats['count']})")
+
+
+async def run(args) -> Dict[str, Any]:
+    """Start the stub server and run the selected phases."""
+    server = None
+    if args.stub_url:
+        base_url = args.stub_url
+    else:
+        server = await start_stub_server(dimension=args.dimension, latency_ms=args.stub_latency_ms)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}/v1"
+    configure_environment(args.database_url, base_url, args.dimension)
+
+    corpus = SyntheticCorpus(topics=args.topics, seed=args.seed)
+    report: Dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k != "json"}}
+    try:
+        if not args.skip_ingest:
+            report["ingest"] = await run_ingestion(args, corpus)
+        report.update(await run_search_benchmark(args, corpus, base_url))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await server.task
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and retrieval against local Postgres + pgvector")
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL") or os.getenv("DATABASE_URL"), help="Scratch database (all documents are replaced)")
+    parser.add_argument("--init-schema", action="store_true", help="Create the schema (drops existing tables) before ingesting")
+    parser.add_argument("--skip-ingest", action="store_true", help="Query the existing corpus without re-ingesting")
+    parser.add_argument("--corpus", help="Folder for the generated markdown files (default: temporary folder)")
+    parser.add_argument("--docs", type=int, default=500, help="Documents to generate")
+    parser.add_argument("--words", type=int, default=600, help="Approximate words per document")
+    parser.add_argument("--topics", type=int, default=20, help="Topics in the synthetic corpus")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size for ingestion")
+    parser.add_argument("--dimension", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Timed queries per search type")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed warm-up queries")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent queries")
+    parser.add_argument("-k", type=int, default=10, help="Results per query and recall cut-off")
+    parser.add_argument("--search", choices=("semantic", "hybrid", "both"), default="both", help="Search types to benchmark")
+    parser.add_argument("--stub-url", help="Use a separately started embedding stub (python -m benchmarks.embedding_stub) instead of the in-process one, e.g. http://127.0.0.1:8001/v1")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Artificial embedding API latency")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and query seed")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url (or BENCHMARK_DATABASE_URL / DATABASE_URL) is required")
+
+    report = asyncio.run(run(args))
+    print_report(report, args.k)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Synthetic corpus and query generator for retrieval benchmarks.
+
+Documents are markdown files built from per-topic vocabularies mixed with
+common filler words, so queries drawn from a topic's vocabulary have a
+clear set of relevant documents. Output is fully determined by the seed.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from typing import List
+
+SYLLABLES = (
+    "ka", "lo", "mi", "ren", "tor", "vex", "sa", "qui", "dra", "pel",
+    "zu", "mon", "ti", "bar", "nel", "gro", "fi", "sen", "ul", "cra"
+)
+
+COMMON_WORDS = (
+    "the", "system", "report", "data", "process", "result", "team", "model",
+    "value", "review", "update", "plan", "market", "design", "policy", "growth"
+)
+
+
+@dataclass
+class BenchmarkQuery:
+    """A query and the topic it was drawn from."""
+    text: str
+    topic: int
+
+
+class SyntheticCorpus:
+    """Deterministic topic-structured corpus."""
+
+    def __init__(self, topics: int = 20, words_per_topic: int = 40, seed: int = 0):
+        """
+        Initialize corpus vocabulary.
+
+        Args:
+            topics: Number of topics documents and queries are drawn from
+            words_per_topic: Vocabulary size of each topic
+            seed: Random seed
+        """
+        self.seed = seed
+        rng = random.Random(seed)
+        self.vocabulary: List[List[str]] = []
+        seen = set(COMMON_WORDS)
+        for _ in range(topics):
+            words = []
+            while len(words) < words_per_topic:
+                word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                if word not in seen:
+                    seen.add(word)
+                    words.append(word)
+            self.vocabulary.append(words)
+
+    def document(self, index: int, words: int = 600) -> str:
+        """
+        Generate one markdown document.
+
+        Args:
+            index: Document number; also selects its topic
+            words: Approximate word count
+
+        Returns:
+            Markdown text with a title and paragraphs
+        """
+        rng = random.Random(f"{self.seed}-doc-{index}")
+        topic = index % len(self.vocabulary)
+        vocabulary = self.vocabulary[topic]
+
+        paragraphs = []
+        written = 0
+        while written < words:
+            sentences = []
+            for _ in range(rng.randint(3, 6)):
+                length = rng.randint(8, 16)
+                sentence = [
+                    rng.choice(vocabulary) if rng.random() < 0.6 else rng.choice(COMMON_WORDS)
+                    for _ in range(length)
+                ]
+                sentences.append(" ".join(sentence).capitalize() + ".")
+                written += length
+            paragraphs.append(" ".join(sentences))
+
+        title = f"Document {index}: {vocabulary[0]} {vocabulary[1]}"
+        return f"# {title}\n\n" + "\n\n".join(paragraphs) + "\n"
+
+    def write(self, directory: str, documents: int, words: int = 600) -> List[str]:
+        """
+        Write documents as markdown files.
+
+        Args:
+            directory: Output folder (created if missing)
+            documents: Number of documents
+            words: Approximate words per document
+
+        Returns:
+            Written file paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for index in range(documents):
+            path = os.path.join(directory, f"doc_{index:06d}.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.document(index, words))
+            paths.append(path)
+        return paths
+
+    def queries(self, count: int, terms: int = 4) -> List[BenchmarkQuery]:
+        """
+        Generate queries from topic vocabularies.
+
+        Args:
+            count: Number of queries
+            terms: Words per query
+
+        Returns:
+            Queries, cycling through topics
+        """
+        rng = random.Random(f"{self.seed}-queries")
+        queries = []
+        for index in range(count):
+            topic = index % len(self.vocabulary)
+            text = " ".join(rng.sample(self.vocabulary[topic], terms))
+            queries.append(BenchmarkQuery(text=text, topic=topic))
+        return queries
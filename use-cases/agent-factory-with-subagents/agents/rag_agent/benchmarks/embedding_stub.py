@@ -0,0 +1,156 @@
+"""
+Deterministic stand-in for the OpenAI embeddings API.
+
+Texts are embedded by feature hashing their words and word pairs into a
+signed bag-of-words vector, so the same text always gets the same vector
+and texts sharing vocabulary are close. That is enough to exercise the
+ingestion and search paths end to end, and to measure ANN recall, without
+network calls or API cost.
+
+Usage:
+    python -m benchmarks.embedding_stub [--port 8001] [--dimension 1536] [--latency-ms 0]
+
+Then point the agent at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1.
+"""
+
+import re
+import base64
+import asyncio
+import hashlib
+import argparse
+from typing import List, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+DEFAULT_DIMENSION = 1536
+
+_WORD = re.compile(r"\w+")
+
+
+def embed_text(text: str, dimension: int = DEFAULT_DIMENSION) -> np.ndarray:
+    """
+    Embed text as a normalized, signed hashed bag of words and word pairs.
+
+    Args:
+        text: Text to embed
+        dimension: Output dimension
+
+    Returns:
+        Unit-length float32 vector
+    """
+    words = _WORD.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    vector = np.zeros(dimension, dtype=np.float32)
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dimension] += 1.0 if (value >> 63) & 1 else -1.0
+
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+class EmbeddingRequest(BaseModel):
+    """Subset of the OpenAI embeddings request body."""
+    input: Union[str, List[str]]
+    model: str = "text-embedding-3-small"
+    dimensions: Optional[int] = None
+    encoding_format: str = "float"
+
+
+def create_app(dimension: int = DEFAULT_DIMENSION, latency_ms: float = 0.0) -> FastAPI:
+    """
+    Create the stub embeddings application.
+
+    Args:
+        dimension: Dimension returned when the request does not set one
+        latency_ms: Artificial delay per request, to mimic a remote API
+
+    Returns:
+        FastAPI application serving POST /v1/embeddings
+    """
+    app = FastAPI(title="Embedding stub")
+    app.state.requests = 0
+    app.state.inputs = 0
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: EmbeddingRequest):
+        texts = [request.input] if isinstance(request.input, str) else request.input
+        app.state.requests += 1
+        app.state.inputs += len(texts)
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+
+        data = []
+        for index, text in enumerate(texts):
+            vector = embed_text(text, request.dimensions or dimension)
+            if request.encoding_format == "base64":
+                # The OpenAI SDK asks for base64 float32 by default
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        tokens = sum(len(text) // 4 for text in texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": request.model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    return app
+
+
+async def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    dimension: int = DEFAULT_DIMENSION,
+    latency_ms: float = 0.0
+) -> uvicorn.Server:
+    """
+    Serve the stub in the running event loop.
+
+    Args:
+        host: Bind address
+        port: Port, 0 for any free port
+        dimension: Default embedding dimension
+        latency_ms: Artificial delay per request
+
+    Returns:
+        Started server; its bound port is ``server.servers[0].sockets[0].getsockname()[1]``.
+        Stop it with ``server.should_exit = True``.
+    """
+    config = uvicorn.Config(
+        create_app(dimension, latency_ms), host=host, port=port, log_level="warning", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    server.task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server.task.done():
+            server.task.result()
+        await asyncio.sleep(0.01)
+    return server
+
+
+def main():
+    """Run the stub as a standalone server."""
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible embeddings server")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8001, help="Port")
+    parser.add_argument("--dimension", type=int, default=DEFAULT_DIMENSION, help="Default embedding dimension")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial delay per request")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.dimension, args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,144 +4,74 @@
 import asyncio
 import sys
 import uuid
-from typing import List
+from contextlib import aclosing
 
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 from rich.markdown import Markdown
+from rich.table import Table
 
-from pydantic_ai import Agent
-from agent import search_agent
 from dependencies import AgentDependencies
+from history import ConversationHistory
 from settings import load_settings
+from streaming import stream_agent_events
+from utils.telemetry import recorder
 
 console = Console()
 
 
-async def stream_agent_interaction(user_input: str, conversation_history: List[str], deps: AgentDependencies) -> tuple[str, str]:
+async def stream_agent_interaction(user_input: str, conversation_history: ConversationHistory, deps: AgentDependencies) -> tuple[str, str]:
     """Stream agent interaction with real-time tool call display."""
     
     try:
-        # Build context with conversation history
-        context = "\n".join(conversation_history[-6:]) if conversation_history else ""
+        response_text = ""
+        final_output = ""
         
-        prompt = f"""Previous conversation:
-{context}
-
-User: {user_input}
-
-Search the knowledge base to answer the user's question. Choose the appropriate search strategy (semantic_search or hybrid_search) based on the query type. Provide a comprehensive summary of your findings."""
-
-        # Stream the agent execution
-        async with search_agent.iter(prompt, deps=deps) as run:
-            
-            response_text = ""
-            
-            async for node in run:
-                
-                # Handle user prompt node
-                if Agent.is_user_prompt_node(node):
-                    pass  # Clean start
+        # Leaving the block on error or interrupt ends the agent run here
+        async with aclosing(stream_agent_events(user_input, conversation_history, deps)) as events:
+            async for event in events:
+                event_type = event['type']
                 
-                # Handle model request node - stream the thinking process
-                elif Agent.is_model_request_node(node):
+                if event_type == 'model_request':
                     # Show assistant prefix at the start
                     console.print("[bold blue]Assistant:[/bold blue] ", end="")
+                
+                elif event_type == 'text_delta':
+                    console.print(event['content'], end="")
+                    response_text += event['content']
+                
+                elif event_type == 'text_done':
+                    console.print()  # New line after streaming
+                
+                elif event_type == 'tool_call':
+                    args = event['args']
+                    console.print(f"  🔹 [cyan]Calling tool:[/cyan] [bold]{event['tool_name']}[/bold]")
                     
-                    # Stream model request events for real-time text
-                    async with node.stream(run.ctx) as request_stream:
-                        async for event in request_stream:
-                            event_type = type(event).__name__
-                            
-                            if event_type == "PartDeltaEvent":
-                                # Extract content from delta
-                                if hasattr(event, 'delta') and hasattr(event.delta, 'content_delta'):
-                                    delta_text = event.delta.content_delta
-                                    if delta_text:
-                                        console.print(delta_text, end="")
-                                        response_text += delta_text
-                            elif event_type == "FinalResultEvent":
-                                console.print()  # New line after streaming
+                    # Show tool args if available
+                    if args and isinstance(args, dict):
+                        # Show first few characters of each arg
+                        arg_preview = []
+                        for key, value in list(args.items())[:3]:
+                            val_str = str(value)
+                            if len(val_str) > 50:
+                                val_str = val_str[:47] + "..."
+                            arg_preview.append(f"{key}={val_str}")
+                        console.print(f"    [dim]Args: {', '.join(arg_preview)}[/dim]")
+                    elif args:
+                        args_str = str(args)
+                        if len(args_str) > 100:
+                            args_str = args_str[:97] + "..."
+                        console.print(f"    [dim]Args: {args_str}[/dim]")
                 
-                # Handle tool calls
-                elif Agent.is_call_tools_node(node):
-                    # Stream tool execution events
-                    async with node.stream(run.ctx) as tool_stream:
-                        async for event in tool_stream:
-                            event_type = type(event).__name__
-                            
-                            if event_type == "FunctionToolCallEvent":
-                                # Extract tool name from the part attribute
-                                tool_name = "Unknown Tool"
-                                args = None
-                                
-                                # Check if the part attribute contains the tool call
-                                if hasattr(event, 'part'):
-                                    part = event.part
-                                    
-                                    # Check if part has tool_name directly
-                                    if hasattr(part, 'tool_name'):
-                                        tool_name = part.tool_name
-                                    elif hasattr(part, 'function_name'):
-                                        tool_name = part.function_name
-                                    elif hasattr(part, 'name'):
-                                        tool_name = part.name
-                                    
-                                    # Check for arguments in part
-                                    if hasattr(part, 'args'):
-                                        args = part.args
-                                    elif hasattr(part, 'arguments'):
-                                        args = part.arguments
-                                
-                                console.print(f"  🔹 [cyan]Calling tool:[/cyan] [bold]{tool_name}[/bold]")
-                                
-                                # Show tool args if available
-                                if args and isinstance(args, dict):
-                                    # Show first few characters of each arg
-                                    arg_preview = []
-                                    for key, value in list(args.items())[:3]:
-                                        val_str = str(value)
-                                        if len(val_str) > 50:
-                                            val_str = val_str[:47] + "..."
-                                        arg_preview.append(f"{key}={val_str}")
-                                    console.print(f"    [dim]Args: {', '.join(arg_preview)}[/dim]")
-                                elif args:
-                                    args_str = str(args)
-                                    if len(args_str) > 100:
-                                        args_str = args_str[:97] + "..."
-                                    console.print(f"    [dim]Args: {args_str}[/dim]")
-                            
-                            elif event_type == "FunctionToolResultEvent":
-                                # Display tool result - check different possible attributes
-                                result = None
-                                if hasattr(event, 'result'):
-                                    result = str(event.result)
-                                elif hasattr(event, 'return_value'):
-                                    result = str(event.return_value)
-                                elif hasattr(event, 'tool_return'):
-                                    result = str(event.tool_return)
-                                elif hasattr(event, 'part'):
-                                    if hasattr(event.part, 'content'):
-                                        result = str(event.part.content)
-                                    else:
-                                        result = str(event.part)
-                                else:
-                                    # Debug: show what attributes are available
-                                    attrs = [attr for attr in dir(event) if not attr.startswith('_')]
-                                    result = f"Unknown result structure. Attrs: {attrs[:5]}"
-                                
-                                if result and len(result) > 100:
-                                    result = result[:97] + "..."
-                                console.print(f"  ✅ [green]Tool result:[/green] [dim]{result}[/dim]")
+                elif event_type == 'tool_result':
+                    result = event['content']
+                    if result and len(result) > 100:
+                        result = result[:97] + "..."
+                    console.print(f"  ✅ [green]Tool result:[/green] [dim]{result}[/dim]")
                 
-                # Handle end node
-                elif Agent.is_end_node(node):
-                    pass  # Keep it clean
-        
-        # Get final result
-        final_result = run.result
-        final_output = final_result.output if hasattr(final_result, 'output') else str(final_result)
+                elif event_type == 'final':
+                    final_output = event['output']
         
         # Return both streamed and final content
         return (response_text.strip(), final_output)
@@ -173,6 +103,7 @@ def display_help():
 - **help**: Show this help message
 - **clear**: Clear the screen
 - **info**: Display system configuration
+- **stats**: Show per-stage latency (p50/p95/p99) for this session
 - **set <key>=<value>**: Set a preference (e.g., 'set text_weight=0.5')
 
 # Search Tips
@@ -184,6 +115,24 @@ def display_help():
     console.print(Panel(Markdown(help_text), title="Help", border_style="cyan"))
 
 
+def display_stats():
+    """Display per-stage latency percentiles."""
+    table = Table(title="Latency by Stage", border_style="magenta")
+    for column in ("Stage", "Count", "p50 ms", "p95 ms", "p99 ms", "Errors"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+    
+    for stage, stats in recorder.snapshot().items():
+        table.add_row(
+            stage,
+            str(stats['count']),
+            f"{stats['p50_ms']:.1f}",
+            f"{stats['p95_ms']:.1f}",
+            f"{stats['p99_ms']:.1f}",
+            str(stats['errors'])
+        )
+    console.print(table)
+
+
 async def main():
     """Main conversation loop."""
     
@@ -197,7 +146,7 @@ async def main():
     
     console.print("[bold green]✓[/bold green] Search system initialized\n")
     
-    conversation_history = []
+    conversation_history = ConversationHistory.from_settings(deps.settings)
     
     try:
         while True:
@@ -232,6 +181,10 @@ async def main():
                     ))
                     continue
                 
+                elif user_input.lower() == 'stats':
+                    display_stats()
+                    continue
+                
                 elif user_input.lower().startswith('set '):
                     # Handle preference setting
                     parts = user_input[4:].split('=')
@@ -254,9 +207,6 @@ async def main():
                 if not user_input:
                     continue
                 
-                # Add to history
-                conversation_history.append(f"User: {user_input}")
-                
                 # Stream the interaction and get response
                 streamed_text, final_response = await stream_agent_interaction(
                     user_input, 
@@ -268,12 +218,14 @@ async def main():
                 if streamed_text:
                     # Response was streamed, just add spacing
                     console.print()
-                    conversation_history.append(f"Assistant: {streamed_text}")
+                    conversation_history.add_turn(user_input, streamed_text)
                 elif final_response and final_response.strip():
                     # Response wasn't streamed, display with proper formatting
                     console.print(f"[bold blue]Assistant:[/bold blue] {final_response}")
                     console.print()
-                    conversation_history.append(f"Assistant: {final_response}")
+                    conversation_history.add_turn(user_input, final_response)
+                else:
+                    conversation_history.add_turn(user_input, "")
                     
             except KeyboardInterrupt:
                 console.print("\n[yellow]Use 'exit' to quit[/yellow]")
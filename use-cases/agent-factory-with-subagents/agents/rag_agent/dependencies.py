@@ -2,9 +2,13 @@
 
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
+import asyncio
 import asyncpg
 import openai
 from settings import load_settings
+from utils.providers import get_dimensions_param
+from utils.resources import registry
+from utils.telemetry import span
 
 
 @dataclass
@@ -15,6 +19,15 @@ class AgentDependencies:
     db_pool: Optional[asyncpg.Pool] = None
     openai_client: Optional[openai.AsyncOpenAI] = None
     settings: Optional[Any] = None
+    exact_index: Optional[Any] = None
+    reranker: Optional[Any] = None
+    
+    # Speculative hybrid search for the current user message
+    prefetch: Optional[Any] = None
+    
+    # Whether db_pool/openai_client came from the shared registry
+    _owns_pool: bool = field(default=False, repr=False)
+    _owns_client: bool = field(default=False, repr=False)
     
     # Session context
     session_id: Optional[str] = None
@@ -26,39 +39,95 @@ class AgentDependencies:
         if not self.settings:
             self.settings = load_settings()
         
-        # Initialize database pool
+        # Acquire the process-wide database pool
         if not self.db_pool:
-            self.db_pool = await asyncpg.create_pool(
+            self.db_pool = await registry.acquire_pool(
                 self.settings.database_url,
                 min_size=self.settings.db_pool_min_size,
                 max_size=self.settings.db_pool_max_size
             )
+            self._owns_pool = True
         
-        # Initialize OpenAI client (or compatible provider)
+        # Acquire the shared OpenAI client (or compatible provider)
         if not self.openai_client:
-            self.openai_client = openai.AsyncOpenAI(
-                api_key=self.settings.llm_api_key,
-                base_url=self.settings.llm_base_url
+            self.openai_client = await registry.acquire_openai_client(
+                self.settings.llm_api_key,
+                self.settings.llm_base_url
+            )
+            self._owns_client = True
+        
+        # Load the in-memory exact search index once per process if configured;
+        # chunks ingested later are not seen until the process restarts
+        if self.settings.search_backend == "exact" and self.exact_index is None:
+            from exact_search import ExactSearchIndex
+            self.exact_index = await registry.get_shared(
+                ("exact_index", self.settings.exact_index_path),
+                lambda: ExactSearchIndex.load_or_build(self.db_pool, self.settings.exact_index_path)
+            )
+        
+        # Load the local re-ranking model once per process if configured
+        if self.settings.rerank_model and self.reranker is None:
+            from reranker import create_reranking_stage
+            self.reranker = await registry.get_shared(
+                ("reranker", self.settings.rerank_model),
+                lambda: asyncio.to_thread(
+                    create_reranking_stage,
+                    self.settings.rerank_model,
+                    self.settings.rerank_batch_size
+                )
             )
     
     async def cleanup(self):
-        """Clean up external connections."""
+        """Release external connections."""
+        if self.prefetch is not None:
+            self.prefetch.cancel()
+            self.prefetch = None
+        
         if self.db_pool:
-            await self.db_pool.close()
+            if self._owns_pool:
+                # The shared pool closes when its last session releases it
+                await registry.release_pool(self.settings.database_url)
+            else:
+                await self.db_pool.close()
             self.db_pool = None
+            self._owns_pool = False
+        
+        if self.openai_client and self._owns_client:
+            await registry.release_openai_client(
+                self.settings.llm_api_key,
+                self.settings.llm_base_url
+            )
+            self.openai_client = None
+            self._owns_client = False
     
     async def get_embedding(self, text: str) -> list[float]:
         """Generate embedding for text using OpenAI."""
         if not self.openai_client:
             await self.initialize()
         
-        response = await self.openai_client.embeddings.create(
-            model=self.settings.embedding_model,
-            input=text
-        )
+        with span("embedding"):
+            response = await self.openai_client.embeddings.create(
+                model=self.settings.embedding_model,
+                input=text,
+                **get_dimensions_param(self.settings.embedding_model, self.settings.embedding_dimension)
+            )
         # Return as list of floats - asyncpg will handle conversion
         return response.data[0].embedding
     
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate embeddings for several texts in one request."""
+        if not self.openai_client:
+            await self.initialize()
+        
+        with span("embedding", batch_size=len(texts)):
+            response = await self.openai_client.embeddings.create(
+                model=self.settings.embedding_model,
+                input=texts,
+                **get_dimensions_param(self.settings.embedding_model, self.settings.embedding_dimension)
+            )
+        # Embeddings are returned in input order
+        return [item.embedding for item in response.data]
+    
     def set_user_preference(self, key: str, value: Any):
         """Set a user preference for the session."""
         self.user_preferences[key] = value
@@ -0,0 +1,136 @@
+"""Conversation history with a rolling summary to keep prompts bounded."""
+
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+from packing import estimate_tokens
+
+
+def shorten(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, ending at a word boundary."""
+    text = " ".join(text.split())
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip(" ,;:") + "..."
+
+
+def summarize_turn(user: str, assistant: str) -> str:
+    """
+    Compress a turn into one summary line.
+    
+    Keeps the question and the first sentence of the answer; the full
+    answer already reached the user and the model only needs the gist.
+    """
+    first_sentence = re.split(r"(?<=[.!?])\s", " ".join(assistant.split()), maxsplit=1)[0]
+    line = f"- User asked: {shorten(user, 30)}"
+    if first_sentence:
+        line += f" | Answer: {shorten(first_sentence, 40)}"
+    return line
+
+
+class ConversationHistory:
+    """
+    Recent turns verbatim plus a summary of older ones, within a token budget.
+    
+    Turns leaving the recent window are summarized once when they are
+    evicted, and the rendered context is cached until the next turn, so the
+    cost per message and the prompt size stay flat as the session grows.
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        recent_turns: int = 3,
+        max_turn_tokens: int = 300,
+        summary_tokens: int = 400,
+        summarizer: Callable[[str, str], str] = summarize_turn
+    ):
+        """
+        Initialize history.
+        
+        Args:
+            token_budget: Approximate token budget for the rendered history
+            recent_turns: Turns kept verbatim (each side capped at max_turn_tokens)
+            max_turn_tokens: Token cap for one user message or answer
+            summary_tokens: Token cap for the summary of older turns
+            summarizer: Turns an evicted (user, assistant) pair into a summary line
+        """
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.max_turn_tokens = max_turn_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.turns: List[Tuple[str, str]] = []
+        self.summary_lines: List[str] = []
+        self.dropped_turns = 0
+        self._rendered: Optional[str] = None
+    
+    @classmethod
+    def from_settings(cls, settings: Any) -> "ConversationHistory":
+        """Create history sized by the application settings."""
+        return cls(
+            token_budget=settings.history_token_budget,
+            recent_turns=settings.history_recent_turns,
+            max_turn_tokens=settings.history_max_turn_tokens,
+            summary_tokens=settings.history_summary_tokens
+        )
+    
+    def __len__(self) -> int:
+        return self.dropped_turns + len(self.summary_lines) + len(self.turns)
+    
+    def add_turn(self, user: str, assistant: str):
+        """Record a completed turn and compact older ones."""
+        self.turns.append((
+            shorten(user, self.max_turn_tokens),
+            shorten(assistant, self.max_turn_tokens)
+        ))
+        self._compact()
+        self._rendered = None
+    
+    def _compact(self):
+        """Move old turns into the summary until both caps are met."""
+        while self.turns and (
+            len(self.turns) > self.recent_turns
+            or (len(self.turns) > 1 and self._recent_tokens() + self._summary_tokens() > self.token_budget)
+        ):
+            user, assistant = self.turns.pop(0)
+            self.summary_lines.append(self.summarizer(user, assistant))
+        
+        # Oldest summary lines go first once the summary is over its cap
+        while self.summary_lines and self._summary_tokens() > self.summary_tokens:
+            self.summary_lines.pop(0)
+            self.dropped_turns += 1
+    
+    def _recent_tokens(self) -> int:
+        return sum(estimate_tokens(user) + estimate_tokens(assistant) + 4 for user, assistant in self.turns)
+    
+    def _summary_tokens(self) -> int:
+        return sum(estimate_tokens(line) + 1 for line in self.summary_lines)
+    
+    def render(self) -> str:
+        """
+        Render the history for the prompt.
+        
+        Returns:
+            Summary of older turns followed by recent 'User:'/'Assistant:' lines
+        """
+        if self._rendered is None:
+            lines = []
+            if self.summary_lines:
+                lines.append("Summary of earlier conversation:")
+                if self.dropped_turns:
+                    lines.append(f"- ({self.dropped_turns} earlier turns omitted)")
+                lines.extend(self.summary_lines)
+                lines.append("")
+            for user, assistant in self.turns:
+                lines.append(f"User: {user}")
+                if assistant:
+                    lines.append(f"Assistant: {assistant}")
+            self._rendered = "\n".join(lines)
+        return self._rendered
+    
+    def token_count(self) -> int:
+        """Approximate tokens of the rendered history."""
+        return estimate_tokens(self.render())
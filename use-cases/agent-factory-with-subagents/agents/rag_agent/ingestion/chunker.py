@@ -26,10 +26,6 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from utils.providers import get_embedding_client, get_ingestion_model
 
-# Initialize clients with flexible providers
-embedding_client = get_embedding_client()
-ingestion_model = get_ingestion_model()
-
 
 @dataclass
 class ChunkingConfig:
@@ -77,8 +73,9 @@ class SemanticChunker:
             config: Chunking configuration
         """
         self.config = config
-        self.client = embedding_client
-        self.model = ingestion_model
+        # Created per chunker so they use the currently open HTTP transport
+        self.client = get_embedding_client()
+        self.model = get_ingestion_model()
     
     async def chunk_document(
         self,
@@ -16,22 +16,25 @@ from .chunker import DocumentChunk
 
 # Import flexible providers
 try:
-    from ..utils.providers import get_embedding_client, get_embedding_model
+    from ..utils.providers import (
+        get_embedding_client, get_embedding_model, get_embedding_dimension, get_dimensions_param
+    )
 except ImportError:
     # For direct execution or testing
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.providers import get_embedding_client, get_embedding_model
+    from utils.providers import (
+        get_embedding_client, get_embedding_model, get_embedding_dimension, get_dimensions_param
+    )
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize client with flexible provider
-embedding_client = get_embedding_client()
 EMBEDDING_MODEL = get_embedding_model()
+EMBEDDING_DIMENSION = get_embedding_dimension()
 
 
 class EmbeddingGenerator:
@@ -42,7 +45,9 @@ class EmbeddingGenerator:
         model: str = EMBEDDING_MODEL,
         batch_size: int = 100,
         max_retries: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        dimensions: Optional[int] = EMBEDDING_DIMENSION,
+        client: Optional[Any] = None
     ):
         """
         Initialize embedding generator.
@@ -52,8 +57,13 @@ class EmbeddingGenerator:
             batch_size: Number of texts to process in parallel
             max_retries: Maximum number of retry attempts
             retry_delay: Delay between retries in seconds
+            dimensions: Output dimension; text-embedding-3 models can be
+                reduced below their native size (e.g. 256 or 512)
+            client: OpenAI-compatible client (default: a client on the shared
+                HTTP transport, created here so it is never one already closed)
         """
         self.model = model
+        self.client = client or get_embedding_client()
         self.batch_size = batch_size
         self.max_retries = max_retries
         self.retry_delay = retry_delay
@@ -69,7 +79,12 @@ class EmbeddingGenerator:
             logger.warning(f"Unknown model {model}, using default config")
             self.config = {"dimensions": 1536, "max_tokens": 8191}
         else:
-            self.config = self.model_configs[model]
+            self.config = dict(self.model_configs[model])
+        
+        # Extra request arguments for reduced-dimension output
+        self.dimensions_param = get_dimensions_param(model, dimensions)
+        if dimensions is not None:
+            self.config["dimensions"] = dimensions
     
     async def generate_embedding(self, text: str) -> List[float]:
         """
@@ -87,9 +102,10 @@ class EmbeddingGenerator:
         
         for attempt in range(self.max_retries):
             try:
-                response = await embedding_client.embeddings.create(
+                response = await self.client.embeddings.create(
                     model=self.model,
-                    input=text
+                    input=text,
+                    **self.dimensions_param
                 )
                 
                 return response.data[0].embedding
@@ -143,9 +159,10 @@ class EmbeddingGenerator:
         
         for attempt in range(self.max_retries):
             try:
-                response = await embedding_client.embeddings.create(
+                response = await self.client.embeddings.create(
                     model=self.model,
-                    input=processed_texts
+                    input=processed_texts,
+                    **self.dimensions_param
                 )
                 
                 return [data.embedding for data in response.data]
@@ -4,9 +4,8 @@ Main ingestion script for processing markdown documents into vector DB and knowl
 
 import os
 import asyncio
+import inspect
 import logging
-import json
-import glob
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -16,19 +15,34 @@ import asyncpg
 from dotenv import load_dotenv
 
 from .chunker import ChunkingConfig, create_chunker, DocumentChunk
-from .embedder import create_embedder
+from .embedder import create_embedder, EMBEDDING_DIMENSION
+from .manifest import ManifestEntry, ensure_manifest_table, load_manifest, record_completed, record_failed, record_stat
+from .loaders import DEFAULT_CACHE_DIR, DocumentLoader
+from .reader import DocumentText
+from .scanner import DocumentScanner, ScannedFile, stat_file
+from .work_queue import IngestionWorker, enqueue, ensure_queue_table, queue_stats
 
 # Import utilities
 try:
-    from ..utils.db_utils import initialize_database, close_database, db_pool
+    from ..utils.db_utils import (
+        initialize_database, close_database, db_pool, apply_schema,
+        DEFAULT_COLLECTION, chunk_hash, delete_document, ensure_collection_partition, ensure_unique_sources,
+        stored_chunk_hashes, upsert_document
+    )
     from ..utils.models import IngestionConfig, IngestionResult
+    from ..utils.telemetry import recorder, span
 except ImportError:
     # For direct execution or testing
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.db_utils import initialize_database, close_database, db_pool
+    from utils.db_utils import (
+        initialize_database, close_database, db_pool, apply_schema,
+        DEFAULT_COLLECTION, chunk_hash, delete_document, ensure_collection_partition, ensure_unique_sources,
+        stored_chunk_hashes, upsert_document
+    )
     from utils.models import IngestionConfig, IngestionResult
+    from utils.telemetry import recorder, span
 
 # Load environment variables
 load_dotenv()
@@ -43,19 +57,49 @@ class DocumentIngestionPipeline:
         self,
         config: IngestionConfig,
         documents_folder: str = "documents",
-        clean_before_ingest: bool = False
+        clean_before_ingest: bool = False,
+        embedding_client: Optional[Any] = None,
+        resume: bool = False,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        scan_workers: int = 8,
+        extract_workers: int = 4,
+        extraction_cache: Optional[str] = None,
+        collection: str = DEFAULT_COLLECTION
     ):
         """
         Initialize ingestion pipeline.
         
         Args:
             config: Ingestion configuration
-            documents_folder: Folder containing markdown documents
+            documents_folder: Folder containing the documents
             clean_before_ingest: Whether to clean existing data before ingestion
+            embedding_client: OpenAI-compatible client for embeddings
+                (default: the shared embedding client)
+            resume: Skip files the manifest records as ingested with
+                unchanged content, and replace changed or failed ones
+            include: File globs to ingest (default: markdown, text and every
+                format with an available loader, e.g. *.html, *.docx, *.pdf)
+            exclude: File and folder globs to skip
+            scan_workers: Threads used to scan the documents folder
+            extract_workers: Processes extracting PDF, HTML and DOCX text
+                (0 extracts on a thread)
+            extraction_cache: Folder caching extracted text by file hash
+                (None disables caching)
+            collection: Collection (tenant) the documents are ingested into;
+                sources, the manifest and --clean are scoped to it
         """
         self.config = config
         self.documents_folder = documents_folder
         self.clean_before_ingest = clean_before_ingest
+        self.resume = resume
+        self.collection = collection
+        self.scanner = DocumentScanner(documents_folder, include, exclude, scan_workers)
+        self.loader = DocumentLoader(extract_workers, extraction_cache)
+        
+        # Manifest entries by source (loaded when resuming) and sources skipped by the last run
+        self.manifest: Dict[str, ManifestEntry] = {}
+        self.skipped: List[str] = []
         
         # Initialize components
         self.chunker_config = ChunkingConfig(
@@ -66,7 +110,7 @@ class DocumentIngestionPipeline:
         )
         
         self.chunker = create_chunker(self.chunker_config)
-        self.embedder = create_embedder()
+        self.embedder = create_embedder(client=embedding_client)
         
         self._initialized = False
     
@@ -84,7 +128,8 @@ class DocumentIngestionPipeline:
         logger.info("Ingestion pipeline initialized")
     
     async def close(self):
-        """Close database connections."""
+        """Close database connections and stop extraction workers."""
+        self.loader.close()
         if self._initialized:
             await close_database()
             self._initialized = False
@@ -105,33 +150,57 @@ class DocumentIngestionPipeline:
         if not self._initialized:
             await self.initialize()
         
+        async with db_pool.acquire() as conn:
+            await ensure_unique_sources(conn)
+            await ensure_collection_partition(conn, self.collection)
+            await ensure_manifest_table(conn)
+        
         # Clean existing data if requested
         if self.clean_before_ingest:
             await self._clean_databases()
         
-        # Find all markdown files
-        markdown_files = self._find_markdown_files()
+        # Find all documents (one parallel walk, off the event loop)
+        document_files = await asyncio.to_thread(self.scanner.scan)
         
-        if not markdown_files:
-            logger.warning(f"No markdown files found in {self.documents_folder}")
+        if not document_files:
+            logger.warning(f"No documents found in {self.documents_folder}")
             return []
         
-        logger.info(f"Found {len(markdown_files)} markdown files to process")
+        logger.info(f"Found {len(document_files)} documents to process")
         
-        results = []
+        self.manifest = {}
+        self.skipped = []
+        if self.resume:
+            async with db_pool.acquire() as conn:
+                self.manifest = await load_manifest(conn, self.collection)
+            logger.info(f"Resuming with {len(self.manifest)} manifest entries")
         
-        for i, file_path in enumerate(markdown_files):
+        results = []
+        # Files extracted ahead of the one being ingested, so worker processes stay busy
+        lookahead = self.loader.workers * 2
+        
+        for i, scanned in enumerate(document_files):
+            file_path = scanned.path
+            source = os.path.relpath(file_path, self.documents_folder)
+            self.loader.prefetch(
+                upcoming.path for upcoming in document_files[i:i + lookahead]
+                if not self._is_unchanged(upcoming)
+            )
             try:
-                logger.info(f"Processing file {i+1}/{len(markdown_files)}: {file_path}")
+                logger.info(f"Processing file {i+1}/{len(document_files)}: {file_path}")
                 
-                result = await self._ingest_single_document(file_path)
-                results.append(result)
+                result = await self.ingest_file(file_path, source, self.manifest.get(source), scanned)
+                if result is None:
+                    self.skipped.append(source)
+                else:
+                    results.append(result)
                 
                 if progress_callback:
-                    progress_callback(i + 1, len(markdown_files))
-                
+                    progress_callback(i + 1, len(document_files))
+            
             except Exception as e:
                 logger.error(f"Failed to process {file_path}: {e}")
+                await self.record_failure(source, None, str(e))
                 results.append(IngestionResult(
                     document_id="",
                     title=os.path.basename(file_path),
@@ -141,21 +210,151 @@ class DocumentIngestionPipeline:
                     processing_time_ms=0,
                     errors=[str(e)]
                 ))
+        self.loader.clear()
         
         # Log summary
         total_chunks = sum(r.chunks_created for r in results)
         total_errors = sum(len(r.errors) for r in results)
         
         logger.info(f"Ingestion complete: {len(results)} documents, {total_chunks} chunks, {total_errors} errors")
+        if self.skipped:
+            logger.info(f"Skipped {len(self.skipped)} unchanged documents already ingested")
         
         return results
     
-    async def _ingest_single_document(self, file_path: str) -> IngestionResult:
+    async def ingest_file(
+        self,
+        file_path: str,
+        source: Optional[str] = None,
+        previous: Optional[ManifestEntry] = None,
+        scanned: Optional[ScannedFile] = None
+    ) -> Optional[IngestionResult]:
+        """
+        Ingest one file unless the manifest shows it is already ingested.
+        
+        Args:
+            file_path: Path to the document file
+            source: Source recorded for the document (default: path relative
+                to the documents folder)
+            previous: Manifest entry from an earlier run; an unchanged,
+                completed file is skipped
+            scanned: Stat information from the scan (default: stat the file)
+        
+        Returns:
+            Ingestion result, or None if the file was skipped
+        """
+        source = source or os.path.relpath(file_path, self.documents_folder)
+        scanned = scanned or stat_file(file_path)
+        # Same size and mtime: skip without reading the file
+        if previous is not None and previous.is_unchanged(scanned.size, scanned.mtime_ns):
+            logger.debug(f"Skipping {file_path}: unchanged since it was ingested")
+            return None
+        
+        # One read serves the hash check and, if the file changed, ingestion
+        with span("ingest.read"):
+            document = await self.loader.load(file_path)
+        content_hash = document.content_hash
+        if previous is not None and previous.is_current(content_hash):
+            logger.debug(f"Skipping {file_path}: already ingested")
+            # Let the next run skip it on stat alone
+            async with db_pool.acquire() as conn:
+                await record_stat(conn, source, scanned.size, scanned.mtime_ns, self.collection)
+            return None
+        
+        result = await self._ingest_single_document(
+            file_path,
+            document,
+            source=source,
+            scanned=scanned
+        )
+        if result.errors and not result.document_id:
+            await self.record_failure(source, content_hash, "; ".join(result.errors))
+        return result
+    
+    def _is_unchanged(self, scanned: ScannedFile) -> bool:
+        """Whether the loaded manifest shows a scanned file needs no reading."""
+        previous = self.manifest.get(os.path.relpath(scanned.path, self.documents_folder))
+        return previous is not None and previous.is_unchanged(scanned.size, scanned.mtime_ns)
+    
+    async def enqueue_documents(self) -> int:
+        """
+        Add every document in the documents folder to the ingestion queue.
+        
+        Workers (``ingest --worker``) then claim and ingest them. Paths are
+        stored absolute, so every worker must see the folder at the same path.
+        
+        Returns:
+            Number of files queued
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        async with db_pool.acquire() as conn:
+            await ensure_unique_sources(conn)
+            await ensure_collection_partition(conn, self.collection)
+            await ensure_manifest_table(conn)
+        
+        if self.clean_before_ingest:
+            await self._clean_databases()
+        
+        files = [
+            (os.path.abspath(scanned.path), os.path.relpath(scanned.path, self.documents_folder))
+            for scanned in await asyncio.to_thread(self.scanner.scan)
+        ]
+        async with db_pool.acquire() as conn:
+            await ensure_queue_table(conn)
+            queued = await enqueue(conn, files, self.collection)
+        
+        logger.info(f"Queued {queued} of {len(files)} files")
+        return queued
+    
+    async def remove_file(self, file_path: str) -> bool:
+        """
+        Delete the document ingested from a file that no longer exists.
+        
+        Args:
+            file_path: Path of the removed file
+        
+        Returns:
+            True if a document was deleted
+        """
+        source = os.path.relpath(file_path, self.documents_folder)
+        async with db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "DELETE FROM ingestion_manifest WHERE collection = $1 AND source = $2",
+                    self.collection,
+                    source
+                )
+                document_id = await delete_document(source, self.collection, conn=conn)
+        
+        if document_id:
+            logger.info(f"Removed document for deleted file {source}")
+        return document_id is not None
+    
+    async def record_failure(self, source: str, content_hash: Optional[str], error: str):
+        """Record a failed file in the manifest; never raises."""
+        try:
+            async with db_pool.acquire() as conn:
+                await record_failed(conn, source, content_hash, error, self.collection)
+        except Exception as e:
+            logger.error(f"Failed to record manifest entry for {source}: {e}")
+    
+    async def _ingest_single_document(
+        self,
+        file_path: str,
+        document: Optional[DocumentText] = None,
+        source: Optional[str] = None,
+        scanned: Optional[ScannedFile] = None
+    ) -> IngestionResult:
         """
         Ingest a single document.
         
         Args:
             file_path: Path to the document file
+            document: The file already read (default: read it)
+            source: Document source (default: path relative to the documents folder)
+            scanned: Size and mtime of the file, recorded in the manifest
         
         Returns:
             Ingestion result
@@ -163,22 +362,28 @@ class DocumentIngestionPipeline:
         start_time = datetime.now()
         
         # Read document
-        document_content = self._read_document(file_path)
-        document_title = self._extract_title(document_content, file_path)
-        document_source = os.path.relpath(file_path, self.documents_folder)
+        if document is None:
+            with span("ingest.read"):
+                document = await self.loader.load(file_path)
+        document_content = document.content
+        document_title = self._extract_title(document, file_path)
+        document_source = source or os.path.relpath(file_path, self.documents_folder)
         
         # Extract metadata from content
-        document_metadata = self._extract_document_metadata(document_content, file_path)
+        document_metadata = self._extract_document_metadata(document, file_path)
         
         logger.info(f"Processing document: {document_title}")
         
-        # Chunk the document
-        chunks = await self.chunker.chunk_document(
-            content=document_content,
-            title=document_title,
-            source=document_source,
-            metadata=document_metadata
-        )
+        # Chunk the document (SimpleChunker is synchronous, SemanticChunker async)
+        with span("ingest.chunk"):
+            chunks = self.chunker.chunk_document(
+                content=document_content,
+                title=document_title,
+                source=document_source,
+                metadata=document_metadata
+            )
+            if inspect.isawaitable(chunks):
+                chunks = await chunks
         
         if not chunks:
             logger.warning(f"No chunks created for {document_title}")
@@ -197,18 +402,25 @@ class DocumentIngestionPipeline:
         # Entity extraction removed (graph-related functionality)
         entities_extracted = 0
         
-        # Generate embeddings
-        embedded_chunks = await self.embedder.embed_chunks(chunks)
-        logger.info(f"Generated embeddings for {len(embedded_chunks)} chunks")
+        # Generate embeddings, except for chunks already stored with this content
+        stored = await stored_chunk_hashes(document_source, self.collection)
+        new_chunks = [chunk for chunk in chunks if chunk_hash(chunk.content) not in stored]
+        with span("ingest.embed"):
+            embedded = {chunk.index: chunk for chunk in await self.embedder.embed_chunks(new_chunks)}
+        embedded_chunks = [embedded.get(chunk.index, chunk) for chunk in chunks]
+        logger.info(f"Generated embeddings for {len(new_chunks)} chunks, reused {len(chunks) - len(new_chunks)}")
         
         # Save to PostgreSQL
-        document_id = await self._save_to_postgres(
-            document_title,
-            document_source,
-            document_content,
-            embedded_chunks,
-            document_metadata
-        )
+        with span("ingest.write"):
+            document_id = await self._save_to_postgres(
+                document_title,
+                document_source,
+                document_content,
+                embedded_chunks,
+                document_metadata,
+                content_hash=document.content_hash,
+                scanned=scanned
+            )
         
         logger.info(f"Saved document to PostgreSQL with ID: {document_id}")
         
@@ -229,69 +441,29 @@ class DocumentIngestionPipeline:
             errors=graph_errors
         )
     
-    def _find_markdown_files(self) -> List[str]:
-        """Find all markdown files in the documents folder."""
-        if not os.path.exists(self.documents_folder):
-            logger.error(f"Documents folder not found: {self.documents_folder}")
-            return []
-        
-        patterns = ["*.md", "*.markdown", "*.txt"]
-        files = []
-        
-        for pattern in patterns:
-            files.extend(glob.glob(os.path.join(self.documents_folder, "**", pattern), recursive=True))
-        
-        return sorted(files)
-    
-    def _read_document(self, file_path: str) -> str:
-        """Read document content from file."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as f:
-                return f.read()
+    def _extract_title(self, document: DocumentText, file_path: str) -> str:
+        """Title from the document's first heading, else the filename."""
+        return document.title or os.path.splitext(os.path.basename(file_path))[0]
     
-    def _extract_title(self, content: str, file_path: str) -> str:
-        """Extract title from document content or filename."""
-        # Try to find markdown title
-        lines = content.split('\n')
-        for line in lines[:10]:  # Check first 10 lines
-            line = line.strip()
-            if line.startswith('# '):
-                return line[2:].strip()
-        
-        # Fallback to filename
-        return os.path.splitext(os.path.basename(file_path))[0]
-    
-    def _extract_document_metadata(self, content: str, file_path: str) -> Dict[str, Any]:
+    def _extract_document_metadata(self, document: DocumentText, file_path: str) -> Dict[str, Any]:
         """Extract metadata from document content."""
         metadata = {
             "file_path": file_path,
-            "file_size": len(content),
+            "file_size": len(document.content),
             "ingestion_date": datetime.now().isoformat()
         }
         
-        # Try to extract YAML frontmatter
-        if content.startswith('---'):
-            try:
-                import yaml
-                end_marker = content.find('\n---\n', 4)
-                if end_marker != -1:
-                    frontmatter = content[4:end_marker]
-                    yaml_metadata = yaml.safe_load(frontmatter)
-                    if isinstance(yaml_metadata, dict):
-                        metadata.update(yaml_metadata)
-            except ImportError:
-                logger.warning("PyYAML not installed, skipping frontmatter extraction")
-            except Exception as e:
-                logger.warning(f"Failed to parse frontmatter: {e}")
+        # YAML frontmatter, or properties such as author and page_count found by a loader
+        metadata.update(document.frontmatter)
+        metadata.update(document.properties)
         
-        # Extract some basic metadata from content
-        lines = content.split('\n')
-        metadata['line_count'] = len(lines)
-        metadata['word_count'] = len(content.split())
+        # Basic metadata counted while reading
+        metadata['line_count'] = document.line_count
+        metadata['word_count'] = document.word_count
+        if document.format != "text":
+            metadata['format'] = document.format
+        elif document.encoding not in ("utf-8", "utf-8-sig"):
+            metadata['encoding'] = document.encoding
         
         return metadata
     
@@ -301,58 +473,66 @@ class DocumentIngestionPipeline:
         source: str,
         content: str,
         chunks: List[DocumentChunk],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        content_hash: Optional[str] = None,
+        scanned: Optional[ScannedFile] = None
     ) -> str:
-        """Save document and chunks to PostgreSQL."""
+        """
+        Upsert the document and its chunks in PostgreSQL.
+        
+        Unchanged chunks keep their IDs and embeddings (see upsert_document).
+        The manifest entry is written in the same transaction, so an
+        interrupted run never leaves a saved document unrecorded.
+        """
         async with db_pool.acquire() as conn:
             async with conn.transaction():
-                # Insert document
-                document_result = await conn.fetchrow(
-                    """
-                    INSERT INTO documents (title, source, content, metadata)
-                    VALUES ($1, $2, $3, $4)
-                    RETURNING id::text
-                    """,
-                    title,
+                saved = await upsert_document(
                     source,
                     content,
-                    json.dumps(metadata)
+                    [
+                        {
+                            "content": chunk.content,
+                            "chunk_index": chunk.index,
+                            "metadata": chunk.metadata,
+                            "token_count": chunk.token_count,
+                            "embedding": getattr(chunk, "embedding", None)
+                        }
+                        for chunk in chunks
+                    ],
+                    title=title,
+                    metadata=metadata,
+                    collection=self.collection,
+                    conn=conn
                 )
+                document_id = saved["document_id"]
                 
-                document_id = document_result["id"]
-                
-                # Insert chunks
-                for chunk in chunks:
-                    # Convert embedding to PostgreSQL vector string format
-                    embedding_data = None
-                    if hasattr(chunk, 'embedding') and chunk.embedding:
-                        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
-                        embedding_data = '[' + ','.join(map(str, chunk.embedding)) + ']'
-                    
-                    await conn.execute(
-                        """
-                        INSERT INTO chunks (document_id, content, embedding, chunk_index, metadata, token_count)
-                        VALUES ($1::uuid, $2, $3::vector, $4, $5, $6)
-                        """,
-                        document_id,
-                        chunk.content,
-                        embedding_data,
-                        chunk.index,
-                        json.dumps(chunk.metadata),
-                        chunk.token_count
-                    )
-                
-                return document_id
+                await record_completed(
+                    conn,
+                    source,
+                    content_hash,
+                    document_id,
+                    len(chunks),
+                    file_size=scanned.size if scanned else None,
+                    mtime_ns=scanned.mtime_ns if scanned else None,
+                    collection=self.collection
+                )
+        
+        logger.debug(
+            f"Chunks of {source}: {saved['chunks_inserted']} inserted, "
+            f"{saved['chunks_kept']} kept, {saved['chunks_deleted']} deleted"
+        )
+        return document_id
     
     async def _clean_databases(self):
-        """Clean existing data from databases."""
-        logger.warning("Cleaning existing data from databases...")
+        """Clean existing data of the collection from databases."""
+        logger.warning(f"Cleaning existing data of collection {self.collection} from databases...")
         
-        # Clean PostgreSQL
+        # Clean PostgreSQL; the collection predicate on chunks prunes a partitioned table
         async with db_pool.acquire() as conn:
             async with conn.transaction():
-                await conn.execute("DELETE FROM chunks")
-                await conn.execute("DELETE FROM documents")
+                await conn.execute("DELETE FROM ingestion_manifest WHERE collection = $1", self.collection)
+                await conn.execute("DELETE FROM chunks WHERE collection = $1", self.collection)
+                await conn.execute("DELETE FROM documents WHERE collection = $1", self.collection)
         
         logger.info("Cleaned PostgreSQL database")
 
@@ -360,17 +540,51 @@ async def main():
     """Main function for running ingestion."""
     parser = argparse.ArgumentParser(description="Ingest documents into vector DB")
     parser.add_argument("--documents", "-d", default="documents", help="Documents folder path")
-    parser.add_argument("--clean", "-c", action="store_true", help="Clean existing data before ingestion")
+    parser.add_argument("--clean", "-c", action="store_true", help="Clean existing data of the collection before ingestion")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help=f"Collection (tenant) to ingest into (default: {DEFAULT_COLLECTION})")
+    parser.add_argument("--resume", action="store_true", help="Skip files already ingested with unchanged content; retry failed and changed ones")
+    queue_mode = parser.add_mutually_exclusive_group()
+    queue_mode.add_argument("--enqueue", action="store_true", help="Add the documents to the ingestion queue for --worker processes, then exit")
+    queue_mode.add_argument("--worker", action="store_true", help="Claim and ingest files from the ingestion queue until it is drained")
+    parser.add_argument("--follow", action="store_true", help="With --worker, keep polling for new files instead of exiting")
+    parser.add_argument("--batch-size", type=int, default=8, help="With --worker, files claimed at a time")
+    parser.add_argument("--lease-seconds", type=float, default=300.0, help="With --worker, lease on claimed files (renewed by heartbeats)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="With --worker, attempts per file before it is marked failed")
+    parser.add_argument("--watch", action="store_true", help="After syncing the folder, keep watching it and ingest changed files within seconds")
+    parser.add_argument("--debounce", type=float, default=1.0, help="With --watch, seconds a file must be unchanged before it is ingested")
+    parser.add_argument("--poll", action="store_true", help="With --watch, poll for changes instead of using filesystem events")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="With --watch --poll, seconds between folder scans")
     parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size for splitting documents")
     parser.add_argument("--chunk-overlap", type=int, default=200, help="Chunk overlap size")
     parser.add_argument("--no-semantic", action="store_true", help="Disable semantic chunking")
+    parser.add_argument("--include", action="append", metavar="GLOB", help="Only ingest files matching GLOB (repeatable; default: markdown, text, HTML, DOCX and, with pypdf, PDF)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="Skip files and folders matching GLOB, e.g. 'drafts' or 'archive/*' (repeatable)")
+    parser.add_argument("--scan-workers", type=int, default=8, help="Threads scanning the documents folder")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 4, help="Processes extracting text from PDF, HTML and DOCX files")
+    parser.add_argument("--extraction-cache", default=DEFAULT_CACHE_DIR, metavar="DIR", help=f"Cache extracted text by file hash in DIR (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-extraction-cache", action="store_true", help="Extract every PDF, HTML and DOCX file again")
+    parser.add_argument("--init-schema", action="store_true", help="Create the schema (drops existing tables) sized to the embedding dimension")
+    parser.add_argument("--quantized-indexes", choices=("halfvec", "binary"), help="With --init-schema, also create the quantized index for this SEARCH_QUANTIZATION mode")
+    parser.add_argument("--partitioned", action="store_true", help="With --init-schema, partition chunks by collection (sql/partitioned_chunks.sql)")
     # Graph-related arguments removed
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--profile", action="store_true", help="Report time and throughput per stage (read, chunk, embed, write) and peak RSS")
+    parser.add_argument("--cprofile", metavar="PATH", help="Write cProfile stats to PATH (view with snakeviz or pstats)")
+    parser.add_argument("--stub-embeddings", action="store_true", help="Embed with the local deterministic stub instead of the API (combine with --no-semantic to avoid LLM calls)")
+    parser.add_argument("--schema", help="Ingest into this throwaway schema (created with the tables, dropped afterwards)")
+    parser.add_argument("--keep-schema", action="store_true", help="Keep the --schema schema after the run")
     
     args = parser.parse_args()
+    if args.resume and args.clean:
+        parser.error("--resume cannot be combined with --clean")
+    if args.worker and (args.clean or args.resume):
+        parser.error("--worker always resumes; clean with the --enqueue run instead")
+    if args.watch and (args.enqueue or args.worker):
+        parser.error("--watch cannot be combined with --enqueue or --worker")
     
     # Configure logging
-    log_level = logging.DEBUG if args.verbose else logging.INFO
+    # Per-document INFO logs would distort a profile
+    log_level = logging.DEBUG if args.verbose else (logging.WARNING if args.profile else logging.INFO)
     logging.basicConfig(
         level=log_level,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -383,20 +597,107 @@ async def main():
         use_semantic_chunking=not args.no_semantic
     )
     
+    # Local embedding stub, so profiling measures our code rather than the API
+    stub_server = None
+    embedding_client = None
+    if args.stub_embeddings:
+        import openai
+        from .profiling import start_stub_embeddings
+        stub_server, stub_url = await start_stub_embeddings(EMBEDDING_DIMENSION)
+        embedding_client = openai.AsyncOpenAI(api_key="stub", base_url=stub_url)
+    
+    # Throwaway schema: every pooled connection resolves tables there first
+    base_database_url = db_pool.database_url
+    if args.schema:
+        from .profiling import create_schema, with_search_path
+        db_pool.database_url = with_search_path(base_database_url, args.schema)
+        await create_schema(base_database_url, args.schema)
+    
     # Create and run pipeline
     pipeline = DocumentIngestionPipeline(
         config=config,
         documents_folder=args.documents,
-        clean_before_ingest=args.clean
+        clean_before_ingest=args.clean,
+        embedding_client=embedding_client,
+        # Watching keeps the folder in sync, so its initial pass only ingests what changed
+        resume=args.resume or (args.watch and not args.clean),
+        include=args.include,
+        exclude=args.exclude,
+        scan_workers=args.scan_workers,
+        extract_workers=args.extract_workers,
+        extraction_cache=None if args.no_extraction_cache else args.extraction_cache,
+        collection=args.collection
     )
     
     def progress_callback(current: int, total: int):
         print(f"Progress: {current}/{total} documents processed")
     
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    
     try:
+        if args.init_schema or args.schema:
+            await pipeline.initialize()
+            schema_files = ("schema.sql",)
+            if args.partitioned:
+                schema_files += ("partitioned_chunks.sql",)
+            if args.quantized_indexes:
+                schema_files += ("quantized_search.sql", f"quantized_{args.quantized_indexes}.sql")
+            # A fresh --schema is empty; its DROPs would resolve to the tables in public
+            await apply_schema(pipeline.embedder.get_embedding_dimension(), schema_files, drop_existing=not args.schema)
+            # Workers run no DDL, so they can start before anything is enqueued
+            async with db_pool.acquire() as conn:
+                await ensure_manifest_table(conn)
+                await ensure_queue_table(conn)
+        
+        if args.enqueue:
+            queued = await pipeline.enqueue_documents()
+            async with db_pool.acquire() as conn:
+                stats = await queue_stats(conn, pipeline.collection)
+            print(f"Queued {queued} files. Queue: " + ", ".join(f"{n} {status}" for status, n in stats.items()))
+            return
+        
+        if args.watch:
+            import signal
+            from .watcher import DocumentWatcher
+            watcher = DocumentWatcher(
+                pipeline,
+                debounce_seconds=args.debounce,
+                poll_interval=args.poll_interval,
+                use_polling=args.poll
+            )
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, watcher.stop)
+                except NotImplementedError:
+                    # Windows: Ctrl+C still interrupts the run
+                    pass
+            await watcher.run()
+            print(f"Stopped watching: {watcher.ingested} documents ingested, {watcher.removed} removed")
+            return
+        
+        recorder.reset()
         start_time = datetime.now()
         
-        results = await pipeline.ingest_documents(progress_callback)
+        if profiler:
+            profiler.enable()
+        try:
+            if args.worker:
+                worker = IngestionWorker(
+                    pipeline,
+                    batch_size=args.batch_size,
+                    lease_seconds=args.lease_seconds,
+                    max_attempts=args.max_attempts
+                )
+                results = await worker.run(follow=args.follow)
+            else:
+                results = await pipeline.ingest_documents(None if args.profile else progress_callback)
+        finally:
+            if profiler:
+                profiler.disable()
         
         end_time = datetime.now()
         total_time = (end_time - start_time).total_seconds()
@@ -406,21 +707,43 @@ async def main():
         print("INGESTION SUMMARY")
         print("="*50)
         print(f"Documents processed: {len(results)}")
+        if args.resume:
+            print(f"Documents skipped (already ingested): {len(pipeline.skipped)}")
         print(f"Total chunks created: {sum(r.chunks_created for r in results)}")
         # Graph-related stats removed
         print(f"Total errors: {sum(len(r.errors) for r in results)}")
         print(f"Total processing time: {total_time:.2f} seconds")
         print()
         
-        # Print individual results
-        for result in results:
-            status = "✓" if not result.errors else "✗"
-            print(f"{status} {result.title}: {result.chunks_created} chunks")
-            
-            if result.errors:
-                for error in result.errors:
-                    print(f"  Error: {error}")
+        if args.profile:
+            from .profiling import format_stage_report, peak_rss_mb
+            print("STAGE PROFILE")
+            print("="*50)
+            print(format_stage_report(
+                recorder.snapshot(),
+                len(results),
+                sum(r.chunks_created for r in results),
+                total_time,
+                peak_rss_mb()
+            ))
+            print()
+        
+        if profiler:
+            import pstats
+            profiler.dump_stats(args.cprofile)
+            print(f"cProfile stats written to {args.cprofile}; top functions by cumulative time:")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
         
+        # Print individual results
+        if not args.profile:
+            for result in results:
+                status = "✓" if not result.errors else "✗"
+                print(f"{status} {result.title}: {result.chunks_created} chunks")
+                
+                if result.errors:
+                    for error in result.errors:
+                        print(f"  Error: {error}")
+    
     except KeyboardInterrupt:
         print("\nIngestion interrupted by user")
     except Exception as e:
@@ -428,6 +751,12 @@ async def main():
         raise
     finally:
         await pipeline.close()
+        if args.schema and not args.keep_schema:
+            from .profiling import drop_schema
+            await drop_schema(base_database_url, args.schema)
+        if stub_server is not None:
+            from .profiling import stop_stub_embeddings
+            await stop_stub_embeddings(stub_server)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,437 @@
+"""
+Document loaders for formats other than plain text.
+
+Loaders are registered by file extension and MIME type. Each one turns a
+file's bytes into markdown-like text, so headings, list items and tables
+still guide the chunkers. PDF uses pypdf when it is installed. HTML and
+DOCX need only the standard library.
+
+Extraction is the slow part of ingesting these formats, so DocumentLoader
+runs it in a process pool and can extract upcoming files ahead of the
+pipeline (prefetch). Results are cached on disk by content hash, so a file
+that was already extracted is not parsed again, e.g. after --clean or a
+chunking change. Markdown and text files are still read directly by
+ingestion/reader.py.
+"""
+
+import io
+import os
+import re
+import json
+import codecs
+import asyncio
+import hashlib
+import logging
+import zipfile
+import mimetypes
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .reader import DocumentText, SNIFF_BYTES, count_words, extract_title, read_document, sniff_encoding
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+# Read by ingestion/reader.py rather than a registered loader
+TEXT_EXTENSIONS = (".md", ".markdown", ".txt")
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "rag_agent", "extracted"
+)
+
+# Bump when extractors change, so cached results from older versions are ignored
+CACHE_VERSION = 1
+
+
+@dataclass
+class ExtractedText:
+    """Text and structure extracted from a document."""
+    content: str
+    title: Optional[str] = None
+    properties: Dict[str, Any] = field(default_factory=dict)
+    encoding: str = ""
+
+
+@dataclass(frozen=True)
+class FormatLoader:
+    """Extractor for one document format."""
+    name: str
+    extract: Callable[[bytes], ExtractedText]
+    extensions: Tuple[str, ...]
+    mime_types: Tuple[str, ...] = ()
+    # False when its optional dependency is missing; such formats are not scanned by default
+    available: bool = True
+
+
+_BY_EXTENSION: Dict[str, FormatLoader] = {}
+_BY_MIME_TYPE: Dict[str, FormatLoader] = {}
+
+
+def register_loader(loader: FormatLoader):
+    """
+    Register a loader, replacing any earlier one for its extensions and MIME types.
+    
+    The extract function must be defined at module level so worker
+    processes can unpickle it.
+    """
+    for extension in loader.extensions:
+        _BY_EXTENSION[extension.lower()] = loader
+    for mime_type in loader.mime_types:
+        _BY_MIME_TYPE[mime_type] = loader
+
+
+def get_loader(path: str) -> Optional[FormatLoader]:
+    """Loader for a file by its extension, else its guessed MIME type; None for text files."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return None
+    loader = _BY_EXTENSION.get(extension)
+    if loader is None:
+        mime_type, _ = mimetypes.guess_type(path)
+        loader = _BY_MIME_TYPE.get(mime_type)
+    return loader
+
+
+def supported_patterns() -> Tuple[str, ...]:
+    """Globs for text files and every format whose loader is available."""
+    extensions = list(TEXT_EXTENSIONS)
+    extensions.extend(e for e, loader in _BY_EXTENSION.items() if loader.available and e not in extensions)
+    return tuple(f"*{extension}" for extension in extensions)
+
+
+class _HTMLToMarkdown(HTMLParser):
+    """Collects an HTML page's text as markdown blocks."""
+    
+    _SKIP = {"script", "style", "noscript", "template", "svg", "head"}
+    _BLOCK = {
+        "p", "div", "section", "article", "header", "footer", "main", "aside", "nav",
+        "blockquote", "ul", "ol", "dl", "dt", "dd", "table", "tr", "figure", "figcaption",
+        "hr", "br", "form", "fieldset", "details", "summary", "address"
+    }
+    _HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[str] = []
+        self.title: Optional[str] = None
+        self._line: List[str] = []
+        self._prefix = ""
+        self._skip_depth = 0
+        self._pre: Optional[List[str]] = None
+        self._title: Optional[List[str]] = None
+    
+    def handle_starttag(self, tag: str, attrs: Any):
+        if tag == "title":
+            self._title = []
+        elif tag in self._SKIP:
+            self._skip_depth += 1
+        elif self._skip_depth or self._pre is not None:
+            return
+        elif tag == "pre":
+            self._flush()
+            self._pre = []
+        elif tag in self._HEADINGS:
+            self._flush()
+            self._prefix = "#" * int(tag[1]) + " "
+        elif tag == "li":
+            self._flush()
+            self._prefix = "- "
+        elif tag in ("td", "th"):
+            if self._line:
+                self._line.append(" | ")
+        elif tag in self._BLOCK:
+            self._flush()
+    
+    def handle_endtag(self, tag: str):
+        if tag == "title" and self._title is not None:
+            self.title = " ".join("".join(self._title).split()) or None
+            self._title = None
+        elif tag in self._SKIP:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "pre" and self._pre is not None:
+            code = "".join(self._pre).strip("\n")
+            if code.strip():
+                self.blocks.append(f"```\n{code}\n```")
+            self._pre = None
+        elif tag in self._HEADINGS or tag == "li" or tag in self._BLOCK:
+            self._flush()
+    
+    def handle_data(self, data: str):
+        if self._title is not None:
+            self._title.append(data)
+        elif self._skip_depth:
+            return
+        elif self._pre is not None:
+            self._pre.append(data)
+        else:
+            self._line.append(data)
+    
+    def close(self):
+        super().close()
+        self._flush()
+    
+    def _flush(self):
+        text = " ".join("".join(self._line).split())
+        if text:
+            self.blocks.append(self._prefix + text)
+        self._line = []
+        self._prefix = ""
+
+
+# What sniff_encoding() returns for a byte order mark, which overrides a declared charset
+_BOM_ENCODINGS = {"utf-8-sig", "utf-16", "utf-32"}
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def _html_encoding(data: bytes) -> str:
+    """Byte order mark, else the <meta> charset, else sniffed."""
+    encoding = sniff_encoding(data[:SNIFF_BYTES], complete=len(data) <= SNIFF_BYTES)
+    if encoding in _BOM_ENCODINGS:
+        return encoding
+    match = _META_CHARSET.search(data[:4096])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return encoding
+
+
+def extract_html(data: bytes) -> ExtractedText:
+    """HTML page as markdown: headings, paragraphs, list items, table rows and code blocks."""
+    encoding = _html_encoding(data)
+    parser = _HTMLToMarkdown()
+    parser.feed(data.decode(encoding, errors="replace"))
+    parser.close()
+    return ExtractedText(content="\n\n".join(parser.blocks), title=parser.title, encoding=encoding)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DC = "{http://purl.org/dc/elements/1.1/}"
+_DOCX_HEADING = re.compile(r"^(?:heading|Heading)\s*([1-6])$")
+
+
+def _docx_paragraph_text(paragraph: ElementTree.Element) -> str:
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == f"{_W}t" and element.text:
+            parts.append(element.text)
+        elif element.tag == f"{_W}tab":
+            parts.append("\t")
+        elif element.tag in (f"{_W}br", f"{_W}cr"):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def _docx_paragraph_prefix(paragraph: ElementTree.Element) -> str:
+    """Markdown prefix for a paragraph's style: heading level or list item."""
+    properties = paragraph.find(f"{_W}pPr")
+    if properties is None:
+        return ""
+    style = properties.find(f"{_W}pStyle")
+    style_id = style.get(f"{_W}val", "") if style is not None else ""
+    if style_id == "Title":
+        return "# "
+    heading = _DOCX_HEADING.match(style_id)
+    if heading:
+        return "#" * int(heading.group(1)) + " "
+    if properties.find(f"{_W}numPr") is not None or style_id.startswith("List"):
+        return "- "
+    return ""
+
+
+def extract_docx(data: bytes) -> ExtractedText:
+    """Word document as markdown: styled headings, list items and table rows."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        body = ElementTree.fromstring(archive.read("word/document.xml")).find(f"{_W}body")
+        try:
+            core = ElementTree.fromstring(archive.read("docProps/core.xml"))
+        except KeyError:
+            core = None
+    
+    blocks = []
+    for element in body if body is not None else ():
+        if element.tag == f"{_W}p":
+            text = _docx_paragraph_text(element)
+            if text:
+                blocks.append(_docx_paragraph_prefix(element) + text)
+        elif element.tag == f"{_W}tbl":
+            for row in element.iter(f"{_W}tr"):
+                cells = [
+                    " ".join(filter(None, (_docx_paragraph_text(p) for p in cell.iter(f"{_W}p"))))
+                    for cell in row.iter(f"{_W}tc")
+                ]
+                if any(cells):
+                    blocks.append(" | ".join(cells))
+    
+    title = None
+    properties = {}
+    if core is not None:
+        title = (core.findtext(f"{_DC}title") or "").strip() or None
+        author = (core.findtext(f"{_DC}creator") or "").strip()
+        if author:
+            properties["author"] = author
+    return ExtractedText(content="\n\n".join(blocks), title=title, properties=properties)
+
+
+def extract_pdf(data: bytes) -> ExtractedText:
+    """PDF text, page by page."""
+    if PdfReader is None:
+        raise RuntimeError("pypdf is required to ingest PDF files (pip install pypdf)")
+    reader = PdfReader(io.BytesIO(data))
+    pages = [(page.extract_text() or "").strip() for page in reader.pages]
+    
+    info = reader.metadata
+    title = ((info.title or "").strip() or None) if info else None
+    properties: Dict[str, Any] = {"page_count": len(pages)}
+    if info and info.author:
+        properties["author"] = str(info.author).strip()
+    return ExtractedText(content="\n\n".join(page for page in pages if page), title=title, properties=properties)
+
+
+register_loader(FormatLoader("html", extract_html, (".html", ".htm", ".xhtml"), ("text/html", "application/xhtml+xml")))
+register_loader(FormatLoader(
+    "docx",
+    extract_docx,
+    (".docx",),
+    ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+))
+register_loader(FormatLoader("pdf", extract_pdf, (".pdf",), ("application/pdf",), available=PdfReader is not None))
+
+
+def _cache_path(cache_dir: str, content_hash: str, loader: FormatLoader) -> str:
+    return os.path.join(cache_dir, f"{content_hash}.{loader.name}.v{CACHE_VERSION}.json")
+
+
+def _read_cache(path: str) -> Optional[ExtractedText]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return ExtractedText(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable extraction cache entry {path}: {e}")
+        return None
+
+
+def _write_cache(path: str, extracted: ExtractedText):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name so concurrent workers never read a partial entry
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(extracted.__dict__, f, ensure_ascii=False)
+        os.replace(temporary, path)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Could not cache extraction result {path}: {e}")
+
+
+def extract_file(file_path: str, loader: FormatLoader, cache_dir: Optional[str] = None) -> DocumentText:
+    """
+    Extract one file with a loader, using the cache when possible.
+    
+    Args:
+        file_path: Path to the file
+        loader: Loader for its format
+        cache_dir: Folder of cached extraction results (None disables caching)
+    
+    Returns:
+        Extracted document; its content_hash is the hash of the file's bytes,
+        as with read_document()
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    
+    cache_path = _cache_path(cache_dir, content_hash, loader) if cache_dir else None
+    extracted = _read_cache(cache_path) if cache_path else None
+    if extracted is None:
+        extracted = loader.extract(data)
+        if cache_path:
+            _write_cache(cache_path, extracted)
+    
+    content = extracted.content
+    return DocumentText(
+        content=content,
+        encoding=extracted.encoding,
+        content_hash=content_hash,
+        size=len(data),
+        title=extract_title(content) or extracted.title,
+        properties=extracted.properties,
+        format=loader.name,
+        line_count=content.count('\n') + 1,
+        word_count=count_words(content)
+    )
+
+
+class DocumentLoader:
+    """Reads documents of every supported format, extracting non-text formats in worker processes."""
+    
+    def __init__(self, workers: int = 4, cache_dir: Optional[str] = None):
+        """
+        Initialize loader.
+        
+        Args:
+            workers: Extraction processes, started on first use (0 extracts on a thread)
+            cache_dir: Folder for cached extraction results (None disables caching)
+        """
+        self.workers = max(0, workers)
+        self.cache_dir = cache_dir
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, "asyncio.Future[DocumentText]"] = {}
+    
+    def prefetch(self, paths: Iterable[str]):
+        """
+        Start extracting files that will be loaded soon. Call from the event loop.
+        
+        Text files and files already being extracted are ignored.
+        """
+        if not self.workers:
+            return
+        for path in paths:
+            loader = get_loader(path)
+            if loader is not None and path not in self._pending:
+                self._pending[path] = self._submit(path, loader)
+    
+    async def load(self, file_path: str) -> DocumentText:
+        """Read or extract one document."""
+        pending = self._pending.pop(file_path, None)
+        if pending is not None:
+            return await pending
+        
+        loader = get_loader(file_path)
+        if loader is None:
+            return read_document(file_path)
+        if not self.workers:
+            return await asyncio.to_thread(extract_file, file_path, loader, self.cache_dir)
+        return await self._submit(file_path, loader)
+    
+    def clear(self):
+        """Drop prefetched results that were never loaded."""
+        for future in self._pending.values():
+            if future.done() and not future.cancelled():
+                # Retrieve it, so asyncio does not log an unretrieved exception
+                future.exception()
+            else:
+                future.cancel()
+        self._pending.clear()
+    
+    def close(self):
+        """Stop the worker processes."""
+        self.clear()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+    
+    def _submit(self, file_path: str, loader: FormatLoader) -> "asyncio.Future[DocumentText]":
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return asyncio.get_running_loop().run_in_executor(self._pool, extract_file, file_path, loader, self.cache_dir)
@@ -0,0 +1,222 @@
+"""
+Ingestion run manifest for resumable ingestion.
+
+Every ingested file gets a row in ``ingestion_manifest`` keyed by its
+collection and source path, with the hash of its content and whether it
+completed. The completed row is written in the same transaction as the
+document and its chunks, so after a crash a file is either fully saved and
+recorded or not at all. ``ingest --resume`` skips files whose recorded hash still matches
+and retries the rest.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+try:
+    from ..utils.db_utils import DEFAULT_COLLECTION
+except ImportError:
+    # For direct execution or testing
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.db_utils import DEFAULT_COLLECTION
+
+MANIFEST_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ingestion_manifest (
+    collection TEXT NOT NULL DEFAULT 'default',
+    source TEXT NOT NULL,
+    content_hash TEXT,
+    status TEXT NOT NULL CHECK (status IN ('completed', 'failed')),
+    document_id UUID REFERENCES documents(id) ON DELETE SET NULL,
+    chunks_created INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    file_size BIGINT,
+    mtime_ns BIGINT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (collection, source)
+);
+
+ALTER TABLE ingestion_manifest
+    ADD COLUMN IF NOT EXISTS file_size BIGINT,
+    ADD COLUMN IF NOT EXISTS mtime_ns BIGINT,
+    ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+
+-- Manifests created before collections are keyed by source alone
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = 'ingestion_manifest'::regclass AND i.indisprimary AND a.attname = 'collection'
+    ) THEN
+        ALTER TABLE ingestion_manifest
+            DROP CONSTRAINT ingestion_manifest_pkey,
+            ADD PRIMARY KEY (collection, source);
+    END IF;
+END $$;
+"""
+
+_ENTRY_COLUMNS = "source, content_hash, status, document_id::text, chunks_created, attempts, error, file_size, mtime_ns"
+
+COMPLETED = "completed"
+
+
+@dataclass
+class ManifestEntry:
+    """Recorded state of one source file."""
+    source: str
+    content_hash: Optional[str]
+    status: str
+    document_id: Optional[str] = None
+    chunks_created: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    file_size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+    
+    def is_current(self, content_hash: str) -> bool:
+        """Whether the file was ingested with this content and its document still exists."""
+        return (
+            self.status == COMPLETED
+            and self.document_id is not None
+            and self.content_hash == content_hash
+        )
+    
+    def is_unchanged(self, size: int, mtime_ns: int) -> bool:
+        """Whether the file was ingested and its size and mtime have not changed since, so it need not be read."""
+        return (
+            self.status == COMPLETED
+            and self.document_id is not None
+            and self.file_size == size
+            and self.mtime_ns == mtime_ns
+        )
+
+
+async def ensure_manifest_table(conn: Any):
+    """Create the manifest table if this database predates it."""
+    await conn.execute(MANIFEST_TABLE_SQL)
+
+
+async def load_manifest(conn: Any, collection: str = DEFAULT_COLLECTION) -> Dict[str, ManifestEntry]:
+    """
+    Load every manifest entry of a collection.
+    
+    Returns:
+        Entries keyed by source
+    """
+    rows = await conn.fetch(f"SELECT {_ENTRY_COLUMNS} FROM ingestion_manifest WHERE collection = $1", collection)
+    return {row["source"]: ManifestEntry(**dict(row)) for row in rows}
+
+
+async def record_completed(
+    conn: Any,
+    source: str,
+    content_hash: Optional[str],
+    document_id: str,
+    chunks_created: int,
+    file_size: Optional[int] = None,
+    mtime_ns: Optional[int] = None,
+    collection: str = DEFAULT_COLLECTION
+):
+    """
+    Mark a source as ingested. Run inside the transaction that saves it.
+    
+    Args:
+        conn: Database connection
+        source: Source path relative to the documents folder
+        content_hash: Hash of the ingested content
+        document_id: Saved document ID
+        chunks_created: Chunks saved
+        file_size: File size when it was read
+        mtime_ns: File mtime when it was read
+        collection: Collection the document was saved in
+    """
+    await conn.execute(
+        """
+        INSERT INTO ingestion_manifest (
+            source, content_hash, status, document_id, chunks_created, attempts, error, file_size, mtime_ns, collection
+        )
+        VALUES ($1, $2, 'completed', $3::uuid, $4, 1, NULL, $5, $6, $7)
+        ON CONFLICT (collection, source) DO UPDATE SET
+            content_hash = EXCLUDED.content_hash,
+            status = 'completed',
+            document_id = EXCLUDED.document_id,
+            chunks_created = EXCLUDED.chunks_created,
+            attempts = ingestion_manifest.attempts + 1,
+            error = NULL,
+            file_size = EXCLUDED.file_size,
+            mtime_ns = EXCLUDED.mtime_ns,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        source,
+        content_hash,
+        document_id,
+        chunks_created,
+        file_size,
+        mtime_ns,
+        collection
+    )
+
+
+async def record_failed(
+    conn: Any,
+    source: str,
+    content_hash: Optional[str],
+    error: str,
+    collection: str = DEFAULT_COLLECTION
+):
+    """
+    Mark a source as failed so a resumed run retries it.
+    
+    A previously completed document is left in place until the retry
+    replaces it.
+    """
+    await conn.execute(
+        """
+        INSERT INTO ingestion_manifest (source, content_hash, status, attempts, error, collection)
+        VALUES ($1, $2, 'failed', 1, $3, $4)
+        ON CONFLICT (collection, source) DO UPDATE SET
+            content_hash = EXCLUDED.content_hash,
+            status = 'failed',
+            attempts = ingestion_manifest.attempts + 1,
+            error = EXCLUDED.error,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        source,
+        content_hash,
+        error,
+        collection
+    )
+
+
+async def get_manifest_entry(
+    conn: Any,
+    source: str,
+    collection: str = DEFAULT_COLLECTION
+) -> Optional[ManifestEntry]:
+    """Manifest entry of one source, if any."""
+    row = await conn.fetchrow(
+        f"SELECT {_ENTRY_COLUMNS} FROM ingestion_manifest WHERE collection = $1 AND source = $2",
+        collection,
+        source
+    )
+    return ManifestEntry(**dict(row)) if row else None
+
+
+async def record_stat(
+    conn: Any,
+    source: str,
+    file_size: int,
+    mtime_ns: int,
+    collection: str = DEFAULT_COLLECTION
+):
+    """Update the size and mtime of a file whose content is unchanged, e.g. after a touch."""
+    await conn.execute(
+        "UPDATE ingestion_manifest SET file_size = $2, mtime_ns = $3 WHERE source = $1 AND collection = $4",
+        source,
+        file_size,
+        mtime_ns,
+        collection
+    )
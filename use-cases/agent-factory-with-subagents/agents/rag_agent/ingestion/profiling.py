@@ -0,0 +1,139 @@
+"""
+Profiling helpers for the ingestion pipeline (``ingest --profile``).
+
+Stage timings come from the request-path telemetry: the pipeline records
+``ingest.read``, ``ingest.chunk``, ``ingest.embed`` and ``ingest.write``
+spans for every document.
+"""
+
+import re
+import sys
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import asyncpg
+
+INGEST_STAGES = ("ingest.read", "ingest.chunk", "ingest.embed", "ingest.write")
+
+_SCHEMA_NAME = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0 if unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return 0.0
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def with_search_path(database_url: str, schema: str) -> str:
+    """
+    Point a connection URL at a schema.
+    
+    asyncpg passes unknown URL query parameters to the server as settings,
+    so every pooled connection resolves unqualified tables in ``schema``
+    first and extensions such as pgvector in ``public``.
+    """
+    if not _SCHEMA_NAME.match(schema):
+        raise ValueError(f"Invalid schema name: {schema!r} (use lowercase letters, digits and _)")
+    
+    parts = urlsplit(database_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "search_path"]
+    query.append(("search_path", f"{schema},public"))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+async def create_schema(database_url: str, schema: str):
+    """Create an empty schema for a throwaway run."""
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {schema}")
+    finally:
+        await conn.close()
+
+
+async def drop_schema(database_url: str, schema: str):
+    """Drop a throwaway schema and everything in it."""
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    finally:
+        await conn.close()
+
+
+async def start_stub_embeddings(dimension: int) -> Tuple[Any, str]:
+    """
+    Start the deterministic embedding stub in this process.
+    
+    Returns:
+        (server, base URL) - stop with ``server.should_exit = True``
+    """
+    from benchmarks.embedding_stub import start_stub_server
+    
+    server = await start_stub_server(dimension=dimension)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/v1"
+
+
+async def stop_stub_embeddings(server: Any):
+    """Stop a stub started by start_stub_embeddings()."""
+    server.should_exit = True
+    await server.task
+
+
+def format_stage_report(
+    stages: Dict[str, Dict[str, float]],
+    documents: int,
+    chunks: int,
+    elapsed: float,
+    peak_rss: Optional[float] = None
+) -> str:
+    """
+    Format per-stage ingestion timings.
+    
+    Args:
+        stages: recorder.snapshot() output
+        documents: Documents ingested
+        chunks: Chunks created
+        elapsed: Wall time in seconds
+        peak_rss: Peak RSS in MB
+    
+    Returns:
+        Multi-line report
+    """
+    lines = [
+        f"{'Stage':<14}{'Total s':>10}{'Share':>8}{'Per doc ms':>12}{'p95 ms':>10}{'Throughput':>22}"
+    ]
+    stage_total = sum(stages.get(stage, {}).get('total_ms', 0.0) for stage in INGEST_STAGES) or 1.0
+    
+    for stage in INGEST_STAGES:
+        stats = stages.get(stage)
+        if not stats:
+            continue
+        seconds = stats['total_ms'] / 1000
+        # Embedding cost scales with chunks, the other stages with documents
+        if stage == "ingest.embed":
+            throughput = f"{chunks / seconds:,.1f} chunks/s" if seconds else "-"
+        else:
+            throughput = f"{documents / seconds:,.1f} docs/s" if seconds else "-"
+        lines.append(
+            f"{stage.split('.', 1)[1]:<14}{seconds:>10.3f}{stats['total_ms'] / stage_total:>8.1%}"
+            f"{stats['mean_ms']:>12.2f}{stats['p95_ms']:>10.2f}{throughput:>22}"
+        )
+    
+    lines.append("")
+    lines.append(f"Documents: {documents}  Chunks: {chunks}  Wall time: {elapsed:.2f}s")
+    if elapsed:
+        lines.append(f"Throughput: {documents / elapsed:,.2f} docs/s, {chunks / elapsed:,.2f} chunks/s")
+    if peak_rss is not None:
+        lines.append(f"Peak RSS: {peak_rss:,.1f} MB")
+    return "\n".join(lines)
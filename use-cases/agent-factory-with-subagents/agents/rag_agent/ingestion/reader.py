@@ -0,0 +1,174 @@
+"""
+Document reader for the ingestion pipeline.
+
+Each file is read once: large files are memory-mapped and decoded straight
+from the mapping, the encoding is sniffed from a prefix (byte order mark,
+else UTF-8 with a latin-1 fallback), and the content hash, title,
+frontmatter, line count and word count are all taken from that one read
+without splitting the whole document into lines or words.
+"""
+
+import os
+import mmap
+import codecs
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Files at least this large are memory-mapped instead of read into a bytes object
+MMAP_THRESHOLD = 1 << 20
+
+SNIFF_BYTES = 64 * 1024
+
+# Words are counted over slices of this many characters, so no list of every word is built
+_WORD_COUNT_WINDOW = 64 * 1024
+
+# Longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+FALLBACK_ENCODING = "latin-1"
+
+
+@dataclass
+class DocumentText:
+    """A decoded document and what was extracted from it."""
+    content: str
+    encoding: str
+    content_hash: str
+    size: int
+    title: Optional[str] = None
+    frontmatter: Dict[str, Any] = field(default_factory=dict)
+    line_count: int = 0
+    word_count: int = 0
+    # Loader that extracted it (see ingestion/loaders.py) and document properties it found
+    format: str = "text"
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+
+def sniff_encoding(prefix: bytes, complete: bool = False) -> str:
+    """
+    Guess a file's encoding from its first bytes.
+    
+    Args:
+        prefix: Start of the file
+        complete: The prefix is the whole file
+    
+    Returns:
+        Codec name: from the byte order mark, else UTF-8 if the prefix
+        decodes as UTF-8, else latin-1
+    """
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    try:
+        # Unless it is the whole file, the prefix may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=complete)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def count_words(text: str) -> int:
+    """Same count as ``len(text.split())`` without building the list of words."""
+    count = 0
+    previous_ended_in_space = True
+    for start in range(0, len(text), _WORD_COUNT_WINDOW):
+        window = text[start:start + _WORD_COUNT_WINDOW]
+        words = len(window.split())
+        # A word cut by the window boundary was counted on both sides
+        if words and not previous_ended_in_space and not window[0].isspace():
+            words -= 1
+        count += words
+        previous_ended_in_space = window[-1].isspace()
+    return count
+
+
+def extract_title(text: str, max_lines: int = 10) -> Optional[str]:
+    """First '# ' heading within the first max_lines lines, if any."""
+    start = 0
+    for _ in range(max_lines):
+        end = text.find('\n', start)
+        line = (text[start:] if end == -1 else text[start:end]).strip()
+        if line.startswith('# '):
+            return line[2:].strip()
+        if end == -1:
+            break
+        start = end + 1
+    return None
+
+
+def parse_frontmatter(text: str) -> Dict[str, Any]:
+    """YAML frontmatter between leading '---' lines, or {} if absent or invalid."""
+    if not text.startswith('---'):
+        return {}
+    end_marker = text.find('\n---\n', 4)
+    if end_marker == -1:
+        return {}
+    try:
+        import yaml
+        metadata = yaml.safe_load(text[4:end_marker])
+    except ImportError:
+        logger.warning("PyYAML not installed, skipping frontmatter extraction")
+        return {}
+    except Exception as e:
+        logger.warning(f"Failed to parse frontmatter: {e}")
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def decode_document(data: Union[bytes, mmap.mmap]) -> DocumentText:
+    """
+    Decode raw document bytes and extract their metadata.
+    
+    Args:
+        data: File contents, as bytes or a memory map
+    
+    Returns:
+        Decoded document
+    """
+    encoding = sniff_encoding(data[:SNIFF_BYTES], complete=len(data) <= SNIFF_BYTES)
+    try:
+        content = codecs.decode(data, encoding)
+    except UnicodeDecodeError:
+        # Invalid UTF-8 past the sniffed prefix; decode the same buffer again
+        encoding = FALLBACK_ENCODING
+        content = codecs.decode(data, encoding)
+    
+    return DocumentText(
+        content=content,
+        encoding=encoding,
+        content_hash=hashlib.sha256(data).hexdigest(),
+        size=len(data),
+        title=extract_title(content),
+        frontmatter=parse_frontmatter(content),
+        line_count=content.count('\n') + 1,
+        word_count=count_words(content)
+    )
+
+
+def read_document(file_path: str) -> DocumentText:
+    """
+    Read and decode a document file in one pass.
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        Decoded document; its content_hash is the SHA-256 of the file's bytes
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        # Small files are read directly; empty ones cannot be mapped anyway
+        if size < MMAP_THRESHOLD:
+            return decode_document(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode_document(mapped)
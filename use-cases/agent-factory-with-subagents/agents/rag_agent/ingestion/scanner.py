@@ -0,0 +1,146 @@
+"""
+Document discovery for the ingestion pipeline.
+
+The documents folder is walked once with ``os.scandir``. Directories are
+scanned in parallel on a thread pool, so on network filesystems the
+per-directory round trips overlap instead of adding up. Every file comes
+back with its size and mtime, so unchanged files can be skipped without
+being opened (see ManifestEntry.is_unchanged).
+"""
+
+import os
+import logging
+from fnmatch import fnmatch
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Sequence, Tuple
+
+from .loaders import supported_patterns
+
+logger = logging.getLogger(__name__)
+
+# Hidden files and folders, which the previous glob-based discovery never matched
+DEFAULT_EXCLUDE = (".*",)
+
+
+@dataclass
+class ScannedFile:
+    """A discovered document and its stat information."""
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def stat_file(path: str) -> ScannedFile:
+    """Stat one file."""
+    stat = os.stat(path)
+    return ScannedFile(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+def _match(pattern: str, relative_path: str, name: str) -> bool:
+    """Match a glob against the relative path if it has a '/', else against the name."""
+    return fnmatch(relative_path, pattern) if "/" in pattern else fnmatch(name, pattern)
+
+
+class DocumentScanner:
+    """Finds the documents under a folder."""
+
+    def __init__(
+        self,
+        root: str,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        workers: int = 8
+    ):
+        """
+        Initialize scanner.
+
+        Args:
+            root: Folder to scan
+            include: Globs a file must match, against its name or, for patterns
+                containing '/', its path relative to root (default: markdown, text
+                and every format with an available loader)
+            exclude: Globs for files and folders to skip, in addition to hidden ones;
+                excluded folders are not descended into
+            workers: Threads scanning directories concurrently (1 scans inline)
+        """
+        self.root = root
+        self.include = tuple(include or supported_patterns())
+        self.exclude = DEFAULT_EXCLUDE + tuple(exclude or ())
+        self.workers = max(1, workers)
+
+    def matches(self, path: str) -> bool:
+        """Whether a file path under root is a document to ingest."""
+        relative_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+        parts = relative_path.split("/")
+        # Files inside excluded folders are excluded too
+        for depth in range(1, len(parts)):
+            if self._excluded("/".join(parts[:depth]), parts[depth - 1]):
+                return False
+        return self._included(relative_path, parts[-1])
+
+    def scan(self, directory: Optional[str] = None) -> List[ScannedFile]:
+        """
+        Walk the folder once.
+
+        Args:
+            directory: Subfolder of root to walk instead of all of root
+
+        Returns:
+            Matching files sorted by path
+        """
+        directory = directory or self.root
+        if not os.path.isdir(directory):
+            logger.error(f"Documents folder not found: {directory}")
+            return []
+
+        files: List[ScannedFile] = []
+        if self.workers == 1:
+            directories = [directory]
+            while directories:
+                found, subdirectories = self._scan_directory(directories.pop())
+                files.extend(found)
+                directories.extend(subdirectories)
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan") as pool:
+                pending = {pool.submit(self._scan_directory, directory)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        found, subdirectories = future.result()
+                        files.extend(found)
+                        pending.update(pool.submit(self._scan_directory, d) for d in subdirectories)
+
+        files.sort(key=lambda f: f.path)
+        return files
+
+    def _scan_directory(self, directory: str) -> Tuple[List[ScannedFile], List[str]]:
+        """List one directory: matching files with stat info, and subdirectories to descend into."""
+        files: List[ScannedFile] = []
+        subdirectories: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                    try:
+                        # Symlinked folders are not followed, so links cannot form cycles
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._excluded(relative_path, entry.name):
+                                subdirectories.append(entry.path)
+                        elif entry.is_file() and self._included(relative_path, entry.name):
+                            stat = entry.stat()
+                            files.append(ScannedFile(entry.path, stat.st_size, stat.st_mtime_ns))
+                    except OSError as e:
+                        logger.debug(f"Skipping {entry.path}: {e}")
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {e}")
+        return files, subdirectories
+
+    def _included(self, relative_path: str, name: str) -> bool:
+        return (
+            any(_match(pattern, relative_path, name) for pattern in self.include)
+            and not self._excluded(relative_path, name)
+        )
+
+    def _excluded(self, relative_path: str, name: str) -> bool:
+        return any(_match(pattern, relative_path, name) for pattern in self.exclude)
@@ -0,0 +1,267 @@
+"""
+Continuous ingestion of a watched documents folder (``ingest --watch``).
+
+File events come from watchdog (inotify, FSEvents or ReadDirectoryChangesW)
+when it is installed, and from periodic mtime/size snapshots of the
+pipeline's scanner otherwise.
+Events are debounced per file, so an editor's burst of writes triggers one
+re-ingest once the file has been quiet for ``debounce_seconds``. Only the
+touched files are processed: changed files replace their document,
+deleted files remove it, and unchanged content is skipped via the manifest.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .manifest import get_manifest_entry, load_manifest
+
+try:
+    from ..utils.db_utils import db_pool
+    from ..utils.telemetry import recorder
+except ImportError:
+    # For direct execution or testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.db_utils import db_pool
+    from utils.telemetry import recorder
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# watchdog events that can change a file's content or existence
+_CHANGE_EVENTS = {"created", "modified", "moved", "deleted", "closed"}
+
+# Folder events that change the files under it; usually the only event sent
+_DIRECTORY_EVENTS = {"moved", "deleted"}
+
+# A file that never goes quiet (e.g. an appended log) is still synced after this many debounce periods
+MAX_DEBOUNCE_PERIODS = 10
+
+
+def snapshot(scanner: Any) -> Dict[str, Tuple[int, int]]:
+    """
+    Scan the watched folder.
+    
+    Returns:
+        (mtime in ns, size) by path
+    """
+    return {f.path: (f.mtime_ns, f.size) for f in scanner.scan()}
+
+
+class _EventHandler:
+    """Forwards watchdog events from the observer thread to the event loop."""
+    
+    def __init__(self, watcher: "DocumentWatcher", loop: asyncio.AbstractEventLoop):
+        self.watcher = watcher
+        self.loop = loop
+    
+    def dispatch(self, event: Any):
+        if event.is_directory:
+            if event.event_type in _DIRECTORY_EVENTS:
+                dest_path = getattr(event, "dest_path", "")
+                self.loop.call_soon_threadsafe(
+                    self.watcher.notify_directory,
+                    os.fsdecode(event.src_path),
+                    os.fsdecode(dest_path) if dest_path else None
+                )
+            return
+        if event.event_type not in _CHANGE_EVENTS:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and self.watcher.scanner.matches(os.fsdecode(path)):
+                self.loop.call_soon_threadsafe(self.watcher.notify, os.fsdecode(path))
+
+
+class DocumentWatcher:
+    """Keeps the database in sync with a documents folder."""
+    
+    def __init__(
+        self,
+        pipeline: Any,
+        debounce_seconds: float = 1.0,
+        poll_interval: float = 2.0,
+        use_polling: bool = False
+    ):
+        """
+        Initialize watcher.
+        
+        Args:
+            pipeline: DocumentIngestionPipeline for the watched folder
+            debounce_seconds: Quiet time after a file's last event before it is ingested
+            poll_interval: Seconds between snapshots when polling
+            use_polling: Poll even if watchdog is installed (e.g. network filesystems)
+        """
+        self.pipeline = pipeline
+        self.folder = pipeline.documents_folder
+        self.scanner = pipeline.scanner
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        
+        # Path -> (first event, last event) in monotonic seconds
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._changed = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._directory_tasks: Set[asyncio.Task] = set()
+        self.ingested = 0
+        self.removed = 0
+    
+    def notify(self, path: str):
+        """Record a change to a file; it is synced once quiet for the debounce time."""
+        now = time.monotonic()
+        first, _ = self._pending.get(path, (now, now))
+        self._pending[path] = (first, now)
+        self._changed.set()
+    
+    def notify_directory(self, src_path: str, dest_path: Optional[str] = None):
+        """
+        Record that a folder was moved or deleted.
+        
+        Every document previously ingested from under ``src_path`` is synced
+        (and so removed), and every file under ``dest_path`` is ingested.
+        
+        Args:
+            src_path: Folder's old path
+            dest_path: Folder's new path, for moves
+        """
+        task = asyncio.create_task(self._expand_directory(src_path, dest_path))
+        self._directory_tasks.add(task)
+        task.add_done_callback(self._directory_tasks.discard)
+    
+    async def _expand_directory(self, src_path: str, dest_path: Optional[str]):
+        """Notify the files affected by a folder move or delete."""
+        try:
+            prefix = os.path.relpath(src_path, self.folder).replace(os.sep, "/") + "/"
+            async with db_pool.acquire() as conn:
+                manifest = await load_manifest(conn, self.pipeline.collection)
+            for source in manifest:
+                if source.replace(os.sep, "/").startswith(prefix):
+                    self.notify(os.path.join(self.folder, source))
+            
+            # A folder moved out of the watched folder only needs its documents removed
+            inside = dest_path and not os.path.relpath(dest_path, self.folder).startswith(os.pardir + os.sep)
+            if inside:
+                for scanned in await asyncio.to_thread(self.scanner.scan, dest_path):
+                    if self.scanner.matches(scanned.path):
+                        self.notify(scanned.path)
+        except Exception as e:
+            logger.error(f"Failed to sync folder {src_path}: {e}")
+    
+    def stop(self):
+        """Ask run() to return."""
+        self._stopped.set()
+        self._changed.set()
+    
+    async def run(self, initial_sync: bool = True):
+        """
+        Watch until stop() is called.
+        
+        Args:
+            initial_sync: First ingest files changed while nothing was watching
+        """
+        if initial_sync:
+            await self.pipeline.ingest_documents()
+            await self._remove_missing()
+        
+        observer = None
+        poller = None
+        if self.use_polling:
+            poller = asyncio.create_task(self._poll())
+        else:
+            observer = Observer()
+            observer.schedule(_EventHandler(self, asyncio.get_running_loop()), self.folder, recursive=True)
+            observer.start()
+        logger.info(f"Watching {self.folder} ({'polling' if poller else 'filesystem events'})")
+        
+        try:
+            while not self._stopped.is_set():
+                await self._sync_due()
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=self._next_due())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if observer is not None:
+                observer.stop()
+                await asyncio.to_thread(observer.join)
+            for task in list(self._directory_tasks):
+                task.cancel()
+            if poller is not None:
+                poller.cancel()
+                try:
+                    await poller
+                except asyncio.CancelledError:
+                    pass
+    
+    async def _remove_missing(self):
+        """Remove documents whose files were deleted while nothing was watching."""
+        async with db_pool.acquire() as conn:
+            manifest = await load_manifest(conn, self.pipeline.collection)
+        for source in manifest:
+            path = os.path.join(self.folder, source)
+            if not os.path.exists(path) and await self.pipeline.remove_file(path):
+                self.removed += 1
+    
+    def _next_due(self) -> Optional[float]:
+        """Seconds until the next pending file is quiet, or None to wait for events."""
+        if not self._pending:
+            return None
+        due = min(self._due_at(first, last) for first, last in self._pending.values())
+        return max(0.0, due - time.monotonic())
+    
+    def _due_at(self, first: float, last: float) -> float:
+        """When a file with these first and last events should be synced."""
+        return min(last + self.debounce_seconds, first + self.debounce_seconds * MAX_DEBOUNCE_PERIODS)
+    
+    async def _sync_due(self):
+        """Sync every pending file that has been quiet for the debounce time."""
+        now = time.monotonic()
+        due = [
+            (path, first) for path, (first, last) in self._pending.items()
+            if now >= self._due_at(first, last)
+        ]
+        for path, first in due:
+            del self._pending[path]
+            try:
+                await self._sync(path)
+            except Exception as e:
+                logger.error(f"Failed to sync {path}: {e}")
+                await self.pipeline.record_failure(os.path.relpath(path, self.folder), None, str(e))
+                continue
+            # Time from the first change to the document being searchable
+            recorder.observe("ingest.freshness", time.monotonic() - first)
+    
+    async def _sync(self, path: str):
+        """Ingest, replace or remove the document of one file."""
+        if not os.path.isfile(path):
+            if await self.pipeline.remove_file(path):
+                self.removed += 1
+            return
+        
+        source = os.path.relpath(path, self.folder)
+        async with db_pool.acquire() as conn:
+            previous = await get_manifest_entry(conn, source, self.pipeline.collection)
+        
+        result = await self.pipeline.ingest_file(path, source, previous)
+        if result is not None and result.document_id:
+            self.ingested += 1
+            logger.info(f"Ingested {source}: {result.chunks_created} chunks")
+    
+    async def _poll(self):
+        """Diff folder snapshots and report changed files."""
+        previous = await asyncio.to_thread(snapshot, self.scanner)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(snapshot, self.scanner)
+            for path in current.keys() | previous.keys():
+                if current.get(path) != previous.get(path):
+                    self.notify(path)
+            previous = current
@@ -0,0 +1,394 @@
+"""
+Postgres work queue for distributed ingestion.
+
+A coordinator (``ingest --enqueue``) adds files to ``ingestion_queue``.
+Any number of worker processes (``ingest --worker``), on one machine or
+many, claim batches with ``FOR UPDATE SKIP LOCKED`` so no two workers get
+the same file, and hold them under a lease they extend with heartbeats.
+A worker that dies stops heartbeating; once its lease expires the files
+are claimed again by another worker, up to ``max_attempts`` times.
+
+Retries are idempotent: a document is saved in the same transaction as its
+manifest entry (ingestion/manifest.py), so a file whose document was saved
+before its worker died is skipped rather than ingested twice.
+"""
+
+import os
+import socket
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .manifest import get_manifest_entry
+
+try:
+    from ..utils.db_utils import DEFAULT_COLLECTION, db_pool
+except ImportError:
+    # For direct execution or testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.db_utils import DEFAULT_COLLECTION, db_pool
+
+logger = logging.getLogger(__name__)
+
+QUEUE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ingestion_queue (
+    id BIGSERIAL PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    collection TEXT NOT NULL DEFAULT 'default',
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    document_id UUID,
+    error TEXT,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Queues created before collections are unique by source alone
+ALTER TABLE ingestion_queue ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+ALTER TABLE ingestion_queue DROP CONSTRAINT IF EXISTS ingestion_queue_source_key;
+CREATE UNIQUE INDEX IF NOT EXISTS ingestion_queue_collection_source_key ON ingestion_queue (collection, source);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_queue_claimable
+    ON ingestion_queue (id) WHERE status IN ('pending', 'running');
+"""
+
+
+@dataclass
+class QueueTask:
+    """A claimed file."""
+    id: int
+    file_path: str
+    source: str
+    attempts: int
+
+
+def default_worker_id() -> str:
+    """Host and process ID, for telling workers apart in the queue table."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def ensure_queue_table(conn: Any):
+    """Create the queue table if needed."""
+    await conn.execute(QUEUE_TABLE_SQL)
+
+
+async def enqueue(conn: Any, files: List[Tuple[str, str]], collection: str = DEFAULT_COLLECTION) -> int:
+    """
+    Add files to the queue.
+    
+    Finished and failed files are queued again; files already pending or
+    running are left alone.
+    
+    Args:
+        conn: Database connection
+        files: (file path, source) pairs
+        collection: Collection the files are ingested into
+    
+    Returns:
+        Number of files queued
+    """
+    if not files:
+        return 0
+    
+    rows = await conn.fetch(
+        """
+        INSERT INTO ingestion_queue (file_path, source, collection)
+        SELECT file_path, source, $3 FROM unnest($1::text[], $2::text[]) AS f(file_path, source)
+        ON CONFLICT (collection, source) DO UPDATE SET
+            file_path = EXCLUDED.file_path,
+            status = 'pending',
+            attempts = 0,
+            worker_id = NULL,
+            lease_expires_at = NULL,
+            error = NULL,
+            enqueued_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE ingestion_queue.status IN ('done', 'failed')
+        RETURNING id
+        """,
+        [path for path, _ in files],
+        [source for _, source in files],
+        collection
+    )
+    return len(rows)
+
+
+async def claim(
+    conn: Any,
+    worker_id: str,
+    batch_size: int,
+    lease_seconds: float,
+    max_attempts: int,
+    collection: str = DEFAULT_COLLECTION
+) -> List[QueueTask]:
+    """
+    Claim up to batch_size pending files, or files whose lease expired.
+    
+    Expired files that already used max_attempts are marked failed instead.
+    
+    Args:
+        conn: Database connection
+        worker_id: Claiming worker
+        batch_size: Most files to claim
+        lease_seconds: Lease length; extend it with heartbeat()
+        max_attempts: Attempts before a file is given up on
+        collection: Collection whose files to claim
+    
+    Returns:
+        Claimed tasks, oldest first
+    """
+    async with conn.transaction():
+        # Rows another worker is claiming are skipped rather than waited on
+        await conn.execute(
+            """
+            UPDATE ingestion_queue
+            SET status = 'failed',
+                error = coalesce(error, 'lease expired'),
+                worker_id = NULL,
+                lease_expires_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id IN (
+                SELECT id FROM ingestion_queue
+                WHERE collection = $2
+                  AND status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP AND attempts >= $1
+                FOR UPDATE SKIP LOCKED
+            )
+            """,
+            max_attempts,
+            collection
+        )
+        rows = await conn.fetch(
+            """
+            UPDATE ingestion_queue q
+            SET status = 'running',
+                worker_id = $1,
+                attempts = q.attempts + 1,
+                lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3),
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT id FROM ingestion_queue
+                WHERE collection = $4
+                  AND (status = 'pending' OR (status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP))
+                ORDER BY id
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            ) claimable
+            WHERE q.id = claimable.id
+            RETURNING q.id, q.file_path, q.source, q.attempts
+            """,
+            worker_id,
+            batch_size,
+            float(lease_seconds),
+            collection
+        )
+    return sorted((QueueTask(**dict(row)) for row in rows), key=lambda task: task.id)
+
+
+async def heartbeat(conn: Any, worker_id: str, task_ids: List[int], lease_seconds: float) -> int:
+    """
+    Extend the leases of tasks this worker still holds.
+    
+    Returns:
+        Number of leases extended
+    """
+    result = await conn.execute(
+        """
+        UPDATE ingestion_queue
+        SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ANY($2::bigint[]) AND worker_id = $1 AND status = 'running'
+        """,
+        worker_id,
+        task_ids,
+        float(lease_seconds)
+    )
+    return int(result.split()[-1])
+
+
+async def complete(conn: Any, task_id: int, worker_id: str, document_id: Optional[str] = None):
+    """Mark a task done if this worker still holds it."""
+    await conn.execute(
+        """
+        UPDATE ingestion_queue
+        SET status = 'done', document_id = $3::uuid, error = NULL,
+            lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE id = $1 AND worker_id = $2 AND status = 'running'
+        """,
+        task_id,
+        worker_id,
+        document_id
+    )
+
+
+async def fail(
+    conn: Any,
+    task_id: int,
+    worker_id: str,
+    error: str,
+    max_attempts: int,
+    retry: bool = True
+):
+    """
+    Release a failed task: back to pending while attempts remain, else failed.
+    
+    Args:
+        conn: Database connection
+        task_id: Task to release
+        worker_id: Worker holding it
+        error: Failure message
+        max_attempts: Attempts before giving up
+        retry: False for failures a retry cannot fix
+    """
+    await conn.execute(
+        """
+        UPDATE ingestion_queue
+        SET status = CASE WHEN $5 AND attempts < $4 THEN 'pending' ELSE 'failed' END,
+            error = $3, worker_id = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE id = $1 AND worker_id = $2 AND status = 'running'
+        """,
+        task_id,
+        worker_id,
+        error,
+        max_attempts,
+        retry
+    )
+
+
+async def queue_stats(conn: Any, collection: str = DEFAULT_COLLECTION) -> Dict[str, int]:
+    """Task counts of a collection by status."""
+    rows = await conn.fetch(
+        "SELECT status, count(*) AS n FROM ingestion_queue WHERE collection = $1 GROUP BY status",
+        collection
+    )
+    stats = {status: 0 for status in ("pending", "running", "done", "failed")}
+    stats.update({row["status"]: row["n"] for row in rows})
+    return stats
+
+
+class IngestionWorker:
+    """Claims queued files and ingests them with a pipeline."""
+    
+    def __init__(
+        self,
+        pipeline: Any,
+        worker_id: Optional[str] = None,
+        batch_size: int = 8,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        poll_interval: float = 5.0
+    ):
+        """
+        Initialize worker.
+        
+        Args:
+            pipeline: DocumentIngestionPipeline used to ingest each file;
+                the worker claims files of its collection
+            worker_id: Identity recorded on claimed tasks (default: host:pid)
+            batch_size: Files claimed at a time
+            lease_seconds: Lease on claimed files; heartbeats renew it every third of this
+            max_attempts: Attempts per file before it is marked failed
+            poll_interval: Seconds between polls when nothing is claimable
+        """
+        self.pipeline = pipeline
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.results: List[Any] = []
+        self._held: List[int] = []
+    
+    async def run(self, follow: bool = False) -> List[Any]:
+        """
+        Process batches until the queue is drained.
+        
+        The worker runs no DDL; ``ingest --enqueue`` (or ``--init-schema``)
+        creates the queue and manifest tables and the collection's partition.
+        
+        Args:
+            follow: Keep polling for new work instead of exiting when the
+                queue has nothing pending or running
+        
+        Returns:
+            Ingestion results of the files this worker processed
+        """
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while True:
+                async with db_pool.acquire() as conn:
+                    tasks = await claim(
+                        conn, self.worker_id, self.batch_size, self.lease_seconds, self.max_attempts,
+                        collection=self.pipeline.collection
+                    )
+                
+                if tasks:
+                    logger.info(f"Worker {self.worker_id} claimed {len(tasks)} files")
+                    self._held = [task.id for task in tasks]
+                    # Extract the batch's PDF, HTML and DOCX files in parallel
+                    self.pipeline.loader.prefetch(task.file_path for task in tasks)
+                    for task in tasks:
+                        await self._process(task)
+                        self._held.remove(task.id)
+                    self.pipeline.loader.clear()
+                    continue
+                
+                if not follow:
+                    async with db_pool.acquire() as conn:
+                        stats = await queue_stats(conn, self.pipeline.collection)
+                    # Running tasks of other workers may still come back if their leases expire
+                    if not stats["pending"] and not stats["running"]:
+                        break
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            heartbeat_task.cancel()
+            try:
+                await heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        
+        return self.results
+    
+    async def _process(self, task: QueueTask):
+        """Ingest one claimed file and release it."""
+        try:
+            async with db_pool.acquire() as conn:
+                previous = await get_manifest_entry(conn, task.source, self.pipeline.collection)
+            
+            result = await self.pipeline.ingest_file(task.file_path, task.source, previous)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} failed {task.file_path} (attempt {task.attempts}): {e}")
+            await self.pipeline.record_failure(task.source, None, str(e))
+            async with db_pool.acquire() as conn:
+                await fail(conn, task.id, self.worker_id, str(e), self.max_attempts)
+            return
+        
+        async with db_pool.acquire() as conn:
+            if result is None:
+                # Saved by an earlier attempt or run
+                await complete(conn, task.id, self.worker_id)
+            elif result.errors and not result.document_id:
+                # Empty documents fail the same way every time
+                await fail(conn, task.id, self.worker_id, "; ".join(result.errors), self.max_attempts, retry=False)
+            else:
+                await complete(conn, task.id, self.worker_id, result.document_id)
+        
+        if result is not None:
+            self.results.append(result)
+    
+    async def _heartbeat_loop(self):
+        """Extend the leases of held tasks until cancelled."""
+        interval = self.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not self._held:
+                continue
+            try:
+                async with db_pool.acquire() as conn:
+                    await heartbeat(conn, self.worker_id, list(self._held), self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id} heartbeat failed: {e}")
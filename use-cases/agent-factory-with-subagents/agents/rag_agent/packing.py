@@ -0,0 +1,182 @@
+"""Token-budgeted packing of search results for the model context."""
+
+import re
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+# Score columns in order of preference; later search stages add earlier keys
+SCORE_KEYS = ('rerank_score', 'fused_score', 'score', 'combined_score', 'similarity')
+
+# Shortest shared prefix/suffix treated as chunker overlap rather than coincidence
+MIN_OVERLAP_CHARS = 40
+
+# Passages are never truncated below this, so a result is dropped instead
+MIN_PASSAGE_TOKENS = 30
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token), as used by the chunker."""
+    return len(text) // 4
+
+
+def _as_dict(result: Any) -> Dict[str, Any]:
+    if is_dataclass(result):
+        return {f.name: getattr(result, f.name) for f in fields(result)}
+    return dict(result)
+
+
+def _score(result: Dict[str, Any]) -> float:
+    for key in SCORE_KEYS:
+        if result.get(key) is not None:
+            return float(result[key])
+    return 0.0
+
+
+def _merge_overlap(first: str, second: str) -> Optional[str]:
+    """
+    Join two chunks if one contains the other or the end of ``first``
+    repeats the start of ``second``.
+
+    Returns:
+        Merged text, or None if the chunks do not overlap
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+
+    head = second[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return None
+
+    start = first.find(head)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first[:start] + second
+        start = first.find(head, start + 1)
+    return None
+
+
+def _dedupe(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge overlapping chunks from the same document, keeping the best score."""
+    passages: List[Dict[str, Any]] = []
+
+    for result in results:
+        for passage in passages:
+            if passage['document_id'] != result.get('document_id'):
+                continue
+            merged = (
+                _merge_overlap(passage['content'], result['content'])
+                or _merge_overlap(result['content'], passage['content'])
+            )
+            if merged is not None:
+                passage['content'] = merged
+                passage['score'] = max(passage['score'], _score(result))
+                break
+        else:
+            passages.append({
+                'document_id': result.get('document_id'),
+                'document_title': result.get('document_title'),
+                'document_source': result.get('document_source'),
+                'content': result['content'],
+                'score': _score(result)
+            })
+
+    return passages
+
+
+def truncate_around_match(text: str, query: str, max_chars: int) -> str:
+    """
+    Cut ``text`` to ``max_chars``, keeping the window with the most query terms.
+
+    Args:
+        text: Passage text
+        query: Search query
+        max_chars: Maximum characters to keep
+
+    Returns:
+        Text window, with '...' marking removed text
+    """
+    if len(text) <= max_chars:
+        return text
+
+    terms = {word.lower() for word in _WORD_RE.findall(query)}
+    hits = [m.start() for m in _WORD_RE.finditer(text) if m.group().lower() in terms]
+
+    # Slide a max_chars window over the hit positions to find the densest span
+    span_start, span_end, left = 0, 0, 0
+    best_count = 0
+    for right, position in enumerate(hits):
+        while position - hits[left] >= max_chars:
+            left += 1
+        if right - left + 1 > best_count:
+            best_count = right - left + 1
+            span_start, span_end = hits[left], position
+
+    # Centre the densest span and keep the window inside the text
+    center_offset = (max_chars - (span_end - span_start)) // 2
+    start = max(0, min(span_start - center_offset, len(text) - max_chars))
+    end = start + max_chars
+
+    # Snap to word boundaries
+    if start > 0:
+        space = text.find(' ', start)
+        if space != -1 and space < end:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(' ', start, end)
+        if space > start:
+            end = space
+
+    return ('...' if start > 0 else '') + text[start:end] + ('...' if end < len(text) else '')
+
+
+def pack_results(
+    results: Sequence[Any],
+    query: str,
+    token_budget: int,
+    max_tokens_per_result: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fit search results into a token budget for the model context.
+
+    Drops chunk metadata, merges overlapping chunks from the same document,
+    truncates long passages around the query terms and adds passages by
+    descending score until the budget is used.
+
+    Args:
+        results: SearchResult objects or result dicts from any search tool
+        query: Search query, used to choose truncation windows
+        token_budget: Maximum estimated tokens across all passages
+        max_tokens_per_result: Optional cap on each passage
+
+    Returns:
+        Compact passages with title, source, content and score
+    """
+    passages = _dedupe([_as_dict(result) for result in results])
+    passages.sort(key=lambda p: p['score'], reverse=True)
+
+    packed = []
+    remaining = token_budget
+    for passage in passages:
+        limit = remaining
+        if max_tokens_per_result:
+            limit = min(limit, max_tokens_per_result)
+        if limit < MIN_PASSAGE_TOKENS:
+            break
+
+        content = passage['content']
+        if estimate_tokens(content) > limit:
+            content = truncate_around_match(content, query, limit * 4)
+
+        packed.append({
+            'document_title': passage['document_title'],
+            'document_source': passage['document_source'],
+            'content': content,
+            'score': round(passage['score'], 4)
+        })
+        remaining -= estimate_tokens(content)
+
+    return packed
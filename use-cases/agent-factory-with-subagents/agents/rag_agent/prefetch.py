@@ -0,0 +1,113 @@
+"""Speculative search prefetch that overlaps retrieval with the first model call."""
+
+import re
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no retrieval signal when comparing queries
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from how i in is it me of on or
+please show tell that the their there this to was what when where which who why
+with would you your about find search explain give know
+""".split())
+
+
+def query_terms(text: str) -> set:
+    """Lowercase content words of a query."""
+    return {word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS}
+
+
+def query_similarity(a: str, b: str) -> float:
+    """
+    Keyword overlap (Jaccard) between two queries.
+    
+    Returns:
+        Similarity between 0 and 1; 1.0 for two queries without content words
+    """
+    terms_a, terms_b = query_terms(a), query_terms(b)
+    if not terms_a and not terms_b:
+        return 1.0
+    return len(terms_a & terms_b) / len(terms_a | terms_b)
+
+
+class PrefetchedSearch:
+    """
+    A hybrid search started from the raw user message.
+    
+    The search runs in the background while the model decides which tool to
+    call. A later hybrid_search with a similar query and compatible
+    parameters takes the first-stage rows instead of searching again.
+    """
+    
+    def __init__(
+        self,
+        query: str,
+        match_count: int,
+        text_weight: float,
+        search: Awaitable[List[Dict[str, Any]]]
+    ):
+        """
+        Start a prefetch.
+        
+        Args:
+            query: User message the search was run for
+            match_count: Number of rows fetched
+            text_weight: Text weight the search used
+            search: Coroutine producing the hybrid search rows
+        """
+        self.query = query
+        self.match_count = match_count
+        self.text_weight = text_weight
+        self.hits = 0
+        self._task = asyncio.ensure_future(search)
+        self._task.add_done_callback(self._log_failure)
+    
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        """Retrieve task errors so a failed prefetch never goes unobserved."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Search prefetch failed: {task.exception()}")
+    
+    def matches(
+        self,
+        query: str,
+        match_count: int,
+        text_weight: float,
+        threshold: float
+    ) -> bool:
+        """Check whether a search request can be served by this prefetch."""
+        return (
+            not self._task.cancelled()
+            and match_count <= self.match_count
+            and abs(text_weight - self.text_weight) < 1e-9
+            and query_similarity(query, self.query) >= threshold
+        )
+    
+    async def take(self, match_count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Wait for the prefetched rows.
+        
+        Args:
+            match_count: Number of rows wanted
+        
+        Returns:
+            Top rows, or None if the prefetch failed
+        """
+        try:
+            rows = await asyncio.shield(self._task)
+        except asyncio.CancelledError:
+            if self._task.cancelled():
+                return None
+            raise
+        except Exception:
+            return None
+        
+        self.hits += 1
+        return rows[:match_count]
+    
+    def cancel(self):
+        """Stop the search if it is still running."""
+        self._task.cancel()
@@ -3,6 +3,7 @@
 from pydantic_ai import RunContext
 from typing import Optional
 from dependencies import AgentDependencies
+from history import shorten
 
 
 MAIN_SYSTEM_PROMPT = """You are a helpful assistant with access to a knowledge base that you can search when needed.
@@ -25,6 +26,9 @@ ALWAYS Start with Hybrid search
 - Conceptual/thematic queries → Use hybrid_search
 - Specific facts/technical terms → Use hybrid_search with appropriate text_weight
 - Start with lower match_count (5-10) for focused results
+- If isolated chunks lack the surrounding context needed to answer, set context_window (1-2) to get each hit with its neighbouring chunks instead of searching again
+- Questions spanning several entities or aspects (comparisons, "X and Y") → Use multi_search with one sub-query per aspect in a single call, rather than several hybrid_search calls
+- When the user restricts the scope (a specific document, a topic tag, a date range), pass `filters` instead of searching everything: 'source' (e.g. "doc1_*"), 'created_after'/'created_before' (ISO dates), 'collection' or a frontmatter field
 
 ## Response Guidelines:
 - Be conversational and natural
@@ -55,7 +59,7 @@ def get_dynamic_prompt(ctx: RunContext[AgentDependencies]) -> str:
     
     # Add query history context
     if deps.query_history:
-        recent = deps.query_history[-3:]  # Last 3 queries
+        recent = [shorten(q, 25) for q in deps.query_history[-3:]]  # Last 3 queries
         parts.append(f"Recent searches: {', '.join(recent)}")
     
     if parts:
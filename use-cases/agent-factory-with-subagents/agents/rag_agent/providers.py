@@ -1,9 +1,13 @@
 """Model providers for Semantic Search Agent."""
 
-from typing import Optional
-from pydantic_ai.providers.openai import OpenAIProvider
+from typing import Any, Dict, Optional, Tuple
 from pydantic_ai.models.openai import OpenAIModel
 from settings import load_settings
+from utils.http_client import get_http_client
+from utils.providers import create_openai_provider
+
+# Models by (model, base_url, api_key), with the HTTP transport they were built on
+_llm_models: Dict[Tuple[str, Optional[str], str], Tuple[Any, OpenAIModel]] = {}
 
 
 def get_llm_model(model_choice: Optional[str] = None) -> OpenAIModel:
@@ -11,6 +15,9 @@ def get_llm_model(model_choice: Optional[str] = None) -> OpenAIModel:
     Get LLM model configuration based on environment variables.
     Supports any OpenAI-compatible API provider.
     
+    Models are reused while the shared HTTP transport stays open and rebuilt
+    once it has been closed (e.g. by ResourceRegistry.close on shutdown).
+    
     Args:
         model_choice: Optional override for model choice
     
@@ -23,10 +30,16 @@ def get_llm_model(model_choice: Optional[str] = None) -> OpenAIModel:
     base_url = settings.llm_base_url
     api_key = settings.llm_api_key
     
-    # Create provider based on configuration
-    provider = OpenAIProvider(base_url=base_url, api_key=api_key)
+    key = (llm_choice, base_url, api_key)
+    http_client = get_http_client()
+    cached = _llm_models.get(key)
+    if cached is not None and cached[0] is http_client:
+        return cached[1]
     
-    return OpenAIModel(llm_choice, provider=provider)
+    # Create provider based on configuration
+    model = OpenAIModel(llm_choice, provider=create_openai_provider(api_key, base_url))
+    _llm_models[key] = (http_client, model)
+    return model
 
 
 def get_embedding_model() -> OpenAIModel:
@@ -40,10 +53,7 @@ def get_embedding_model() -> OpenAIModel:
     settings = load_settings()
     
     # For embeddings, use the same provider configuration
-    provider = OpenAIProvider(
-        base_url=settings.llm_base_url, 
-        api_key=settings.llm_api_key
-    )
+    provider = create_openai_provider(settings.llm_api_key, settings.llm_base_url)
     
     return OpenAIModel(settings.embedding_model, provider=provider)
 
@@ -0,0 +1,142 @@
+"""Second-stage re-ranking of search results with a local model."""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, List, Mapping, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker(ABC):
+    """Scores (query, passage) pairs; higher is more relevant."""
+
+    @abstractmethod
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        """
+        Score passages against a query.
+
+        Called from a worker thread, so implementations may block.
+
+        Args:
+            query: Search query text
+            passages: Passage texts to score
+
+        Returns:
+            One relevance score per passage
+        """
+
+
+class CrossEncoderReranker(Reranker):
+    """Cross-encoder re-ranker running on CPU via sentence-transformers."""
+
+    def __init__(self, model_name: str, batch_size: int = 32, device: str = "cpu"):
+        """
+        Initialize re-ranker.
+
+        Args:
+            model_name: Cross-encoder model (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2)
+            batch_size: Pairs per forward pass
+            device: Torch device
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "Re-ranking requires sentence-transformers: pip install sentence-transformers"
+            ) from e
+
+        self.model = CrossEncoder(model_name, device=device)
+        self.batch_size = batch_size
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        """Score passages with the cross-encoder."""
+        scores = self.model.predict(
+            [(query, passage) for passage in passages],
+            batch_size=self.batch_size,
+            show_progress_bar=False
+        )
+        return [float(s) for s in scores]
+
+
+class RerankingStage:
+    """Batched, cached re-ranking of first-stage search results."""
+
+    def __init__(self, reranker: Reranker, batch_size: int = 32, cache_size: int = 10000):
+        """
+        Initialize re-ranking stage.
+
+        Args:
+            reranker: Model used to score candidates
+            batch_size: Candidates scored per model call
+            cache_size: Maximum cached (query, chunk) scores
+        """
+        self.reranker = reranker
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+    def _score_uncached(self, query: str, passages: List[str]) -> List[float]:
+        scores: List[float] = []
+        for i in range(0, len(passages), self.batch_size):
+            scores.extend(self.reranker.score(query, passages[i:i + self.batch_size]))
+        return scores
+
+    async def rerank(
+        self,
+        query: str,
+        rows: Sequence[Mapping[str, Any]],
+        top_k: int
+    ) -> List[Tuple[Mapping[str, Any], float]]:
+        """
+        Re-order search rows by model relevance and keep the best ``top_k``.
+
+        Args:
+            query: Search query text
+            rows: Search rows with 'chunk_id' and 'content'
+            top_k: Number of rows to keep
+
+        Returns:
+            List of (row, rerank score) ordered by score
+        """
+        scores = {}
+        missing = []
+        for row in rows:
+            key = (query, str(row['chunk_id']))
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                scores[key[1]] = self._cache[key]
+            else:
+                missing.append(row)
+
+        if missing:
+            # Model inference is CPU-bound; keep it off the event loop
+            new_scores = await asyncio.to_thread(
+                self._score_uncached, query, [row['content'] for row in missing]
+            )
+            for row, score in zip(missing, new_scores):
+                chunk_id = str(row['chunk_id'])
+                scores[chunk_id] = score
+                self._cache[(query, chunk_id)] = score
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        ranked = sorted(rows, key=lambda row: scores[str(row['chunk_id'])], reverse=True)
+        return [(row, scores[str(row['chunk_id'])]) for row in ranked[:top_k]]
+
+
+def create_reranking_stage(model_name: str, batch_size: int = 32) -> RerankingStage:
+    """
+    Create a re-ranking stage backed by a local cross-encoder.
+
+    Args:
+        model_name: Cross-encoder model name
+        batch_size: Candidates scored per model call
+
+    Returns:
+        RerankingStage instance
+    """
+    logger.info(f"Loading re-ranking model {model_name}")
+    return RerankingStage(CrossEncoderReranker(model_name, batch_size=batch_size), batch_size=batch_size)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""HTTP server running concurrent search agent sessions with SSE streaming."""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from pydantic_ai import Agent
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
+
+from dependencies import AgentDependencies
+from history import ConversationHistory
+from settings import load_settings
+from streaming import stream_agent_events
+from utils.resources import registry
+from utils.telemetry import recorder
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRequest(BaseModel):
+    """Request body for creating a session."""
+    preferences: Dict[str, Any] = Field(default_factory=dict)
+
+
+class MessageRequest(BaseModel):
+    """Request body for sending a message to a session."""
+    message: str = Field(..., min_length=1)
+
+
+class AdmissionController:
+    """
+    Bounds concurrent agent runs.
+    
+    Requests beyond ``max_concurrent`` wait for a slot; once ``max_queued``
+    are waiting, or a request waits longer than ``queue_timeout``, it is
+    rejected so overload turns into fast 503s instead of growing latency.
+    """
+    
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        """
+        Initialize admission controller.
+        
+        Args:
+            max_concurrent: Agent runs allowed at once
+            max_queued: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before rejection
+        """
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def acquire(self) -> bool:
+        """
+        Wait for a run slot.
+        
+        Returns:
+            True if admitted, False if the request should be rejected
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queued:
+            return False
+        
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        
+        self.active += 1
+        return True
+    
+    def release(self):
+        """Free a run slot."""
+        self.active -= 1
+        self._semaphore.release()
+
+
+@dataclass
+class Session:
+    """A conversation with its own agent dependencies."""
+    deps: AgentDependencies
+    history: ConversationHistory
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    closed: bool = False
+
+
+class SessionManager:
+    """Creates, looks up and expires sessions."""
+    
+    def __init__(self, settings: Any, max_sessions: int, ttl: float):
+        """
+        Initialize session manager.
+        
+        Args:
+            settings: Application settings shared by all sessions
+            max_sessions: Maximum open sessions
+            ttl: Seconds of inactivity before a session expires
+        """
+        self.settings = settings
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions: Dict[str, Session] = {}
+        # Sessions still initializing, counted against max_sessions
+        self._reserved = 0
+    
+    async def create(self, preferences: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Open a session; its dependencies share the process-wide pool.
+        
+        Returns:
+            Session ID
+        """
+        # Check and reserve with no await in between, so concurrent requests
+        # cannot all pass the limit while earlier ones are initializing
+        if len(self.sessions) + self._reserved >= self.max_sessions:
+            raise HTTPException(status_code=503, detail="Too many open sessions", headers={"Retry-After": "5"})
+        self._reserved += 1
+        
+        try:
+            session_id = str(uuid.uuid4())
+            deps = AgentDependencies(settings=self.settings, session_id=session_id)
+            try:
+                await deps.initialize()
+            except BaseException:
+                await deps.cleanup()
+                raise
+            for key, value in (preferences or {}).items():
+                deps.set_user_preference(key, value)
+            
+            self.sessions[session_id] = Session(deps=deps, history=ConversationHistory.from_settings(self.settings))
+            return session_id
+        finally:
+            self._reserved -= 1
+    
+    def get(self, session_id: str) -> Session:
+        """Get a session or raise 404."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        session.last_used = time.monotonic()
+        return session
+    
+    async def close(self, session_id: str):
+        """Close a session and release its dependencies once its current run finishes."""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            async with session.lock:
+                session.closed = True
+                await session.deps.cleanup()
+    
+    async def expire(self):
+        """Close sessions idle for longer than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        for session_id, session in list(self.sessions.items()):
+            if session.last_used < cutoff and not session.lock.locked():
+                await self.close(session_id)
+    
+    async def expire_periodically(self, interval: float):
+        """
+        Expire idle sessions every ``interval`` seconds until cancelled.
+        
+        Args:
+            interval: Seconds between checks
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.expire()
+            except Exception:
+                logger.exception("Session expiry failed")
+    
+    async def close_all(self):
+        """Close every session."""
+        for session_id in list(self.sessions):
+            await self.close(session_id)
+
+
+def create_app(settings: Optional[Any] = None, agent: Optional[Agent] = None) -> FastAPI:
+    """
+    Create the search agent HTTP application.
+    
+    Args:
+        settings: Application settings (default: load_settings())
+        agent: Agent to run (default: search_agent)
+    
+    Returns:
+        FastAPI application
+    """
+    settings = settings or load_settings()
+    sessions = SessionManager(settings, settings.server_max_sessions, settings.server_session_ttl)
+    admission = AdmissionController(
+        settings.server_max_concurrent_requests,
+        settings.server_max_queued_requests,
+        settings.server_queue_timeout
+    )
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Idle sessions expire even when no new sessions are being created
+        expiry = asyncio.create_task(sessions.expire_periodically(min(sessions.ttl / 2, 60.0)))
+        yield
+        expiry.cancel()
+        # Graceful shutdown: release sessions, then the shared pool and HTTP client
+        await sessions.close_all()
+        await registry.close()
+    
+    app = FastAPI(title="Semantic Search Agent", lifespan=lifespan)
+    app.state.sessions = sessions
+    app.state.admission = admission
+    
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "sessions": len(sessions.sessions),
+            "active_requests": admission.active,
+            "queued_requests": admission.waiting
+        }
+    
+    @app.get("/metrics")
+    async def metrics() -> PlainTextResponse:
+        # Per-stage latency p50/p95/p99 in Prometheus text format
+        return PlainTextResponse(recorder.render_prometheus(), media_type="text/plain; version=0.0.4")
+    
+    @app.post("/sessions", status_code=201)
+    async def create_session(request: Optional[SessionRequest] = None) -> Dict[str, str]:
+        session_id = await sessions.create(request.preferences if request else None)
+        return {"session_id": session_id}
+    
+    @app.delete("/sessions/{session_id}", status_code=204)
+    async def delete_session(session_id: str):
+        sessions.get(session_id)
+        await sessions.close(session_id)
+    
+    @app.post("/sessions/{session_id}/messages")
+    async def send_message(session_id: str, request: MessageRequest) -> EventSourceResponse:
+        session = sessions.get(session_id)
+        
+        if not await admission.acquire():
+            raise HTTPException(status_code=503, detail="Server busy", headers={"Retry-After": "1"})
+        
+        started = False
+        
+        async def events():
+            nonlocal started
+            started = True
+            try:
+                # One run at a time per session keeps its history consistent
+                async with session.lock:
+                    if session.closed:
+                        yield {"event": "error", "data": json.dumps({"type": "error", "message": "Session closed"})}
+                        return
+                    
+                    streamed_text = ""
+                    final_output = ""
+                    
+                    try:
+                        # Closing this stream ends the agent run in the same task
+                        async with aclosing(stream_agent_events(request.message, session.history, session.deps, agent)) as run:
+                            async for event in run:
+                                if event['type'] == 'text_delta':
+                                    streamed_text += event['content']
+                                elif event['type'] == 'final':
+                                    final_output = event['output']
+                                yield {"event": event['type'], "data": json.dumps(event, default=str)}
+                    except Exception as e:
+                        logger.exception(f"Agent run failed for session {session_id}")
+                        yield {"event": "error", "data": json.dumps({"type": "error", "message": str(e)})}
+                    
+                    reply = streamed_text.strip() or str(final_output).strip()
+                    session.history.add_turn(request.message, reply)
+            finally:
+                session.last_used = time.monotonic()
+                admission.release()
+        
+        stream = events()
+        
+        async def finish():
+            # A client that disconnects mid-stream leaves the stream paused at a
+            # yield; close it now so the session lock and slot are released
+            # instead of waiting for garbage collection
+            try:
+                await stream.aclose()
+            except Exception:
+                logger.exception(f"Closing the stream for session {session_id} failed")
+            # The stream releases its own slot; one that never started cannot
+            if not started:
+                admission.release()
+        
+        try:
+            return EventSourceResponse(stream, background=BackgroundTask(finish))
+        except Exception:
+            admission.release()
+            raise
+    
+    return app
+
+
+def main():
+    """Run the server with uvicorn."""
+    parser = argparse.ArgumentParser(description="Serve the search agent over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Port")
+    parser.add_argument("--log-level", default="info", help="Log level")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=args.log_level.upper())
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 """Settings configuration for Semantic Search Agent."""
 
 from pydantic_settings import BaseSettings
-from pydantic import Field, ConfigDict
+from pydantic import Field, ConfigDict, model_validator
 from dotenv import load_dotenv
 from typing import Optional
 
+from utils.providers import get_embedding_dimension
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -62,6 +64,98 @@ class Settings(BaseSettings):
         description="Default text weight for hybrid search (0-1)"
     )
     
+    max_multi_search_queries: int = Field(
+        default=5,
+        description="Maximum number of sub-queries per multi_search call"
+    )
+    
+    max_context_window: int = Field(
+        default=3,
+        description="Maximum neighbouring chunks returned on each side of a search hit"
+    )
+    
+    search_collection: Optional[str] = Field(
+        default=None,
+        description="Collection (tenant) every search is restricted to; unset searches all collections"
+    )
+    
+    search_backend: str = Field(
+        default="pgvector",
+        description="Backend for semantic search: 'pgvector' (ANN index) or 'exact' (in-memory brute force)"
+    )
+    
+    exact_index_path: Optional[str] = Field(
+        default=None,
+        description="File prefix for the memory-mapped exact search index (rebuilt from the database if missing or stale)"
+    )
+    
+    search_quantization: str = Field(
+        default="none",
+        description="Quantized index for semantic search: 'none', 'halfvec' or 'binary' (requires sql/quantized_search.sql and the matching index file)"
+    )
+    
+    quantization_candidate_multiplier: int = Field(
+        default=4,
+        description="Candidates fetched from the quantized index per result, re-ranked at full precision"
+    )
+    
+    rerank_model: Optional[str] = Field(
+        default=None,
+        description="Local cross-encoder used to re-rank search results (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2); disabled if unset"
+    )
+    
+    rerank_candidates: int = Field(
+        default=30,
+        description="First-stage candidates fetched for re-ranking before trimming to match_count"
+    )
+    
+    rerank_batch_size: int = Field(
+        default=32,
+        description="Candidates scored per re-ranking model call"
+    )
+    
+    result_token_budget: int = Field(
+        default=0,
+        description="Approximate token budget for each search tool's output; 0 returns full results"
+    )
+    
+    max_tokens_per_result: int = Field(
+        default=300,
+        description="Token cap for a single packed result, truncated around the query terms"
+    )
+    
+    search_prefetch: bool = Field(
+        default=False,
+        description="Start a default hybrid search for the user message while the model plans its first tool call; "
+                    "costs an embedding and a search per message even when unused"
+    )
+    
+    prefetch_similarity_threshold: float = Field(
+        default=0.5,
+        description="Minimum keyword overlap between a hybrid_search query and the user message to serve the prefetched results"
+    )
+    
+    # Conversation History Configuration
+    history_token_budget: int = Field(
+        default=1500,
+        description="Approximate token budget for conversation history in each prompt"
+    )
+    
+    history_recent_turns: int = Field(
+        default=3,
+        description="Most recent turns kept verbatim; older turns are summarized"
+    )
+    
+    history_max_turn_tokens: int = Field(
+        default=300,
+        description="Token cap for one user message or answer kept in history"
+    )
+    
+    history_summary_tokens: int = Field(
+        default=400,
+        description="Token cap for the summary of older turns"
+    )
+    
     # Connection Pool Configuration
     db_pool_min_size: int = Field(
         default=10,
@@ -73,16 +167,49 @@ class Settings(BaseSettings):
         description="Maximum database connection pool size"
     )
     
+    # Server Configuration
+    server_max_concurrent_requests: int = Field(
+        default=32,
+        description="Agent runs executed at once by the HTTP server"
+    )
+    
+    server_max_queued_requests: int = Field(
+        default=64,
+        description="Requests allowed to wait for a run slot before new ones are rejected with 503"
+    )
+    
+    server_queue_timeout: float = Field(
+        default=10.0,
+        description="Seconds a request may wait for a run slot"
+    )
+    
+    server_max_sessions: int = Field(
+        default=1000,
+        description="Maximum open server sessions"
+    )
+    
+    server_session_ttl: float = Field(
+        default=1800.0,
+        description="Seconds of inactivity before a server session expires"
+    )
+    
     # Embedding Configuration
     embedding_model: str = Field(
         default="text-embedding-3-small",
         description="OpenAI embedding model"
     )
     
-    embedding_dimension: int = Field(
-        default=1536,
-        description="Embedding vector dimension"
+    embedding_dimension: Optional[int] = Field(
+        default=None,
+        description="Embedding vector dimension (default: the model's native size; text-embedding-3 models can be reduced, e.g. 256 or 512)"
     )
+    
+    @model_validator(mode="after")
+    def default_embedding_dimension(self) -> "Settings":
+        """Resolve an unset embedding dimension the same way the embedder does."""
+        if self.embedding_dimension is None:
+            self.embedding_dimension = get_embedding_dimension(self.embedding_model)
+        return self
 
 
 def load_settings() -> Settings:
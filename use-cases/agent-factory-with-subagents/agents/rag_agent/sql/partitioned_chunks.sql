@@ -0,0 +1,72 @@
+-- Optional partitioning of chunks by collection, for large multi-tenant
+-- corpora. Run after schema.sql and before quantized_search.sql.
+--
+-- chunks becomes LIST-partitioned on collection. Collections start in
+-- chunks_default; create_collection_partition() (run by
+-- `ingest --collection NAME`) moves a collection into a partition of its own.
+-- Indexes are declared on the parent, so every partition has its own ANN,
+-- document and trigram indexes, and match_chunks()/hybrid_search() called
+-- with a collection only scan that partition. Existing chunks are kept.
+
+ALTER TABLE chunks RENAME TO chunks_unpartitioned;
+
+CREATE TABLE chunks (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    collection TEXT NOT NULL DEFAULT 'default',
+    content TEXT NOT NULL,
+    embedding vector(1536),
+    chunk_index INTEGER NOT NULL,
+    metadata JSONB DEFAULT '{}',
+    token_count INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    -- Unique constraints on a partitioned table must include the partition key
+    CONSTRAINT chunks_collection_id_pkey PRIMARY KEY (collection, id)
+) PARTITION BY LIST (collection);
+
+CREATE TABLE chunks_default PARTITION OF chunks DEFAULT;
+
+INSERT INTO chunks (id, document_id, collection, content, embedding, chunk_index, metadata, token_count, created_at)
+SELECT id, document_id, collection, content, embedding, chunk_index, metadata, token_count, created_at
+FROM chunks_unpartitioned;
+
+DROP TABLE chunks_unpartitioned;
+
+-- Created on every partition, including ones attached later
+CREATE INDEX idx_chunks_embedding ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 1);
+CREATE INDEX idx_chunks_document_id ON chunks (document_id);
+CREATE INDEX idx_chunks_chunk_index ON chunks (document_id, chunk_index);
+CREATE INDEX idx_chunks_content_trgm ON chunks USING GIN (content gin_trgm_ops);
+-- Lookups by chunk ID alone (exact search, context expansion) probe each partition
+CREATE INDEX idx_chunks_id ON chunks (id);
+
+-- Give a collection its own partition, moving its chunks out of
+-- chunks_default. Returns the partition name; does nothing if it exists.
+CREATE OR REPLACE FUNCTION create_collection_partition(collection_name TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    -- Readable, unique per collection and within the 63-byte identifier limit
+    partition_name TEXT := 'chunks_'
+        || left(regexp_replace(lower(collection_name), '[^a-z0-9]+', '_', 'g'), 40)
+        || '_' || left(md5(collection_name), 8);
+BEGIN
+    -- Concurrent ingests of a new collection create its partition once
+    PERFORM pg_advisory_xact_lock(hashtext('create_collection_partition'), hashtext(collection_name));
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Attaching fails while chunks_default holds rows of the collection, so
+    -- build the partition detached, move the rows, then attach it
+    EXECUTE format('CREATE TABLE %I (LIKE chunks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM chunks_default WHERE collection = $1 RETURNING *) INSERT INTO %I SELECT * FROM moved',
+        partition_name
+    ) USING collection_name;
+    EXECUTE format('ALTER TABLE chunks ATTACH PARTITION %I FOR VALUES IN (%L)', partition_name, collection_name);
+
+    RETURN partition_name;
+END;
+$$;
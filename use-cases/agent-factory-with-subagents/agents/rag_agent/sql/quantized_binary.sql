@@ -0,0 +1,4 @@
+-- Binary index for SEARCH_QUANTIZATION=binary. Run after quantized_search.sql.
+
+CREATE INDEX idx_chunks_embedding_binary ON chunks
+    USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops);
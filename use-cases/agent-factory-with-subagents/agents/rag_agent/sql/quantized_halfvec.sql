@@ -0,0 +1,4 @@
+-- halfvec index for SEARCH_QUANTIZATION=halfvec. Run after quantized_search.sql.
+
+CREATE INDEX idx_chunks_embedding_halfvec ON chunks
+    USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops);
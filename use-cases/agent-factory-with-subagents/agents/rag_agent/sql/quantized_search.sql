@@ -0,0 +1,84 @@
+-- Optional two-stage search over a quantized vector index.
+-- Requires pgvector >= 0.7.0. Run after schema.sql, followed by the index
+-- file for SEARCH_QUANTIZATION (ingest --init-schema --quantized-indexes MODE
+-- applies both):
+--   quantized_halfvec.sql - 16-bit floats, ~2x smaller index, near-identical recall
+--   quantized_binary.sql  - 1 bit per dimension, ~32x smaller index, needs re-ranking
+-- Only one quantized index is built, and applying this file drops the other.
+-- Full-precision vectors stay in chunks.embedding and are used for exact
+-- re-ranking. idx_chunks_embedding still serves filtered searches through
+-- match_chunks(); drop it only if every search goes through the quantized index.
+
+DROP INDEX IF EXISTS idx_chunks_embedding_halfvec;
+DROP INDEX IF EXISTS idx_chunks_embedding_binary;
+
+CREATE OR REPLACE FUNCTION match_chunks_quantized(
+    query_embedding vector(1536),
+    match_count INT DEFAULT 10,
+    quantization TEXT DEFAULT 'binary',
+    candidate_multiplier INT DEFAULT 4
+)
+RETURNS TABLE (
+    chunk_id UUID,
+    document_id UUID,
+    content TEXT,
+    similarity FLOAT,
+    metadata JSONB,
+    document_title TEXT,
+    document_source TEXT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    candidate_count INT := match_count * GREATEST(candidate_multiplier, 1);
+BEGIN
+    -- HNSW returns at most ef_search rows, so widen it to the candidate pool
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(candidate_count, 40), 1000)::text, true);
+
+    IF quantization = 'halfvec' THEN
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT c.id, c.document_id, c.content, c.embedding, c.metadata
+            FROM chunks c
+            WHERE c.embedding IS NOT NULL
+            ORDER BY c.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+            LIMIT candidate_count
+        )
+        SELECT
+            cand.id AS chunk_id,
+            cand.document_id,
+            cand.content,
+            1 - (cand.embedding <=> query_embedding) AS similarity,
+            cand.metadata,
+            d.title AS document_title,
+            d.source AS document_source
+        FROM candidates cand
+        JOIN documents d ON cand.document_id = d.id
+        ORDER BY cand.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSIF quantization = 'binary' THEN
+        RETURN QUERY
+        WITH candidates AS (
+            SELECT c.id, c.document_id, c.content, c.embedding, c.metadata
+            FROM chunks c
+            WHERE c.embedding IS NOT NULL
+            ORDER BY binary_quantize(c.embedding)::bit(1536) <~> binary_quantize(query_embedding)
+            LIMIT candidate_count
+        )
+        SELECT
+            cand.id AS chunk_id,
+            cand.document_id,
+            cand.content,
+            1 - (cand.embedding <=> query_embedding) AS similarity,
+            cand.metadata,
+            d.title AS document_title,
+            d.source AS document_source
+        FROM candidates cand
+        JOIN documents d ON cand.document_id = d.id
+        ORDER BY cand.embedding <=> query_embedding
+        LIMIT match_count;
+    ELSE
+        RAISE EXCEPTION 'Unknown quantization: %', quantization;
+    END IF;
+END;
+$$;
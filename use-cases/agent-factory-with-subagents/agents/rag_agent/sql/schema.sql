@@ -2,29 +2,44 @@ CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
+DROP TABLE IF EXISTS ingestion_queue;
+DROP TABLE IF EXISTS ingestion_manifest;
 DROP TABLE IF EXISTS chunks CASCADE;
 DROP TABLE IF EXISTS documents CASCADE;
 DROP INDEX IF EXISTS idx_chunks_embedding;
 DROP INDEX IF EXISTS idx_chunks_document_id;
 DROP INDEX IF EXISTS idx_documents_metadata;
 DROP INDEX IF EXISTS idx_chunks_content_trgm;
+DROP FUNCTION IF EXISTS match_chunks(vector, INT);
+DROP FUNCTION IF EXISTS hybrid_search(vector, TEXT, INT, FLOAT);
+DROP FUNCTION IF EXISTS filtered_document_ids(JSONB, TEXT, TIMESTAMPTZ, TIMESTAMPTZ);
+DROP FUNCTION IF EXISTS match_chunks(vector, INT, JSONB, TEXT, TIMESTAMPTZ, TIMESTAMPTZ);
+DROP FUNCTION IF EXISTS hybrid_search(vector, TEXT, INT, FLOAT, JSONB, TEXT, TIMESTAMPTZ, TIMESTAMPTZ);
+DROP FUNCTION IF EXISTS create_collection_partition(TEXT);
 
 CREATE TABLE documents (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     title TEXT NOT NULL,
     source TEXT NOT NULL,
+    -- Tenant or collection; searches can be restricted to one
+    collection TEXT NOT NULL DEFAULT 'default',
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    -- One document per source in each collection; upsert_document() updates it in place
+    CONSTRAINT documents_collection_source_key UNIQUE (collection, source)
 );
 
 CREATE INDEX idx_documents_metadata ON documents USING GIN (metadata);
 CREATE INDEX idx_documents_created_at ON documents (created_at DESC);
+CREATE INDEX idx_documents_source ON documents (source text_pattern_ops);
 
 CREATE TABLE chunks (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    -- Copy of the document's collection; sql/partitioned_chunks.sql partitions on it
+    collection TEXT NOT NULL DEFAULT 'default',
     content TEXT NOT NULL,
     embedding vector(1536),
     chunk_index INTEGER NOT NULL,
@@ -38,9 +53,53 @@ CREATE INDEX idx_chunks_document_id ON chunks (document_id);
 CREATE INDEX idx_chunks_chunk_index ON chunks (document_id, chunk_index);
 CREATE INDEX idx_chunks_content_trgm ON chunks USING GIN (content gin_trgm_ops);
 
+-- Documents matching search filters. Built as dynamic SQL so each call is
+-- planned with its actual filters and can use the GIN, source,
+-- collection and created_at indexes on documents.
+CREATE OR REPLACE FUNCTION filtered_document_ids(
+    metadata_filter JSONB DEFAULT '{}',
+    source_filter TEXT DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    collection_filter TEXT DEFAULT NULL
+)
+RETURNS SETOF UUID
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+    conditions TEXT[] := ARRAY['TRUE'];
+BEGIN
+    IF metadata_filter IS NOT NULL AND metadata_filter <> '{}'::jsonb THEN
+        conditions := conditions || 'metadata @> $1'::TEXT;
+    END IF;
+    IF source_filter IS NOT NULL THEN
+        conditions := conditions || 'source LIKE $2 ESCAPE ''\'''::TEXT;
+    END IF;
+    IF created_after IS NOT NULL THEN
+        conditions := conditions || 'created_at >= $3'::TEXT;
+    END IF;
+    IF created_before IS NOT NULL THEN
+        conditions := conditions || 'created_at < $4'::TEXT;
+    END IF;
+    IF collection_filter IS NOT NULL THEN
+        conditions := conditions || 'collection = $5'::TEXT;
+    END IF;
+
+    RETURN QUERY EXECUTE
+        'SELECT id FROM documents WHERE ' || array_to_string(conditions, ' AND ')
+        USING metadata_filter, source_filter, created_after, created_before, collection_filter;
+END;
+$$;
+
 CREATE OR REPLACE FUNCTION match_chunks(
     query_embedding vector(1536),
-    match_count INT DEFAULT 10
+    match_count INT DEFAULT 10,
+    metadata_filter JSONB DEFAULT '{}',
+    source_filter TEXT DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    collection_filter TEXT DEFAULT NULL
 )
 RETURNS TABLE (
     chunk_id UUID,
@@ -53,21 +112,94 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    -- Filters matching at most this many chunks are answered by exact scan
+    exact_scan_limit CONSTANT INT := 20000;
+    doc_ids UUID[];
+    candidate_count INT;
+    filter_clause TEXT := '';
 BEGIN
-    RETURN QUERY
-    SELECT 
-        c.id AS chunk_id,
-        c.document_id,
-        c.content,
-        1 - (c.embedding <=> query_embedding) AS similarity,
-        c.metadata,
-        d.title AS document_title,
-        d.source AS document_source
-    FROM chunks c
-    JOIN documents d ON c.document_id = d.id
-    WHERE c.embedding IS NOT NULL
-    ORDER BY c.embedding <=> query_embedding
-    LIMIT match_count;
+    -- Dynamic SQL throughout so the collection is a plan-time constant and
+    -- a partitioned chunks table is pruned to that collection's partition
+    IF collection_filter IS NOT NULL THEN
+        filter_clause := 'AND c.collection = $4';
+    END IF;
+
+    IF (metadata_filter IS NOT NULL AND metadata_filter <> '{}'::jsonb)
+        OR source_filter IS NOT NULL OR created_after IS NOT NULL OR created_before IS NOT NULL THEN
+        doc_ids := ARRAY(SELECT filtered_document_ids(
+            metadata_filter, source_filter, created_after, created_before, collection_filter
+        ));
+        filter_clause := filter_clause || ' AND c.document_id = ANY($3)';
+
+        EXECUTE format($query$
+            SELECT count(*) FROM (
+                SELECT 1 FROM chunks c
+                WHERE c.embedding IS NOT NULL %1$s
+                LIMIT %2$s
+            ) matching
+        $query$, filter_clause, exact_scan_limit + 1)
+        INTO candidate_count
+        USING query_embedding, match_count, doc_ids, collection_filter;
+
+        IF candidate_count <= exact_scan_limit THEN
+            -- Selective filter: exact distances over the matching chunks only
+            RETURN QUERY EXECUTE format($query$
+            WITH candidates AS MATERIALIZED (
+                SELECT c.id, c.document_id, c.content, c.embedding, c.metadata
+                FROM chunks c
+                WHERE c.embedding IS NOT NULL %1$s
+            )
+            SELECT
+                cand.id AS chunk_id,
+                cand.document_id,
+                cand.content,
+                1 - (cand.embedding <=> $1) AS similarity,
+                cand.metadata,
+                d.title AS document_title,
+                d.source AS document_source
+            FROM candidates cand
+            JOIN documents d ON cand.document_id = d.id
+            ORDER BY cand.embedding <=> $1
+            LIMIT $2
+            $query$, filter_clause)
+            USING query_embedding, match_count, doc_ids, collection_filter;
+            RETURN;
+        END IF;
+    END IF;
+
+    IF filter_clause <> '' THEN
+        -- Broad filter or shared index: keep walking the ANN index until
+        -- enough rows pass the filter (iterative index scans, pgvector >= 0.8;
+        -- ignored otherwise)
+        BEGIN
+            PERFORM set_config('ivfflat.iterative_scan', 'relaxed_order', true);
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION WHEN OTHERS THEN
+            NULL;
+        END;
+    END IF;
+
+    RETURN QUERY EXECUTE format($query$
+    SELECT ranked.* FROM (
+        SELECT 
+            c.id AS chunk_id,
+            c.document_id,
+            c.content,
+            1 - (c.embedding <=> $1) AS similarity,
+            c.metadata,
+            d.title AS document_title,
+            d.source AS document_source
+        FROM chunks c
+        JOIN documents d ON c.document_id = d.id
+        WHERE c.embedding IS NOT NULL %1$s
+        ORDER BY c.embedding <=> $1
+        LIMIT $2
+    ) ranked
+    -- Relaxed-order scans can return rows slightly out of order
+    ORDER BY ranked.similarity DESC
+    $query$, filter_clause)
+    USING query_embedding, match_count, doc_ids, collection_filter;
 END;
 $$;
 
@@ -75,7 +207,12 @@ CREATE OR REPLACE FUNCTION hybrid_search(
     query_embedding vector(1536),
     query_text TEXT,
     match_count INT DEFAULT 10,
-    text_weight FLOAT DEFAULT 0.3
+    text_weight FLOAT DEFAULT 0.3,
+    metadata_filter JSONB DEFAULT '{}',
+    source_filter TEXT DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    collection_filter TEXT DEFAULT NULL
 )
 RETURNS TABLE (
     chunk_id UUID,
@@ -90,39 +227,55 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    doc_ids UUID[];
+    filter_clause TEXT := '';
 BEGIN
-    RETURN QUERY
+    IF collection_filter IS NOT NULL THEN
+        filter_clause := 'AND c.collection = $6';
+    END IF;
+    IF (metadata_filter IS NOT NULL AND metadata_filter <> '{}'::jsonb)
+        OR source_filter IS NOT NULL OR created_after IS NOT NULL OR created_before IS NOT NULL THEN
+        doc_ids := ARRAY(SELECT filtered_document_ids(
+            metadata_filter, source_filter, created_after, created_before, collection_filter
+        ));
+        filter_clause := filter_clause || ' AND c.document_id = ANY($5)';
+    END IF;
+
+    -- Dynamic SQL so filtered calls are planned against idx_chunks_document_id
+    -- and a collection prunes a partitioned chunks table
+    RETURN QUERY EXECUTE format($query$
     WITH vector_results AS (
         SELECT 
             c.id AS chunk_id,
             c.document_id,
             c.content,
-            1 - (c.embedding <=> query_embedding) AS vector_sim,
+            1 - (c.embedding <=> $1) AS vector_sim,
             c.metadata,
             d.title AS doc_title,
             d.source AS doc_source
         FROM chunks c
         JOIN documents d ON c.document_id = d.id
-        WHERE c.embedding IS NOT NULL
+        WHERE c.embedding IS NOT NULL %1$s
     ),
     text_results AS (
         SELECT 
             c.id AS chunk_id,
             c.document_id,
             c.content,
-            ts_rank_cd(to_tsvector('english', c.content), plainto_tsquery('english', query_text)) AS text_sim,
+            ts_rank_cd(to_tsvector('english', c.content), plainto_tsquery('english', $2)) AS text_sim,
             c.metadata,
             d.title AS doc_title,
             d.source AS doc_source
         FROM chunks c
         JOIN documents d ON c.document_id = d.id
-        WHERE to_tsvector('english', c.content) @@ plainto_tsquery('english', query_text)
+        WHERE to_tsvector('english', c.content) @@ plainto_tsquery('english', $2) %1$s
     )
     SELECT 
         COALESCE(v.chunk_id, t.chunk_id) AS chunk_id,
         COALESCE(v.document_id, t.document_id) AS document_id,
         COALESCE(v.content, t.content) AS content,
-        (COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight)::float8 AS combined_score,
+        (COALESCE(v.vector_sim, 0) * (1 - $4) + COALESCE(t.text_sim, 0) * $4)::float8 AS combined_score,
         COALESCE(v.vector_sim, 0)::float8 AS vector_similarity,
         COALESCE(t.text_sim, 0)::float8 AS text_similarity,
         COALESCE(v.metadata, t.metadata) AS metadata,
@@ -131,7 +284,9 @@ BEGIN
     FROM vector_results v
     FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
     ORDER BY combined_score DESC
-    LIMIT match_count;
+    LIMIT $3
+    $query$, filter_clause)
+    USING query_embedding, query_text, match_count, text_weight, doc_ids, collection_filter;
 END;
 $$;
 
@@ -157,6 +312,56 @@ BEGIN
 END;
 $$;
 
+-- Search hits expanded with +/- context_window neighbouring chunks. Windows
+-- that touch or overlap within a document are merged into one passage.
+CREATE OR REPLACE FUNCTION expand_chunk_context(
+    hit_ids UUID[],
+    context_window INT DEFAULT 1
+)
+RETURNS TABLE (
+    document_id UUID,
+    start_chunk_index INTEGER,
+    end_chunk_index INTEGER,
+    content TEXT,
+    hit_chunk_ids UUID[],
+    document_title TEXT,
+    document_source TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH hits AS (
+        SELECT c.document_id, c.chunk_index
+        FROM chunks c
+        WHERE c.id = ANY(hit_ids)
+    ),
+    neighbors AS (
+        -- Range lookups on idx_chunks_chunk_index (document_id, chunk_index)
+        SELECT DISTINCT n.id, n.document_id, n.chunk_index, n.content
+        FROM hits h
+        JOIN chunks n ON n.document_id = h.document_id
+            AND n.chunk_index BETWEEN h.chunk_index - context_window AND h.chunk_index + context_window
+    ),
+    islands AS (
+        -- Consecutive chunk indexes share the same island number
+        SELECT
+            nb.*,
+            nb.chunk_index - ROW_NUMBER() OVER (PARTITION BY nb.document_id ORDER BY nb.chunk_index) AS island
+        FROM neighbors nb
+    )
+    SELECT
+        i.document_id,
+        MIN(i.chunk_index) AS start_chunk_index,
+        MAX(i.chunk_index) AS end_chunk_index,
+        string_agg(i.content, E'\n\n' ORDER BY i.chunk_index) AS content,
+        array_agg(i.id ORDER BY i.chunk_index) FILTER (WHERE i.id = ANY(hit_ids)) AS hit_chunk_ids,
+        d.title AS document_title,
+        d.source AS document_source
+    FROM islands i
+    JOIN documents d ON d.id = i.document_id
+    GROUP BY i.document_id, i.island, d.title, d.source;
+$$;
+
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -167,4 +372,3 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER update_documents_updated_at BEFORE UPDATE ON documents
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-    
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Agent run streaming shared by the CLI and the HTTP server."""
+
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from pydantic_ai import Agent
+from agent import search_agent
+from providers import get_llm_model
+from dependencies import AgentDependencies
+from history import ConversationHistory
+from tools import start_prefetch, cancel_prefetch
+from utils.telemetry import RequestTracker, recorder, span
+
+
+def build_prompt(user_input: str, conversation_history: Optional[ConversationHistory]) -> str:
+    """Build the agent prompt from the user message and compacted history."""
+    # Build context with conversation history
+    context = conversation_history.render() if conversation_history else ""
+    
+    return f"""Previous conversation:
+{context}
+
+User: {user_input}
+
+Search the knowledge base to answer the user's question. Choose the appropriate search strategy (semantic_search or hybrid_search) based on the query type. Provide a comprehensive summary of your findings."""
+
+
+def _tool_call_info(event: Any) -> Dict[str, Any]:
+    """Extract tool name and arguments from a FunctionToolCallEvent."""
+    tool_name = "Unknown Tool"
+    args = None
+    
+    # Check if the part attribute contains the tool call
+    if hasattr(event, 'part'):
+        part = event.part
+        
+        # Check if part has tool_name directly
+        if hasattr(part, 'tool_name'):
+            tool_name = part.tool_name
+        elif hasattr(part, 'function_name'):
+            tool_name = part.function_name
+        elif hasattr(part, 'name'):
+            tool_name = part.name
+        
+        # Check for arguments in part
+        if hasattr(part, 'args'):
+            args = part.args
+        elif hasattr(part, 'arguments'):
+            args = part.arguments
+    
+    return {'tool_name': tool_name, 'args': args}
+
+
+def _tool_result_text(event: Any) -> str:
+    """Extract the result text from a FunctionToolResultEvent."""
+    # Check different possible attributes
+    if hasattr(event, 'result'):
+        return str(event.result)
+    if hasattr(event, 'return_value'):
+        return str(event.return_value)
+    if hasattr(event, 'tool_return'):
+        return str(event.tool_return)
+    if hasattr(event, 'part'):
+        if hasattr(event.part, 'content'):
+            return str(event.part.content)
+        return str(event.part)
+    
+    # Debug: show what attributes are available
+    attrs = [attr for attr in dir(event) if not attr.startswith('_')]
+    return f"Unknown result structure. Attrs: {attrs[:5]}"
+
+
+async def stream_agent_events(
+    user_input: str,
+    conversation_history: Optional[ConversationHistory],
+    deps: AgentDependencies,
+    agent: Optional[Agent] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the search agent and yield its progress as plain event dicts.
+    
+    Event types:
+        model_request: the model started a response
+        text_delta: streamed response text ('content')
+        text_done: the streamed response finished
+        tool_call: a tool was called ('tool_name', 'args')
+        tool_result: a tool returned ('content')
+        final: the run finished ('output', 'timings': stage -> ms)
+    
+    Args:
+        user_input: User message
+        conversation_history: Previous turns, not including user_input
+        deps: Session dependencies
+        agent: Agent to run (default: search_agent)
+    """
+    # The default agent is built at import; give each run a model on the
+    # current HTTP transport, which may have been closed and recreated since
+    model = None if agent else get_llm_model()
+    agent = agent or search_agent
+    prompt = build_prompt(user_input, conversation_history)
+    
+    # Timing context is entered per step, never held across a yield
+    tracker = RequestTracker("agent.run")
+    
+    # Search for the raw message while the model plans its first tool call
+    with tracker.step():
+        start_prefetch(deps, user_input)
+    
+    run = _stream_run(agent, prompt, deps, model)
+    try:
+        while True:
+            with tracker.step():
+                try:
+                    event = await run.__anext__()
+                except StopAsyncIteration:
+                    break
+            if event['type'] == 'final':
+                event['timings'] = tracker.timings
+            yield event
+    finally:
+        try:
+            # End the agent run here rather than whenever it is garbage collected
+            with tracker.step():
+                await run.aclose()
+        finally:
+            cancel_prefetch(deps)
+            tracker.finish()
+
+
+async def _stream_run(
+    agent: Agent,
+    prompt: str,
+    deps: AgentDependencies,
+    model: Optional[Any] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream one agent run as event dicts, optionally overriding the agent's model."""
+    # Stream the agent execution
+    async with agent.iter(prompt, deps=deps, model=model) as run:
+        async for node in run:
+            
+            # Handle model request node - stream the thinking process
+            if Agent.is_model_request_node(node):
+                yield {'type': 'model_request'}
+                
+                # Stream model request events for real-time text
+                request_start = time.perf_counter()
+                first_token = True
+                with span("llm.total"):
+                    async with node.stream(run.ctx) as request_stream:
+                        async for event in request_stream:
+                            if first_token:
+                                recorder.observe("llm.first_token", time.perf_counter() - request_start)
+                                first_token = False
+                            event_type = type(event).__name__
+                            
+                            if event_type == "PartDeltaEvent":
+                                # Extract content from delta
+                                if hasattr(event, 'delta') and hasattr(event.delta, 'content_delta'):
+                                    delta_text = event.delta.content_delta
+                                    if delta_text:
+                                        yield {'type': 'text_delta', 'content': delta_text}
+                            elif event_type == "FinalResultEvent":
+                                yield {'type': 'text_done'}
+            
+            # Handle tool calls
+            elif Agent.is_call_tools_node(node):
+                # Stream tool execution events
+                async with node.stream(run.ctx) as tool_stream:
+                    async for event in tool_stream:
+                        event_type = type(event).__name__
+                        
+                        if event_type == "FunctionToolCallEvent":
+                            yield {'type': 'tool_call', **_tool_call_info(event)}
+                        elif event_type == "FunctionToolResultEvent":
+                            yield {'type': 'tool_result', 'content': _tool_result_text(event)}
+    
+    # Get final result
+    final_result = run.result
+    final_output = final_result.output if hasattr(final_result, 'output') else str(final_result)
+    yield {'type': 'final', 'output': final_output}
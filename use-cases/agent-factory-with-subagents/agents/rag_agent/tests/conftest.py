@@ -2,11 +2,14 @@
 
 import pytest
 import asyncio
-from typing import AsyncGenerator, Dict, Any, List
+from dataclasses import asdict
+from typing import AsyncGenerator, Dict, Any, List, Optional
 from unittest.mock import AsyncMock, MagicMock
 from pydantic_ai.models.test import TestModel
 from pydantic_ai.models.function import FunctionModel
 from pydantic_ai.messages import ModelTextResponse
+from pydantic_ai import RunContext
+from pydantic_ai.usage import RunUsage
 
 # Import the agent components
 from ..agent import search_agent
@@ -35,7 +38,8 @@ def test_settings():
 @pytest.fixture
 def mock_db_pool():
     """Create mock database pool."""
-    pool = AsyncMock()
+    pool = MagicMock()
+    pool.close = AsyncMock()
     connection = AsyncMock()
     pool.acquire.return_value.__aenter__.return_value = connection
     pool.acquire.return_value.__aexit__.return_value = None
@@ -73,6 +77,14 @@ async def test_dependencies(test_settings, mock_db_pool, mock_openai_client):
     return deps, connection
 
 
+@pytest.fixture
+def make_run_context():
+    """Create a factory for tool RunContext objects."""
+    def _make(deps: AgentDependencies) -> RunContext:
+        return RunContext(deps=deps, model=TestModel(), usage=RunUsage())
+    return _make
+
+
 @pytest.fixture
 def sample_search_results():
     """Create sample search results for testing."""
@@ -180,7 +192,7 @@ def create_search_function_model(search_results: List[Dict[str, Any]]) -> Functi
 @pytest.fixture
 def function_model_with_search(sample_search_results):
     """Create FunctionModel configured for search testing."""
-    return create_search_function_model([r.dict() for r in sample_search_results])
+    return create_search_function_model([asdict(r) for r in sample_search_results])
 
 
 @pytest.fixture  
@@ -214,6 +226,27 @@ def mock_database_responses():
     }
 
 
+@pytest.fixture
+def make_search_row():
+    """Create a factory for search result rows, valid for semantic and hybrid search."""
+    def _make(chunk_id: str, score: float = 0.5, content: Optional[str] = None, **fields) -> dict:
+        row = {
+            'chunk_id': chunk_id,
+            'document_id': 'doc_1',
+            'content': f'Content of {chunk_id}' if content is None else content,
+            'similarity': score,
+            'combined_score': score,
+            'vector_similarity': score,
+            'text_similarity': 0.0,
+            'metadata': {'page': 1},
+            'document_title': 'Title',
+            'document_source': 'source.md'
+        }
+        row.update(fields)
+        return row
+    return _make
+
+
 # Test event loop configuration
 @pytest.fixture(scope="session")
 def event_loop():
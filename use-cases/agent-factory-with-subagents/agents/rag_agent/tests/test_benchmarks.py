@@ -0,0 +1,69 @@
+"""Test the retrieval benchmark embedding stub and corpus generator."""
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from ..benchmarks.corpus import SyntheticCorpus
+from ..benchmarks.embedding_stub import create_app, embed_text
+
+
+class TestEmbeddingStub:
+    """Test the OpenAI-compatible embedding stub."""
+    
+    def test_deterministic_and_normalized(self):
+        """Test the same text always gets the same unit vector."""
+        first = embed_text("Hybrid search with pgvector", 64)
+        
+        assert np.array_equal(first, embed_text("Hybrid search with pgvector", 64))
+        assert first.shape == (64,)
+        assert np.isclose(np.linalg.norm(first), 1.0)
+    
+    def test_shared_words_are_closer(self):
+        """Test texts with overlapping vocabulary are more similar."""
+        query = embed_text("vector index recall")
+        related = embed_text("recall of the vector index")
+        unrelated = embed_text("quarterly revenue growth")
+        
+        assert float(query @ related) > float(query @ unrelated)
+    
+    @pytest.mark.asyncio
+    async def test_openai_client_compatible(self):
+        """Test the OpenAI SDK can call the stub, including base64 encoding."""
+        app = create_app(dimension=32)
+        http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        client = openai.AsyncOpenAI(api_key="stub", base_url="http://stub/v1", http_client=http_client)
+        
+        response = await client.embeddings.create(model="text-embedding-3-small", input=["a b", "c"], dimensions=16)
+        await client.close()
+        
+        assert [item.index for item in response.data] == [0, 1]
+        assert np.allclose(response.data[0].embedding, embed_text("a b", 16), atol=1e-6)
+        assert app.state.requests == 1
+        assert app.state.inputs == 2
+
+
+class TestSyntheticCorpus:
+    """Test the synthetic corpus generator."""
+    
+    def test_deterministic(self):
+        """Test documents and queries depend only on the seed."""
+        assert SyntheticCorpus(seed=1).document(3) == SyntheticCorpus(seed=1).document(3)
+        assert SyntheticCorpus(seed=1).document(3) != SyntheticCorpus(seed=2).document(3)
+        assert [q.text for q in SyntheticCorpus(seed=1).queries(5)] == [q.text for q in SyntheticCorpus(seed=1).queries(5)]
+    
+    def test_queries_match_topic_documents(self):
+        """Test query terms come from their topic's documents."""
+        corpus = SyntheticCorpus(topics=4, seed=0)
+        query = corpus.queries(1)[0]
+        document = corpus.document(query.topic, words=2000)
+        
+        assert sum(term in document for term in query.text.split()) >= 3
+    
+    def test_write(self, tmp_path):
+        """Test documents are written as markdown files."""
+        paths = SyntheticCorpus().write(str(tmp_path), documents=3, words=50)
+        
+        assert len(paths) == 3
+        assert open(paths[0], encoding="utf-8").read().startswith("# Document 0")
@@ -0,0 +1,50 @@
+"""Test neighbour-chunk context expansion."""
+
+import pytest
+
+from ..tools import hybrid_search
+
+
+class TestContextExpansion:
+    """Test search hits are replaced by merged passages."""
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_with_context_window(self, test_dependencies, make_run_context, mock_database_responses):
+        """Test hits are expanded in one extra statement and ranked by best hit."""
+        deps, connection = test_dependencies
+        hits = [
+            {**mock_database_responses['hybrid_search'][0], 'chunk_id': 'chunk_1', 'combined_score': 0.6, 'metadata': {}},
+            {**mock_database_responses['hybrid_search'][0], 'chunk_id': 'chunk_2', 'combined_score': 0.9, 'metadata': {}},
+        ]
+        passages = [
+            {
+                'document_id': 'doc_1',
+                'start_chunk_index': 0,
+                'end_chunk_index': 3,
+                'content': 'chunk 0\n\nchunk 1\n\nchunk 2\n\nchunk 3',
+                'hit_chunk_ids': ['chunk_1'],
+                'document_title': 'Python Tutorial',
+                'document_source': 'tutorial.pdf'
+            },
+            {
+                'document_id': 'doc_2',
+                'start_chunk_index': 4,
+                'end_chunk_index': 6,
+                'content': 'chunk 4\n\nchunk 5\n\nchunk 6',
+                'hit_chunk_ids': ['chunk_2'],
+                'document_title': 'ML Guide',
+                'document_source': 'ml_guide.pdf'
+            }
+        ]
+        connection.fetch.side_effect = [hits, passages]
+        
+        ctx = make_run_context(deps)
+        results = await hybrid_search(ctx, "Python programming", context_window=5)
+        
+        assert connection.fetch.call_count == 2
+        args = connection.fetch.call_args[0]
+        assert 'expand_chunk_context' in args[0]
+        assert args[2] == deps.settings.max_context_window
+        assert [r['document_id'] for r in results] == ['doc_2', 'doc_1']
+        assert results[0]['score'] == 0.9
+        assert results[1]['content'].startswith('chunk 0')
@@ -217,6 +217,30 @@ class TestEmbeddingGeneration:
         
         with pytest.raises(ConnectionError, match="Network unavailable"):
             await deps.get_embedding("test text")
+    
+    @pytest.mark.asyncio
+    async def test_get_embedding_reduced_dimension(self, test_dependencies):
+        """Test reduced embedding dimension is requested from the API."""
+        deps, connection = test_dependencies
+        deps.settings.embedding_dimension = 512
+        
+        await deps.get_embedding("test text")
+        
+        deps.openai_client.embeddings.create.assert_called_once_with(
+            model=deps.settings.embedding_model,
+            input="test text",
+            dimensions=512
+        )
+    
+    @pytest.mark.asyncio
+    async def test_get_embedding_unsupported_reduction(self, test_dependencies):
+        """Test models without Matryoshka support reject custom dimensions."""
+        deps, connection = test_dependencies
+        deps.settings.embedding_model = "text-embedding-ada-002"
+        deps.settings.embedding_dimension = 512
+        
+        with pytest.raises(ValueError, match="does not support"):
+            await deps.get_embedding("test text")
 
 
 class TestUserPreferences:
@@ -477,6 +501,20 @@ class TestSettingsIntegration:
         assert test_settings.db_pool_max_size == 5
         assert test_settings.embedding_dimension == 1536
     
+    def test_embedding_dimension_follows_model(self, monkeypatch):
+        """Test settings, chunk validation and the embedder agree on a non-default model's dimension."""
+        from ..utils.models import Chunk
+        from ..utils.providers import get_embedding_dimension
+        monkeypatch.delenv('EMBEDDING_DIMENSION', raising=False)
+        monkeypatch.setenv('EMBEDDING_MODEL', 'text-embedding-3-large')
+        
+        settings = Settings(database_url="postgresql://test@localhost/test", openai_api_key="key")
+        
+        assert settings.embedding_dimension == get_embedding_dimension() == 3072
+        assert len(Chunk(document_id="d", content="c", chunk_index=0, embedding=[0.0] * 3072).embedding) == 3072
+        with pytest.raises(ValueError, match="3072"):
+            Chunk(document_id="d", content="c", chunk_index=0, embedding=[0.0] * 1536)
+    
     def test_settings_custom_values(self):
         """Test settings with custom environment values."""
         with patch.dict('os.environ', {
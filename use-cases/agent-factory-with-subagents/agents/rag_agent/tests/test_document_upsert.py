@@ -0,0 +1,124 @@
+"""Test document upsert and delete."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from ..utils.db_utils import chunk_hash, delete_document, ensure_unique_sources, upsert_document
+
+
+@asynccontextmanager
+async def no_transaction():
+    yield
+
+
+def make_conn(created=False, stored=()):
+    """Connection whose document upsert returns doc-1 and whose stored chunks are (id, content) pairs."""
+    conn = AsyncMock()
+    conn.transaction = MagicMock(side_effect=lambda: no_transaction())
+    conn.fetchrow.return_value = {"id": "doc-1", "created": created}
+    conn.fetch.return_value = [{"id": chunk_id, "hash": chunk_hash(content)} for chunk_id, content in stored]
+    conn.execute.return_value = "DELETE 1"
+    return conn
+
+
+def chunk(content, index, embedding=None):
+    return {"content": content, "chunk_index": index, "metadata": {"n": index}, "token_count": 1, "embedding": embedding}
+
+
+class TestUpsertDocument:
+    """Test only changed chunks are rewritten."""
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_chunks_keep_their_ids(self):
+        """Test stored contents are updated in place, new ones inserted and the rest deleted."""
+        conn = make_conn(stored=[("c-a", "alpha"), ("c-b", "beta"), ("c-old", "gone")])
+        chunks = [chunk("new intro", 0, [0.5]), chunk("alpha", 1), chunk("beta", 2)]
+        
+        result = await upsert_document("a.md", "text", chunks, title="A", conn=conn)
+        
+        assert result == {
+            "document_id": "doc-1", "created": False,
+            "chunks_inserted": 1, "chunks_kept": 2, "chunks_deleted": 1
+        }
+        delete_args = conn.execute.await_args.args
+        assert delete_args[1:] == ("doc-1", ["c-a", "c-b"], "default")
+        updates, inserts = (call.args[1] for call in conn.executemany.await_args_list)
+        # Kept chunks move to their new positions
+        assert [(row[0], row[1]) for row in updates] == [("c-a", 1), ("c-b", 2)]
+        assert [(row[1], row[2], row[3]) for row in inserts] == [("new intro", "[0.5]", 0)]
+    
+    @pytest.mark.asyncio
+    async def test_repeated_content_matches_each_stored_copy_once(self):
+        """Test duplicate chunk contents reuse one stored row each."""
+        conn = make_conn(stored=[("c-1", "same")])
+        
+        result = await upsert_document("a.md", "text", [chunk("same", 0), chunk("same", 1, [0.1])], conn=conn)
+        
+        assert (result["chunks_kept"], result["chunks_inserted"]) == (1, 1)
+    
+    @pytest.mark.asyncio
+    async def test_new_document_skips_chunk_lookup(self):
+        """Test a created document inserts every chunk without reading stored ones."""
+        conn = make_conn(created=True)
+        
+        result = await upsert_document("a.md", "text", [chunk("alpha", 0, [0.1])], conn=conn)
+        
+        conn.fetch.assert_not_awaited()
+        assert result["created"] and result["chunks_inserted"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_collection_is_stored_on_document_and_chunks(self):
+        """Test the document and its new chunks are written to the given collection."""
+        conn = make_conn(created=True)
+        
+        await upsert_document("a.md", "text", [chunk("alpha", 0, [0.1])], collection="acme", conn=conn)
+        
+        assert conn.fetchrow.await_args.args[-1] == "acme"
+        inserts = conn.executemany.await_args_list[-1].args[1]
+        assert inserts[0][-1] == "acme"
+    
+    @pytest.mark.asyncio
+    async def test_new_content_requires_embedding(self):
+        """Test a chunk that is neither stored nor embedded is rejected."""
+        conn = make_conn(stored=[("c-a", "alpha")])
+        
+        with pytest.raises(ValueError, match="no embedding"):
+            await upsert_document("a.md", "text", [chunk("changed", 0)], conn=conn)
+        conn.executemany.assert_not_awaited()
+
+
+class TestDeleteAndConstraint:
+    """Test deleting by source and adding the unique (collection, source) constraint."""
+    
+    @pytest.mark.asyncio
+    async def test_delete_document_returns_deleted_id(self):
+        """Test delete_document reports the deleted document."""
+        conn = make_conn()
+        conn.fetchval.return_value = "doc-1"
+        
+        assert await delete_document("a.md", "acme", conn=conn) == "doc-1"
+        assert conn.fetchval.await_args.args[1:] == ("acme", "a.md")
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_sources_block_the_constraint(self):
+        """Test the constraint is not added while sources have several documents."""
+        conn = make_conn()
+        conn.fetchval.side_effect = [False, 2]
+        
+        with pytest.raises(RuntimeError, match="2 sources"):
+            await ensure_unique_sources(conn)
+        conn.execute.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_constraint_added_once(self):
+        """Test collections and the constraint are added when missing and left alone when present."""
+        conn = make_conn()
+        conn.fetchval.side_effect = [False, 0, True]
+        
+        await ensure_unique_sources(conn)
+        await ensure_unique_sources(conn)
+        
+        conn.execute.assert_awaited_once()
+        assert "UNIQUE (collection, source)" in conn.execute.await_args.args[0]
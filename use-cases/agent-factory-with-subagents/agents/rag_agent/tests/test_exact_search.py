@@ -0,0 +1,135 @@
+"""Test exact brute-force search index."""
+
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from ..exact_search import ExactSearchIndex, recall_at_k
+from ..tools import semantic_search, SearchResult
+
+
+def make_index(rows: int = 100, dimension: int = 16, seed: int = 0) -> ExactSearchIndex:
+    """Create an index over random unit vectors."""
+    rng = np.random.default_rng(seed)
+    matrix = rng.standard_normal((rows, dimension)).astype(np.float32)
+    return ExactSearchIndex(
+        [f"chunk_{i}" for i in range(rows)],
+        ExactSearchIndex._normalize(matrix)
+    )
+
+
+class TestExactSearchIndex:
+    """Test ExactSearchIndex search and re-ranking."""
+
+    def test_search_returns_nearest_first(self):
+        """Test a stored vector is its own nearest neighbour."""
+        index = make_index()
+
+        results = index.search(index.matrix[42], match_count=5)
+
+        assert len(results) == 5
+        assert results[0][0] == "chunk_42"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_matches_full_sort(self):
+        """Test argpartition top-k equals a full sort."""
+        index = make_index(rows=500)
+        query = np.random.default_rng(1).standard_normal(index.dimension)
+
+        results = index.search(query, match_count=10)
+
+        scores = index.matrix @ (query / np.linalg.norm(query))
+        expected = [f"chunk_{i}" for i in np.argsort(-scores)[:10]]
+        assert [chunk_id for chunk_id, _ in results] == expected
+
+    def test_search_count_larger_than_index(self):
+        """Test match_count above index size returns everything."""
+        index = make_index(rows=3)
+
+        assert len(index.search(index.matrix[0], match_count=10)) == 3
+
+    def test_search_rejects_wrong_dimension(self):
+        """Test query dimension is validated."""
+        index = make_index(dimension=16)
+
+        with pytest.raises(ValueError, match="16 dimensions"):
+            index.search([0.1] * 8)
+
+    def test_rerank_orders_candidates(self):
+        """Test re-ranking sorts candidates and drops unknown ids."""
+        index = make_index()
+
+        results = index.rerank(index.matrix[7], ["chunk_3", "chunk_7", "missing"], match_count=2)
+
+        assert [chunk_id for chunk_id, _ in results][0] == "chunk_7"
+        assert len(results) == 2
+
+    def test_save_and_load_memory_maps(self, tmp_path):
+        """Test saved index loads memory-mapped with identical results."""
+        index = make_index()
+        path = str(tmp_path / "exact")
+
+        index.save(path)
+        loaded = ExactSearchIndex.load(path)
+
+        assert isinstance(loaded.matrix, np.memmap)
+        assert loaded.search(index.matrix[5], 5) == index.search(index.matrix[5], 5)
+
+    @pytest.mark.asyncio
+    async def test_stale_cache_is_rebuilt(self, tmp_path):
+        """Test the cache is reused while the fingerprint matches and rebuilt once it changes."""
+        path = str(tmp_path / "exact")
+        conn = AsyncMock()
+        conn.fetchval.return_value = "100:2024-01-01"
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = conn
+        build = AsyncMock(side_effect=[make_index(rows=100), make_index(rows=101)])
+
+        with patch.object(ExactSearchIndex, "build", build):
+            first = await ExactSearchIndex.load_or_build(pool, path)
+            cached = await ExactSearchIndex.load_or_build(pool, path)
+            conn.fetchval.return_value = "101:2024-01-02"
+            rebuilt = await ExactSearchIndex.load_or_build(pool, path)
+
+        assert build.await_count == 2
+        assert len(first) == len(cached) == 100
+        assert len(rebuilt) == 101
+
+    def test_recall_at_k(self):
+        """Test recall computation."""
+        assert recall_at_k(["a", "b", "x"], ["a", "b", "c"]) == pytest.approx(2 / 3)
+        assert recall_at_k([], []) == 1.0
+
+
+class TestExactSemanticSearch:
+    """Test semantic_search with the exact backend."""
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_uses_exact_index(self, test_dependencies, make_run_context):
+        """Test semantic search ranks with the index and fetches rows by id."""
+        deps, connection = test_dependencies
+        deps.exact_index = ExactSearchIndex(
+            ["chunk_1", "chunk_2"],
+            ExactSearchIndex._normalize(np.eye(2, 1536, dtype=np.float32))
+        )
+        connection.fetch.return_value = [
+            {
+                'chunk_id': chunk_id,
+                'document_id': 'doc_1',
+                'content': 'content',
+                'metadata': {},
+                'document_title': 'Title',
+                'document_source': 'source.md'
+            }
+            for chunk_id in ("chunk_2", "chunk_1")
+        ]
+
+        ctx = make_run_context(deps)
+        results = await semantic_search(ctx, "Python programming", match_count=2)
+
+        assert [r.chunk_id for r in results] == ["chunk_1", "chunk_2"]
+        assert isinstance(results[0], SearchResult)
+        args = connection.fetch.call_args[0]
+        assert "ANY($1::uuid[])" in args[0]
@@ -0,0 +1,92 @@
+"""Test conversation history compaction."""
+
+from ..history import ConversationHistory, shorten, summarize_turn
+from ..streaming import build_prompt
+
+
+class TestShorten:
+    """Test word-boundary truncation."""
+
+    def test_short_text_unchanged(self):
+        """Test text under the cap is only whitespace-normalized."""
+        assert shorten("what  is\nRAG?", 10) == "what is RAG?"
+
+    def test_long_text_cut_at_word(self):
+        """Test long text is cut at a word boundary with a marker."""
+        result = shorten("word " * 100, 5)
+
+        assert result.endswith("...")
+        assert len(result) <= 5 * 4 + 3
+        assert "wor..." not in result
+
+
+class TestConversationHistory:
+    """Test rolling summary plus recent turns."""
+
+    def test_recent_turns_verbatim(self):
+        """Test turns within the window render as User/Assistant lines."""
+        history = ConversationHistory(recent_turns=3)
+        history.add_turn("What is RAG?", "Retrieval augmented generation.")
+
+        assert history.render() == "User: What is RAG?\nAssistant: Retrieval augmented generation."
+
+    def test_old_turns_summarized(self):
+        """Test turns leaving the window are summarized once."""
+        calls = []
+
+        def summarizer(user, assistant):
+            calls.append(user)
+            return summarize_turn(user, assistant)
+
+        history = ConversationHistory(recent_turns=2, summarizer=summarizer)
+        for i in range(5):
+            history.add_turn(f"question {i}", f"Answer {i}. More detail follows here.")
+
+        rendered = history.render()
+        assert calls == ["question 0", "question 1", "question 2"]
+        assert "- User asked: question 0 | Answer: Answer 0." in rendered
+        assert "More detail" not in rendered.split("User: question 3")[0]
+        assert rendered.endswith("User: question 4\nAssistant: Answer 4. More detail follows here.")
+        assert len(history) == 5
+
+    def test_size_stays_bounded(self):
+        """Test rendered history stops growing with session length."""
+        history = ConversationHistory(token_budget=400, recent_turns=3, max_turn_tokens=100, summary_tokens=150)
+        sizes = []
+        for i in range(200):
+            history.add_turn(f"Tell me about topic number {i} in detail", "Long answer. " * 200)
+            sizes.append(history.token_count())
+
+        assert max(sizes) <= 400 + 150
+        assert sizes[-1] == sizes[-50]
+        assert history.dropped_turns > 0
+        assert "earlier turns omitted" in history.render()
+
+    def test_long_turns_capped(self):
+        """Test a single huge answer is truncated."""
+        history = ConversationHistory(max_turn_tokens=50)
+        history.add_turn("q", "x " * 10000)
+
+        assert history.token_count() < 60
+
+    def test_render_cached(self):
+        """Test rendering is reused until the next turn."""
+        history = ConversationHistory()
+        history.add_turn("q", "a")
+
+        assert history.render() is history.render()
+
+
+class TestBuildPrompt:
+    """Test prompt construction from history."""
+
+    def test_includes_history_and_message(self):
+        """Test the prompt holds the rendered history then the new message."""
+        history = ConversationHistory()
+        history.add_turn("What is RAG?", "Retrieval augmented generation.")
+
+        prompt = build_prompt("How does it work?", history)
+
+        assert "User: What is RAG?" in prompt
+        assert prompt.index("Retrieval augmented generation.") < prompt.index("User: How does it work?")
+        assert prompt.count("How does it work?") == 1
@@ -0,0 +1,67 @@
+"""Test shared HTTP transport."""
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from ..utils import http_client
+from ..utils.http_client import create_http_client, get_http_client, close_http_client
+from .. import providers
+from ..providers import get_llm_model
+
+
+class TestHttpClient:
+    """Test HTTP client configuration and sharing."""
+    
+    @pytest.mark.asyncio
+    async def test_limits_and_timeouts(self):
+        """Test pool limits and timeouts are applied."""
+        client = create_http_client(
+            http2=False,
+            timeout=5,
+            connect_timeout=2,
+            max_connections=7,
+            max_keepalive_connections=3
+        )
+        
+        assert client.timeout == httpx.Timeout(5, connect=2)
+        pool = client._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_without_h2(self):
+        """Test HTTP/2 is disabled rather than failing when h2 is missing."""
+        with patch.object(http_client, 'http2_available', return_value=False):
+            client = create_http_client(http2=True)
+        
+        assert client._transport._pool._http2 is False
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_shared_until_closed(self):
+        """Test one client is reused and recreated after close."""
+        first = get_http_client()
+        assert get_http_client() is first
+        
+        await close_http_client()
+        
+        assert first.is_closed
+        second = get_http_client()
+        assert second is not first
+        await close_http_client()
+    
+    @pytest.mark.asyncio
+    async def test_llm_model_rebuilt_after_transport_closed(self, test_settings):
+        """Test the LLM model is reused while the transport is open and rebuilt after it closes."""
+        with patch.object(providers, 'load_settings', return_value=test_settings):
+            first = get_llm_model()
+            assert get_llm_model() is first
+            
+            await close_http_client()
+            second = get_llm_model()
+        
+        assert second is not first
+        assert second.client._client is get_http_client()
+        await close_http_client()
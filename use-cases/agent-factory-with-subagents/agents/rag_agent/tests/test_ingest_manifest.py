@@ -0,0 +1,116 @@
+"""Test resumable ingestion with the run manifest."""
+
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from ..ingestion import ingest
+from ..ingestion.ingest import DocumentIngestionPipeline
+from ..ingestion.manifest import ManifestEntry
+from ..utils.models import IngestionConfig, IngestionResult
+
+
+@pytest.fixture
+def documents(tmp_path):
+    """Three small markdown files."""
+    for name in ("a.md", "b.md", "c.md"):
+        (tmp_path / name).write_text(f"# {name}\n\nContent of {name}.\n", encoding="utf-8")
+    return tmp_path
+
+
+def make_pipeline(folder, resume=True):
+    """Pipeline over folder with database access patched out."""
+    pipeline = DocumentIngestionPipeline(
+        config=IngestionConfig(use_semantic_chunking=False),
+        documents_folder=str(folder),
+        resume=resume
+    )
+    pipeline._initialized = True
+    return pipeline
+
+
+@asynccontextmanager
+async def fake_acquire():
+    yield AsyncMock()
+
+
+class TestManifestEntry:
+    """Test deciding whether a file is already ingested."""
+    
+    def test_current_requires_completed_matching_document(self):
+        """Test only completed entries with the same hash and a document are current."""
+        entry = ManifestEntry(source="a.md", content_hash="h1", status="completed", document_id="doc-1")
+        
+        assert entry.is_current("h1")
+        assert not entry.is_current("h2")
+        assert not ManifestEntry("a.md", "h1", "failed", "doc-1").is_current("h1")
+        # The document was deleted after ingestion
+        assert not ManifestEntry("a.md", "h1", "completed", None).is_current("h1")
+
+
+class TestResume:
+    """Test --resume skips completed files and retries the rest."""
+    
+    @pytest.mark.asyncio
+    async def test_resume_skips_unchanged_files(self, documents):
+        """Test completed, unchanged files are skipped; changed and failed ones are ingested."""
+        manifest = {
+            "a.md": ManifestEntry("a.md", hashlib.sha256((documents / "a.md").read_bytes()).hexdigest(), "completed", "doc-a"),
+            "b.md": ManifestEntry("b.md", "stale-hash", "completed", "doc-b"),
+            "c.md": ManifestEntry("c.md", hashlib.sha256((documents / "c.md").read_bytes()).hexdigest(), "failed", None)
+        }
+        pipeline = make_pipeline(documents)
+        ingested = []
+        
+        async def ingest_single(file_path, document=None, source=None, scanned=None):
+            ingested.append((source, document.content_hash))
+            return IngestionResult(
+                document_id="new", title=file_path, chunks_created=1, entities_extracted=0,
+                relationships_created=0, processing_time_ms=1.0, errors=[]
+            )
+        
+        with patch.object(ingest, "db_pool", SimpleNamespace(acquire=fake_acquire)), \
+             patch.object(ingest, "ensure_manifest_table", AsyncMock()), \
+             patch.object(ingest, "load_manifest", AsyncMock(return_value=manifest)), \
+             patch.object(pipeline, "_ingest_single_document", ingest_single):
+            results = await pipeline.ingest_documents()
+        
+        assert [source for source, _ in ingested] == ["b.md", "c.md"]
+        assert ingested[0][1] == hashlib.sha256((documents / "b.md").read_bytes()).hexdigest()
+        assert len(results) == 2
+        assert pipeline.skipped == ["a.md"]
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_stat_skips_reading(self, documents):
+        """Test a file with the recorded size and mtime is skipped without reading it."""
+        path = str(documents / "a.md")
+        stat = os.stat(path)
+        previous = ManifestEntry(
+            "a.md", "h", "completed", "doc-a", file_size=stat.st_size, mtime_ns=stat.st_mtime_ns
+        )
+        pipeline = make_pipeline(documents)
+        
+        with patch.object(pipeline.loader, "load") as read:
+            assert await pipeline.ingest_file(path, "a.md", previous) is None
+        read.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded(self, documents):
+        """Test a file that raises is recorded as failed for the next run."""
+        pipeline = make_pipeline(documents, resume=False)
+        record_failed = AsyncMock()
+        
+        with patch.object(ingest, "db_pool", SimpleNamespace(acquire=fake_acquire)), \
+             patch.object(ingest, "ensure_manifest_table", AsyncMock()), \
+             patch.object(ingest, "record_failed", record_failed), \
+             patch.object(pipeline, "_ingest_single_document", AsyncMock(side_effect=RuntimeError("boom"))):
+            results = await pipeline.ingest_documents()
+        
+        assert len(results) == 3
+        assert all(r.errors == ["boom"] for r in results)
+        sources = [call.args[1] for call in record_failed.await_args_list]
+        assert sources == ["a.md", "b.md", "c.md"]
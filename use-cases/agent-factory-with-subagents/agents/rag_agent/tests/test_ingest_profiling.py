@@ -0,0 +1,96 @@
+"""Test the ingestion profiling helpers."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from ..ingestion.embedder import EmbeddingGenerator
+from ..ingestion.profiling import format_stage_report, peak_rss_mb, with_search_path
+from ..utils import db_utils
+
+
+class TestSearchPath:
+    """Test pointing connection URLs at a throwaway schema."""
+    
+    def test_appends_search_path(self):
+        """Test the schema is searched before public."""
+        url = with_search_path("postgresql://user@localhost/rag", "bench_run")
+        
+        assert url == "postgresql://user@localhost/rag?search_path=bench_run%2Cpublic"
+    
+    def test_replaces_existing_search_path(self):
+        """Test an existing search_path is replaced and other parameters kept."""
+        url = with_search_path("postgresql://localhost/rag?sslmode=disable&search_path=old", "new")
+        
+        assert "sslmode=disable" in url
+        assert "old" not in url
+        assert url.endswith("search_path=new%2Cpublic")
+    
+    @pytest.mark.parametrize("schema", ["Bench", "1bench", "bench; DROP TABLE chunks", ""])
+    def test_rejects_unsafe_names(self, schema):
+        """Test schema names that would need quoting are rejected."""
+        with pytest.raises(ValueError):
+            with_search_path("postgresql://localhost/rag", schema)
+
+
+class TestStageReport:
+    """Test the --profile report."""
+    
+    def test_report_shares_and_throughput(self):
+        """Test stage shares add up and embedding throughput is per chunk."""
+        stages = {
+            "ingest.read": {'total_ms': 100.0, 'mean_ms': 10.0, 'p95_ms': 12.0},
+            "ingest.embed": {'total_ms': 600.0, 'mean_ms': 60.0, 'p95_ms': 80.0},
+            "ingest.write": {'total_ms': 300.0, 'mean_ms': 30.0, 'p95_ms': 40.0},
+            "db.query": {'total_ms': 999.0, 'mean_ms': 1.0, 'p95_ms': 1.0}
+        }
+        
+        report = format_stage_report(stages, documents=10, chunks=120, elapsed=1.25, peak_rss=64.0)
+        rows = {line.split()[0]: line for line in report.splitlines() if line}
+        
+        assert "60.0%" in rows["embed"]
+        assert "200.0 chunks/s" in rows["embed"]
+        assert "100.0 docs/s" in rows["read"]
+        assert "chunk" not in rows
+        assert "db.query" not in report
+        assert "8.00 docs/s, 96.00 chunks/s" in report
+        assert "Peak RSS: 64.0 MB" in report
+    
+    def test_peak_rss_reported(self):
+        """Test peak RSS is available on this platform."""
+        assert peak_rss_mb() > 0
+
+
+class TestProfilingHooks:
+    """Test the pipeline hooks used by profile runs."""
+    
+    @pytest.mark.asyncio
+    async def test_embedder_uses_injected_client(self):
+        """Test an injected client replaces the module-level one."""
+        client = MagicMock()
+        client.embeddings.create = AsyncMock(return_value=SimpleNamespace(
+            data=[SimpleNamespace(embedding=[0.1, 0.2])]
+        ))
+        embedder = EmbeddingGenerator(client=client)
+        
+        assert await embedder.generate_embedding("hello") == [0.1, 0.2]
+        client.embeddings.create.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_apply_schema_can_skip_drops(self):
+        """Test drop_existing=False leaves tables outside the schema alone."""
+        conn = AsyncMock()
+        
+        @asynccontextmanager
+        async def acquire():
+            yield conn
+        
+        with patch.object(db_utils, "db_pool", SimpleNamespace(acquire=acquire)):
+            await db_utils.apply_schema(8, drop_existing=False)
+        sql = conn.execute.await_args.args[0]
+        
+        assert "DROP " not in sql
+        assert "CREATE TABLE documents" in sql
+        assert "vector(8)" in sql
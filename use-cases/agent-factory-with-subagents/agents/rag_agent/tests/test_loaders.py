@@ -0,0 +1,195 @@
+"""Test document loaders for PDF, HTML and DOCX files."""
+
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from ..ingestion import loaders
+from ..ingestion.loaders import (
+    DocumentLoader, FormatLoader, extract_docx, extract_file, extract_html, get_loader, supported_patterns
+)
+
+HTML = """<!DOCTYPE html>
+<html><head><title>Page title</title><meta charset="utf-8"><style>body { color: red }</style></head>
+<body>
+<nav>Home</nav>
+<h1>Install guide</h1>
+<p>Run the <b>installer</b>
+  and follow the prompts.</p>
+<ul><li>First step</li><li>Second step</li></ul>
+<table><tr><th>Option</th><th>Default</th></tr><tr><td>port</td><td>8080</td></tr></table>
+<pre>pip install
+  package</pre>
+<script>console.log("ignored")</script>
+</body></html>
+"""
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def write_docx(path, body, title=None):
+    """Minimal .docx with the given document.xml body."""
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f'<w:document {_W}><w:body>{body}</w:body></w:document>')
+        if title:
+            archive.writestr("docProps/core.xml", (
+                '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+                f'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>{title}</dc:title><dc:creator>Ada</dc:creator>'
+                '</cp:coreProperties>'
+            ))
+
+
+def paragraph(text, style=None, numbered=False):
+    properties = ""
+    if style or numbered:
+        properties = "<w:pPr>"
+        properties += f'<w:pStyle w:val="{style}"/>' if style else ""
+        properties += '<w:numPr><w:numId w:val="1"/></w:numPr>' if numbered else ""
+        properties += "</w:pPr>"
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+class TestRegistry:
+    """Test finding the loader for a file."""
+    
+    def test_lookup_by_extension_and_mime_type(self):
+        """Test extensions are case-insensitive, text files have no loader and MIME types are a fallback."""
+        assert get_loader("docs/Guide.HTML").name == "html"
+        assert get_loader("report.docx").name == "docx"
+        assert get_loader("notes.md") is None
+        assert get_loader("image.png") is None
+        # No extension registered, but mimetypes maps .shtml to text/html
+        assert get_loader("index.shtml").name == "html"
+    
+    def test_registered_formats_are_scanned_by_default(self, monkeypatch):
+        """Test default scan patterns include available formats only."""
+        monkeypatch.setattr(loaders, "_BY_EXTENSION", dict(loaders._BY_EXTENSION))
+        loaders.register_loader(FormatLoader("rtf", extract_html, (".rtf",), available=False))
+        
+        patterns = supported_patterns()
+        
+        assert patterns[:3] == ("*.md", "*.markdown", "*.txt")
+        assert "*.html" in patterns and "*.docx" in patterns
+        assert "*.rtf" not in patterns
+        assert ("*.pdf" in patterns) == (loaders.PdfReader is not None)
+
+
+class TestExtractors:
+    """Test text and structure extraction."""
+    
+    def test_html_structure(self):
+        """Test headings, lists, tables and code survive and scripts, styles and head do not."""
+        extracted = extract_html(HTML.encode("utf-8"))
+        
+        assert extracted.title == "Page title"
+        assert extracted.content.split("\n\n") == [
+            "Home",
+            "# Install guide",
+            "Run the installer and follow the prompts.",
+            "- First step",
+            "- Second step",
+            "Option | Default",
+            "port | 8080",
+            "```\npip install\n  package\n```"
+        ]
+    
+    def test_html_declared_charset(self):
+        """Test a declared charset is used for bytes that are not UTF-8."""
+        page = '<html><head><meta charset="windows-1252"></head><body><p>café</p></body></html>'
+        
+        extracted = extract_html(page.encode("cp1252"))
+        
+        assert extracted.content == "café"
+        assert extracted.encoding == "cp1252"
+    
+    def test_docx_structure(self, tmp_path):
+        """Test heading styles, numbered paragraphs, tables and core properties."""
+        path = tmp_path / "report.docx"
+        table = (
+            "<w:tbl><w:tr><w:tc>" + paragraph("Region") + "</w:tc><w:tc>" + paragraph("Sales") + "</w:tc></w:tr>"
+            "<w:tr><w:tc>" + paragraph("EU") + "</w:tc><w:tc>" + paragraph("12") + "</w:tc></w:tr></w:tbl>"
+        )
+        write_docx(path, (
+            paragraph("Quarterly report", style="Title")
+            + paragraph("Summary", style="Heading2")
+            + paragraph("Revenue grew.")
+            + paragraph("New markets", numbered=True)
+            + table
+        ), title="Q3")
+        
+        extracted = extract_docx(path.read_bytes())
+        
+        assert extracted.content.split("\n\n") == [
+            "# Quarterly report", "## Summary", "Revenue grew.", "- New markets", "Region | Sales", "EU | 12"
+        ]
+        assert extracted.title == "Q3"
+        assert extracted.properties == {"author": "Ada"}
+    
+    def test_pdf_requires_pypdf(self, monkeypatch):
+        """Test PDFs fail with a clear error when pypdf is missing."""
+        monkeypatch.setattr(loaders, "PdfReader", None)
+        
+        with pytest.raises(RuntimeError, match="pypdf"):
+            loaders.extract_pdf(b"%PDF-1.4")
+
+
+class TestExtractFile:
+    """Test extraction results and their cache."""
+    
+    def test_document_fields(self, tmp_path):
+        """Test the hash matches the manifest's and the title comes from the first heading."""
+        path = tmp_path / "page.html"
+        path.write_text(HTML, encoding="utf-8")
+        
+        document = extract_file(str(path), get_loader(str(path)))
+        
+        assert document.content_hash == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert document.format == "html"
+        assert document.title == "Install guide"
+        assert document.word_count == len(document.content.split())
+    
+    def test_cached_by_content_hash(self, tmp_path):
+        """Test a second extraction of the same bytes is served from the cache, even under another name."""
+        cache = tmp_path / "cache"
+        first, second = tmp_path / "a.html", tmp_path / "b.html"
+        first.write_text(HTML, encoding="utf-8")
+        second.write_text(HTML, encoding="utf-8")
+        calls = []
+        
+        def counting_extract(data):
+            calls.append(data)
+            return extract_html(data)
+        
+        loader = FormatLoader("html", counting_extract, (".html",))
+        before = extract_file(str(first), loader, str(cache))
+        after = extract_file(str(second), loader, str(cache))
+        
+        assert len(calls) == 1
+        assert after.content == before.content and after.title == before.title
+        assert len(os.listdir(cache)) == 1
+
+
+class TestDocumentLoader:
+    """Test loading through worker processes."""
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_in_worker_processes(self, tmp_path):
+        """Test prefetched HTML is extracted by the pool and text files are read directly."""
+        (tmp_path / "page.html").write_text(HTML, encoding="utf-8")
+        (tmp_path / "notes.md").write_text("# Notes\n", encoding="utf-8")
+        paths = [str(tmp_path / "page.html"), str(tmp_path / "notes.md")]
+        loader = DocumentLoader(workers=2)
+        try:
+            loader.prefetch(paths)
+            assert list(loader._pending) == [paths[0]]
+            
+            page = await loader.load(paths[0])
+            notes = await loader.load(paths[1])
+        finally:
+            loader.close()
+        
+        assert page.title == "Install guide" and page.format == "html"
+        assert notes.title == "Notes" and notes.format == "text"
+        assert loader._pending == {}
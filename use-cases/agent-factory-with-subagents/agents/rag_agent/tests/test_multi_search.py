@@ -0,0 +1,52 @@
+"""Test parallel multi-query search tool."""
+
+import pytest
+from unittest.mock import MagicMock
+
+from ..tools import multi_search, _fuse_results
+
+
+class TestFuseResults:
+    """Test reciprocal rank fusion of sub-query results."""
+    
+    def test_shared_results_rank_first(self, make_search_row):
+        """Test chunks found by several sub-queries are boosted and deduplicated."""
+        fused = _fuse_results(
+            ["openai", "anthropic"],
+            [
+                [make_search_row("a", 0.9), make_search_row("shared", 0.5)],
+                [make_search_row("b", 0.8), make_search_row("shared", 0.7)]
+            ],
+            match_count=10
+        )
+        
+        assert [r['chunk_id'] for r in fused][0] == "shared"
+        assert len(fused) == 3
+        assert fused[0]['matched_queries'] == ["openai", "anthropic"]
+        assert fused[0]['combined_score'] == 0.7
+    
+    def test_truncates_to_match_count(self, make_search_row):
+        """Test fused output respects match_count."""
+        fused = _fuse_results(["q"], [[make_search_row(str(i), 0.5) for i in range(5)]], match_count=2)
+        
+        assert len(fused) == 2
+
+
+class TestMultiSearch:
+    """Test multi_search tool."""
+    
+    @pytest.mark.asyncio
+    async def test_batches_embeddings_and_runs_each_query(self, test_dependencies, make_run_context, make_search_row):
+        """Test one embeddings request and one search per unique sub-query."""
+        deps, connection = test_dependencies
+        deps.openai_client.embeddings.create.return_value.data = [MagicMock(embedding=[0.1] * 1536)] * 2
+        connection.fetch.return_value = [make_search_row("a", 0.9)]
+        
+        ctx = make_run_context(deps)
+        results = await multi_search(ctx, ["OpenAI funding", "Anthropic funding", "OpenAI funding", " "])
+        
+        deps.openai_client.embeddings.create.assert_called_once()
+        assert deps.openai_client.embeddings.create.call_args[1]['input'] == ["OpenAI funding", "Anthropic funding"]
+        assert connection.fetch.call_count == 2
+        assert len(results) == 1
+        assert results[0]['matched_queries'] == ["OpenAI funding", "Anthropic funding"]
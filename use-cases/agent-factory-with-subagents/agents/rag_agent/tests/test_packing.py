@@ -0,0 +1,121 @@
+"""Test token-budgeted result packing."""
+
+import pytest
+
+from ..packing import pack_results, truncate_around_match, estimate_tokens
+from ..tools import hybrid_search, SearchResult
+
+
+class TestPackResults:
+    """Test pack_results."""
+
+    def test_strips_metadata(self, make_search_row):
+        """Test packed passages keep only what the model needs."""
+        packed = pack_results([make_search_row("a", 0.9, content="Some content")], "content", token_budget=1000)
+
+        assert packed == [{
+            'document_title': 'Title',
+            'document_source': 'source.md',
+            'content': 'Some content',
+            'score': 0.9
+        }]
+
+    def test_fills_budget_by_score(self, make_search_row):
+        """Test highest scores are packed first and the budget is respected."""
+        results = [make_search_row(str(i), i / 10, content=f"{i} " + "x" * 400, document_id=str(i)) for i in range(5)]
+
+        packed = pack_results(results, "query", token_budget=220)
+
+        assert [p['score'] for p in packed] == [0.4, 0.3]
+        assert sum(estimate_tokens(p['content']) for p in packed) <= 220
+
+    def test_merges_overlapping_chunks(self, make_search_row):
+        """Test chunker overlap between chunks of one document is removed."""
+        overlap = "shared overlap text that both chunks contain in full "
+        first = make_search_row("a", 0.8, content="Beginning of the section. " + overlap)
+        second = make_search_row("b", 0.9, content=overlap + "and the rest of the section.")
+
+        packed = pack_results([first, second], "section", token_budget=1000)
+
+        assert len(packed) == 1
+        assert packed[0]['content'].count(overlap) == 1
+        assert packed[0]['content'].endswith("rest of the section.")
+        assert packed[0]['score'] == 0.9
+
+    def test_keeps_chunks_from_other_documents(self, make_search_row):
+        """Test identical text in different documents is not merged."""
+        packed = pack_results(
+            [
+                make_search_row("a", 0.9, content="same text", document_id="doc_1"),
+                make_search_row("b", 0.8, content="same text", document_id="doc_2")
+            ],
+            "text",
+            token_budget=1000
+        )
+
+        assert len(packed) == 2
+
+    def test_caps_each_result(self, make_search_row):
+        """Test long passages are truncated to max_tokens_per_result."""
+        packed = pack_results([make_search_row("a", 0.9, content="word " * 500)], "word", 1000, max_tokens_per_result=50)
+
+        assert estimate_tokens(packed[0]['content']) <= 52
+
+    def test_accepts_search_result_models(self):
+        """Test semantic SearchResult objects are packed by similarity."""
+        results = [
+            SearchResult(
+                chunk_id=str(i), document_id=str(i), content=f"content {i}", similarity=i / 10,
+                metadata={}, document_title="T", document_source="s.md"
+            )
+            for i in range(3)
+        ]
+
+        packed = pack_results(results, "content", token_budget=1000)
+
+        assert [p['content'] for p in packed] == ["content 2", "content 1", "content 0"]
+
+
+class TestTruncateAroundMatch:
+    """Test query-centred truncation."""
+
+    def test_keeps_matching_span(self):
+        """Test the window contains the query terms."""
+        text = "filler " * 200 + "the pgvector index answer " + "filler " * 200
+
+        window = truncate_around_match(text, "pgvector index", max_chars=100)
+
+        assert "pgvector index" in window
+        assert window.startswith("...") and window.endswith("...")
+        assert len(window) <= 106
+
+    def test_short_text_unchanged(self):
+        """Test text within the limit is returned as is."""
+        assert truncate_around_match("short", "query", 100) == "short"
+
+    def test_no_match_keeps_start(self):
+        """Test text without query terms keeps its beginning."""
+        window = truncate_around_match("alpha beta gamma delta " * 20, "zeta", 30)
+
+        assert window.startswith("alpha")
+
+
+class TestPackedSearch:
+    """Test search tools with a token budget."""
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_packs_output(self, test_dependencies, make_run_context, make_search_row):
+        """Test hybrid search output is packed when a budget is configured."""
+        deps, connection = test_dependencies
+        deps.settings.result_token_budget = 1000
+        connection.fetch.return_value = [make_search_row("a", 0.9, content="Python content")]
+
+        ctx = make_run_context(deps)
+        results = await hybrid_search(ctx, "python")
+
+        assert results == [{
+            'document_title': 'Title',
+            'document_source': 'source.md',
+            'content': 'Python content',
+            'score': 0.9
+        }]
@@ -0,0 +1,122 @@
+"""Test speculative search prefetch."""
+
+import asyncio
+import pytest
+
+from ..prefetch import PrefetchedSearch, query_similarity
+from ..tools import hybrid_search, start_prefetch, cancel_prefetch
+from ..utils.telemetry import recorder
+
+
+class TestQuerySimilarity:
+    """Test keyword overlap between queries."""
+    
+    def test_ignores_stopwords_and_case(self):
+        """Test conversational filler does not affect similarity."""
+        assert query_similarity("Can you tell me what RAG is?", "rag") == 1.0
+    
+    def test_different_topics(self):
+        """Test unrelated queries score low."""
+        assert query_similarity("OpenAI funding rounds", "Anthropic safety research") == 0.0
+
+
+class TestPrefetchedSearch:
+    """Test prefetch matching and consumption."""
+    
+    @pytest.mark.asyncio
+    async def test_matches_compatible_requests(self):
+        """Test only similar queries with compatible parameters match."""
+        prefetch = PrefetchedSearch("OpenAI funding", 10, 0.3, asyncio.sleep(0, result=[]))
+        
+        assert prefetch.matches("openai funding history", 5, 0.3, threshold=0.5)
+        assert not prefetch.matches("openai funding", 20, 0.3, threshold=0.5)
+        assert not prefetch.matches("openai funding", 5, 0.8, threshold=0.5)
+        assert not prefetch.matches("microsoft revenue", 5, 0.3, threshold=0.5)
+        await prefetch.take(5)
+    
+    @pytest.mark.asyncio
+    async def test_failed_prefetch_returns_none(self):
+        """Test a failed search falls back instead of raising."""
+        async def failing():
+            raise RuntimeError("database unavailable")
+        
+        prefetch = PrefetchedSearch("query", 10, 0.3, failing())
+        
+        assert await prefetch.take(5) is None
+
+
+class TestHybridSearchPrefetch:
+    """Test hybrid_search serving prefetched results."""
+    
+    @pytest.mark.asyncio
+    async def test_similar_query_uses_prefetch(self, test_dependencies, make_run_context, make_search_row):
+        """Test a similar tool query is served without another search."""
+        deps, connection = test_dependencies
+        deps.settings.search_prefetch = True
+        connection.fetch.return_value = [make_search_row(str(i), 1 - i / 20) for i in range(10)]
+        
+        start_prefetch(deps, "What are OpenAI's funding sources?")
+        await asyncio.sleep(0.01)
+        assert connection.fetch.call_count == 1
+        
+        results = await hybrid_search(make_run_context(deps), "OpenAI funding sources", match_count=3)
+        
+        assert connection.fetch.call_count == 1
+        assert deps.openai_client.embeddings.create.call_count == 1
+        assert [r['chunk_id'] for r in results] == ["0", "1", "2"]
+        assert deps.prefetch.hits == 1
+    
+    @pytest.mark.asyncio
+    async def test_dissimilar_query_searches_again(self, test_dependencies, make_run_context, make_search_row):
+        """Test an unrelated tool query runs its own search."""
+        deps, connection = test_dependencies
+        deps.settings.search_prefetch = True
+        connection.fetch.return_value = [make_search_row("a", 0.9)]
+        
+        start_prefetch(deps, "What are OpenAI's funding sources?")
+        await asyncio.sleep(0.01)
+        await hybrid_search(make_run_context(deps), "Microsoft cloud revenue")
+        
+        assert connection.fetch.call_count == 2
+        assert deps.prefetch.hits == 0
+    
+    @pytest.mark.asyncio
+    async def test_filtered_query_skips_prefetch(self, test_dependencies, make_run_context, make_search_row):
+        """Test filtered searches never use the unfiltered prefetch."""
+        deps, connection = test_dependencies
+        deps.settings.search_prefetch = True
+        connection.fetch.return_value = [make_search_row("a", 0.9)]
+        
+        start_prefetch(deps, "OpenAI funding")
+        await asyncio.sleep(0.01)
+        await hybrid_search(make_run_context(deps), "OpenAI funding", filters={"source": "*.md"})
+        
+        assert connection.fetch.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_hit_rate_is_counted(self, test_dependencies, make_run_context, make_search_row):
+        """Test each dropped prefetch is counted as a hit or a miss."""
+        deps, connection = test_dependencies
+        deps.settings.search_prefetch = True
+        connection.fetch.return_value = [make_search_row("a", 0.9)]
+        recorder.reset()
+        
+        start_prefetch(deps, "OpenAI funding")
+        await hybrid_search(make_run_context(deps), "OpenAI funding")
+        cancel_prefetch(deps)
+        start_prefetch(deps, "OpenAI funding")
+        cancel_prefetch(deps)
+        
+        assert recorder.counters == {"prefetch.hit": 1, "prefetch.miss": 1}
+        assert 'rag_events_total{event="prefetch.hit"} 1' in recorder.render_prometheus()
+        recorder.reset()
+    
+    @pytest.mark.asyncio
+    async def test_disabled(self, test_dependencies):
+        """Test no prefetch starts when disabled, as it is by default."""
+        deps, connection = test_dependencies
+        assert deps.settings.search_prefetch is False
+        
+        assert start_prefetch(deps, "OpenAI funding") is None
+        cancel_prefetch(deps)
+        assert connection.fetch.call_count == 0
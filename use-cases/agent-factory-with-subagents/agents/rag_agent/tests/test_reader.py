@@ -0,0 +1,105 @@
+"""Test the single-pass document reader."""
+
+import hashlib
+import codecs
+
+import pytest
+
+from ..ingestion import reader
+from ..ingestion.reader import count_words, extract_title, read_document, sniff_encoding
+
+
+class TestSniffEncoding:
+    """Test encoding detection from a prefix."""
+    
+    @pytest.mark.parametrize("bom, encoding", [
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF32_LE, "utf-32"),
+    ])
+    def test_byte_order_marks(self, bom, encoding):
+        """Test byte order marks decide the encoding."""
+        assert sniff_encoding(bom + b"text") == encoding
+    
+    def test_utf8_cut_mid_character(self):
+        """Test a prefix ending inside a multi-byte character is still UTF-8."""
+        prefix = "naïve".encode("utf-8")[:3]
+        
+        assert sniff_encoding(prefix) == "utf-8"
+    
+    def test_fallback(self):
+        """Test bytes that are not UTF-8 fall back to latin-1."""
+        assert sniff_encoding("café".encode("latin-1"), complete=True) == "latin-1"
+        assert sniff_encoding("caf\xe9 au lait".encode("latin-1")) == "latin-1"
+
+
+class TestExtraction:
+    """Test the metadata taken from one read."""
+    
+    @pytest.mark.parametrize("text", [
+        "",
+        "one",
+        "  leading and trailing  ",
+        "word split by nbsp\tand\ttabs\n\nnew lines",
+        "x" * 70000 + " tail",
+        ("abc " * 20000) + "\n",
+    ])
+    def test_count_words_matches_split(self, text):
+        """Test windowed counting equals len(text.split()), including words across windows."""
+        assert count_words(text) == len(text.split())
+    
+    def test_title_only_in_first_lines(self):
+        """Test the heading must be within the first ten lines."""
+        assert extract_title("intro\n  # Title  \nbody") == "Title"
+        assert extract_title("\n" * 10 + "# Too late") is None
+        assert extract_title("## Subheading only") is None
+
+
+class TestReadDocument:
+    """Test reading files."""
+    
+    def test_reads_frontmatter_title_and_counts(self, tmp_path):
+        """Test one read yields content, frontmatter, title, counts and hash."""
+        path = tmp_path / "doc.md"
+        path.write_text("---\nauthor: Ada\n---\n# Guide\n\nTwo words.\n", encoding="utf-8")
+        
+        document = read_document(str(path))
+        
+        assert document.title == "Guide"
+        assert document.frontmatter == {"author": "Ada"}
+        assert document.line_count == 7
+        assert document.word_count == 8
+        assert document.content_hash == hashlib.sha256(path.read_bytes()).hexdigest()
+    
+    def test_large_files_are_memory_mapped(self, tmp_path, monkeypatch):
+        """Test the mmap path decodes the same as a plain read."""
+        path = tmp_path / "big.md"
+        path.write_text("# Big\n" + "déjà vu " * 5000, encoding="utf-8")
+        monkeypatch.setattr(reader, "MMAP_THRESHOLD", 1024)
+        
+        document = read_document(str(path))
+        
+        assert document.content == path.read_text(encoding="utf-8")
+        assert document.word_count == 10002
+        assert document.content_hash == hashlib.sha256(path.read_bytes()).hexdigest()
+    
+    def test_invalid_utf8_after_prefix(self, tmp_path, monkeypatch):
+        """Test invalid bytes beyond the sniffed prefix fall back to latin-1."""
+        path = tmp_path / "mixed.txt"
+        path.write_bytes(b"plain ascii " * 10 + "café".encode("latin-1"))
+        monkeypatch.setattr(reader, "SNIFF_BYTES", 16)
+        
+        document = read_document(str(path))
+        
+        assert document.encoding == "latin-1"
+        assert document.content.endswith("café")
+    
+    def test_utf16_file(self, tmp_path):
+        """Test UTF-16 files, which the old UTF-8/latin-1 reader garbled."""
+        path = tmp_path / "export.txt"
+        path.write_bytes("# Bericht\nGrüße".encode("utf-16"))
+        
+        document = read_document(str(path))
+        
+        assert document.title == "Bericht"
+        assert document.content == "# Bericht\nGrüße"
@@ -0,0 +1,100 @@
+"""Test re-ranking stage."""
+
+import pytest
+from typing import List
+
+from ..reranker import Reranker, RerankingStage
+from ..tools import hybrid_search, semantic_search
+
+
+class KeywordReranker(Reranker):
+    """Scores passages by occurrences of the query text."""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        self.calls.append(passages)
+        return [float(p.count(query)) for p in passages]
+
+
+
+class TestRerankingStage:
+    """Test batching, caching and trimming."""
+
+    @pytest.mark.asyncio
+    async def test_orders_and_trims(self, make_search_row):
+        """Test rows are sorted by model score and cut to top_k."""
+        stage = RerankingStage(KeywordReranker())
+        rows = [make_search_row("a", content="x"), make_search_row("b", content="python python"), make_search_row("c", content="python")]
+
+        ranked = await stage.rerank("python", rows, top_k=2)
+
+        assert [r['chunk_id'] for r, _ in ranked] == ["b", "c"]
+        assert [score for _, score in ranked] == [2.0, 1.0]
+
+    @pytest.mark.asyncio
+    async def test_scores_in_batches(self, make_search_row):
+        """Test candidates are scored batch_size at a time."""
+        model = KeywordReranker()
+        stage = RerankingStage(model, batch_size=2)
+
+        await stage.rerank("q", [make_search_row(str(i), content="q") for i in range(5)], top_k=5)
+
+        assert [len(batch) for batch in model.calls] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_caches_scores_per_query_and_chunk(self, make_search_row):
+        """Test repeated (query, chunk) pairs skip the model."""
+        model = KeywordReranker()
+        stage = RerankingStage(model)
+
+        await stage.rerank("q", [make_search_row("a", content="q"), make_search_row("b", content="")], top_k=2)
+        await stage.rerank("q", [make_search_row("a", content="q"), make_search_row("c", content="q")], top_k=2)
+        await stage.rerank("other", [make_search_row("a", content="q")], top_k=1)
+
+        assert model.calls == [["q", ""], ["q"], ["q"]]
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, make_search_row):
+        """Test least recently used scores are evicted."""
+        stage = RerankingStage(KeywordReranker(), cache_size=2)
+
+        await stage.rerank("q", [make_search_row(str(i), content="q") for i in range(3)], top_k=3)
+
+        assert list(stage._cache) == [("q", "1"), ("q", "2")]
+
+
+class TestRerankedSearch:
+    """Test search tools with a re-ranking stage."""
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_reranks_candidate_pool(self, test_dependencies, make_run_context, make_search_row):
+        """Test semantic search fetches rerank_candidates and returns the model's top results."""
+        deps, connection = test_dependencies
+        deps.reranker = RerankingStage(KeywordReranker())
+        connection.fetch.return_value = [
+            make_search_row("a", 0.9, content="unrelated"),
+            make_search_row("b", 0.8, content="python"),
+            make_search_row("c", 0.7, content="python python")
+        ]
+
+        ctx = make_run_context(deps)
+        results = await semantic_search(ctx, "python", match_count=2)
+
+        assert connection.fetch.call_args[0][2] == deps.settings.rerank_candidates
+        assert [r.chunk_id for r in results] == ["c", "b"]
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_adds_rerank_score(self, test_dependencies, make_run_context, make_search_row):
+        """Test hybrid results carry the re-ranking score."""
+        deps, connection = test_dependencies
+        deps.reranker = RerankingStage(KeywordReranker())
+        connection.fetch.return_value = [make_search_row("a", 0.9, content="unrelated"), make_search_row("b", 0.8, content="python")]
+
+        ctx = make_run_context(deps)
+        results = await hybrid_search(ctx, "python", match_count=1)
+
+        assert len(results) == 1
+        assert results[0]['chunk_id'] == "b"
+        assert results[0]['rerank_score'] == 1.0
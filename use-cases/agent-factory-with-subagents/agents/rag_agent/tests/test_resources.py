@@ -0,0 +1,130 @@
+"""Test the shared resource registry."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from ..utils.resources import ResourceRegistry
+from ..dependencies import AgentDependencies
+
+
+def mock_pool():
+    """Create a mock asyncpg pool."""
+    pool = MagicMock()
+    pool.close = AsyncMock()
+    return pool
+
+
+class TestResourceRegistry:
+    """Test refcounted pool and client sharing."""
+    
+    @pytest.mark.asyncio
+    async def test_pool_is_shared_and_closed_on_last_release(self):
+        """Test one pool is created per database and closed by the last holder."""
+        registry = ResourceRegistry()
+        pool = mock_pool()
+        
+        with patch('asyncpg.create_pool', AsyncMock(return_value=pool)) as create_pool:
+            first = await registry.acquire_pool("postgresql://db", min_size=2, max_size=4)
+            second = await registry.acquire_pool("postgresql://db", min_size=8, max_size=16)
+        
+        assert first is second
+        create_pool.assert_called_once()
+        assert create_pool.call_args.kwargs['max_size'] == 4
+        
+        await registry.release_pool("postgresql://db")
+        pool.close.assert_not_called()
+        
+        await registry.release_pool("postgresql://db")
+        pool.close.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_pool_terminated_when_close_times_out(self):
+        """Test a pool that cannot close gracefully is terminated."""
+        registry = ResourceRegistry(close_timeout=0.01)
+        pool = mock_pool()
+        
+        async def hang():
+            await asyncio.sleep(1)
+        
+        pool.close = hang
+        with patch('asyncpg.create_pool', AsyncMock(return_value=pool)):
+            await registry.acquire_pool("postgresql://db")
+        
+        await registry.release_pool("postgresql://db")
+        
+        pool.terminate.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_client_shared_per_endpoint(self):
+        """Test OpenAI clients are shared per (api key, base url)."""
+        registry = ResourceRegistry()
+        
+        with patch('openai.AsyncOpenAI', side_effect=lambda **kwargs: AsyncMock()) as client_cls:
+            a = await registry.acquire_openai_client("key", "https://a")
+            b = await registry.acquire_openai_client("key", "https://a")
+            c = await registry.acquire_openai_client("key", "https://b")
+        
+        assert a is b
+        assert a is not c
+        assert client_cls.call_count == 2
+        
+        await registry.release_openai_client("key", "https://a")
+        assert registry._clients[("key", "https://a")] is a
+        await registry.release_openai_client("key", "https://a")
+        assert ("key", "https://a") not in registry._clients
+        # The shared transport stays open for other clients
+        a.close.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_clients_share_http_transport(self):
+        """Test every OpenAI client is built on the shared HTTP client."""
+        registry = ResourceRegistry()
+        
+        with patch('openai.AsyncOpenAI', side_effect=lambda **kwargs: AsyncMock()) as client_cls:
+            await registry.acquire_openai_client("key", "https://a")
+            await registry.acquire_openai_client("key", "https://b")
+        
+        transports = [call.kwargs['http_client'] for call in client_cls.call_args_list]
+        assert transports[0] is transports[1]
+        
+        await registry.close()
+        assert transports[0].is_closed
+    
+    @pytest.mark.asyncio
+    async def test_get_shared_builds_once(self):
+        """Test process-lifetime objects are built once per key."""
+        registry = ResourceRegistry()
+        factory = AsyncMock(return_value=object())
+        
+        first = await registry.get_shared("index", factory)
+        second = await registry.get_shared("index", factory)
+        
+        assert first is second
+        factory.assert_called_once()
+
+
+class TestSharedDependencies:
+    """Test agent sessions share registry resources."""
+    
+    @pytest.mark.asyncio
+    async def test_sessions_share_pool(self, test_settings):
+        """Test two sessions use one pool that closes after both clean up."""
+        pool = mock_pool()
+        registry = ResourceRegistry()
+        
+        with patch('asyncpg.create_pool', AsyncMock(return_value=pool)) as create_pool, \
+                patch('openai.AsyncOpenAI', side_effect=lambda **kwargs: AsyncMock()), \
+                patch(f'{AgentDependencies.__module__}.registry', registry):
+            sessions = [AgentDependencies(settings=test_settings) for _ in range(2)]
+            for deps in sessions:
+                await deps.initialize()
+            
+            assert sessions[0].db_pool is sessions[1].db_pool
+            assert sessions[0].openai_client is sessions[1].openai_client
+            create_pool.assert_called_once()
+            
+            await sessions[0].cleanup()
+            pool.close.assert_not_called()
+            await sessions[1].cleanup()
+            pool.close.assert_called_once()
@@ -0,0 +1,73 @@
+"""Test document discovery."""
+
+import glob
+import os
+
+import pytest
+
+from ..ingestion.scanner import DocumentScanner
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Nested folder with documents, other files, hidden and excluded folders."""
+    files = [
+        "a.md", "b.txt", "c.markdown", "image.png", ".hidden.md",
+        "guides/intro.md", "guides/deep/nested/ref.md", "guides/deep/notes.txt",
+        "drafts/wip.md", "archive/2019/old.md", ".git/HEAD.md"
+    ]
+    for name in files:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {name}\n")
+    return tmp_path
+
+
+def legacy_glob(folder):
+    """The discovery the scanner replaced: one recursive glob per extension."""
+    files = []
+    for pattern in ("*.md", "*.markdown", "*.txt"):
+        files.extend(glob.glob(os.path.join(folder, "**", pattern), recursive=True))
+    return sorted(files)
+
+
+class TestDocumentScanner:
+    """Test the single-pass parallel scanner."""
+    
+    @pytest.mark.parametrize("workers", [1, 8])
+    def test_matches_legacy_glob(self, tree, workers):
+        """Test the default scan finds the same files as the old globs, sorted."""
+        scanned = DocumentScanner(str(tree), workers=workers).scan()
+        
+        assert [f.path for f in scanned] == legacy_glob(str(tree))
+    
+    def test_collects_stat_info(self, tree):
+        """Test size and mtime come back with each file."""
+        path = tree / "a.md"
+        stat = os.stat(path)
+        
+        scanned = {f.path: f for f in DocumentScanner(str(tree)).scan()}[str(path)]
+        
+        assert scanned.size == stat.st_size
+        assert scanned.mtime_ns == stat.st_mtime_ns
+    
+    def test_include_and_exclude(self, tree):
+        """Test include globs, excluded folder names and path globs."""
+        scanner = DocumentScanner(str(tree), include=["*.md"], exclude=["drafts", "archive/*", "guides/deep/*"])
+        
+        names = [os.path.relpath(f.path, tree) for f in scanner.scan()]
+        
+        assert names == ["a.md", os.path.join("guides", "intro.md")]
+    
+    def test_matches_single_paths(self, tree):
+        """Test the per-path check used by the watcher agrees with the scan."""
+        scanner = DocumentScanner(str(tree), exclude=["drafts"])
+        
+        assert scanner.matches(str(tree / "guides" / "intro.md"))
+        assert not scanner.matches(str(tree / "drafts" / "wip.md"))
+        assert not scanner.matches(str(tree / ".git" / "HEAD.md"))
+        assert not scanner.matches(str(tree / "image.png"))
+    
+    def test_missing_folder(self, tmp_path):
+        """Test a missing folder yields no files."""
+        assert DocumentScanner(str(tmp_path / "missing")).scan() == []
@@ -0,0 +1,92 @@
+"""Test metadata filter pushdown in search tools."""
+
+import pytest
+from datetime import datetime, timezone
+
+from ..tools import semantic_search, hybrid_search, _filter_params
+
+
+class TestFilterParams:
+    """Test conversion of tool filters to SQL arguments."""
+    
+    def test_empty_filters(self):
+        """Test no filters produce neutral arguments."""
+        assert _filter_params(None) == ({}, None, None, None, None)
+    
+    def test_source_and_dates(self):
+        """Test dedicated filter keys are split out."""
+        metadata, source, after, before, collection = _filter_params({
+            'source': 'reports/*',
+            'created_after': '2024-01-01',
+            'created_before': '2024-06-30T12:00:00+02:00',
+            'category': 'funding'
+        })
+        
+        assert metadata == {'category': 'funding'}
+        assert source == 'reports/%'
+        assert after == datetime(2024, 1, 1, tzinfo=timezone.utc)
+        assert before.utcoffset().total_seconds() == 7200
+        assert collection is None
+    
+    def test_source_like_metacharacters_are_literal(self):
+        """Test '%', '_' and backslashes in a source filter are escaped and only '*' is a wildcard."""
+        _, source, _, _, _ = _filter_params({'source': 'q3_100%\\draft*'})
+        
+        assert source == 'q3\\_100\\%\\\\draft%'
+    
+    def test_collection(self):
+        """Test a collection filter is passed on unless searches are pinned to another."""
+        assert _filter_params({'collection': 'acme'})[4] == 'acme'
+        assert _filter_params({'collection': 'acme'}, collection='globex')[4] == 'globex'
+        assert _filter_params(None, collection='globex') == ({}, None, None, None, 'globex')
+    
+    def test_invalid_date(self):
+        """Test malformed dates are rejected."""
+        with pytest.raises(ValueError):
+            _filter_params({'created_after': 'last week'})
+
+
+class TestFilteredSearch:
+    """Test filters are pushed down to the SQL functions."""
+    
+    @pytest.mark.asyncio
+    async def test_semantic_search_passes_filters(self, test_dependencies, make_run_context, mock_database_responses):
+        """Test semantic search forwards filters to match_chunks."""
+        deps, connection = test_dependencies
+        connection.fetch.return_value = mock_database_responses['semantic_search']
+        
+        ctx = make_run_context(deps)
+        await semantic_search(ctx, "funding rounds", match_count=5, filters={'category': 'funding'})
+        
+        args = connection.fetch.call_args[0]
+        assert 'match_chunks(' in args[0]
+        assert args[2] == 5
+        assert args[3] == {'category': 'funding'}
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_passes_filters(self, test_dependencies, make_run_context, mock_database_responses):
+        """Test hybrid search forwards filters to hybrid_search."""
+        deps, connection = test_dependencies
+        connection.fetch.return_value = mock_database_responses['hybrid_search']
+        
+        ctx = make_run_context(deps)
+        await hybrid_search(ctx, "funding rounds", filters={'source': 'doc1_*'})
+        
+        args = connection.fetch.call_args[0]
+        assert args[5] == {}
+        assert args[6] == 'doc1\\_%'
+    
+    @pytest.mark.asyncio
+    async def test_pinned_collection_skips_shared_indexes(self, test_dependencies, make_run_context, mock_database_responses):
+        """Test a pinned collection goes to match_chunks even with the exact index loaded."""
+        deps, connection = test_dependencies
+        deps.settings.search_collection = 'acme'
+        deps.exact_index = object()
+        connection.fetch.return_value = mock_database_responses['semantic_search']
+        
+        ctx = make_run_context(deps)
+        await semantic_search(ctx, "funding rounds", match_count=5)
+        
+        args = connection.fetch.call_args[0]
+        assert 'match_chunks(' in args[0]
+        assert args[-1] == 'acme'
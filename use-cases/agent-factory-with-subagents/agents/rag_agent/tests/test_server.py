@@ -0,0 +1,211 @@
+"""Test the multi-session HTTP server."""
+
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from ..dependencies import AgentDependencies
+from ..server import AdmissionController, MessageRequest, create_app
+
+
+@pytest.fixture
+def app(test_settings):
+    """Create a server app around a TestModel agent without external services."""
+    agent = Agent(TestModel(custom_output_text="Found it."), deps_type=AgentDependencies)
+    with patch.object(AgentDependencies, 'initialize', AsyncMock()), \
+            patch.object(AgentDependencies, 'cleanup', AsyncMock()):
+        yield create_app(test_settings, agent=agent)
+
+
+@pytest.fixture
+async def client(app):
+    """HTTP client bound to the app."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+class TestAdmissionController:
+    """Test concurrency limits and rejection."""
+    
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test requests beyond the running and queued limits are rejected."""
+        admission = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=1)
+        
+        assert await admission.acquire()
+        assert not await admission.acquire()
+        
+        admission.release()
+        assert await admission.acquire()
+    
+    @pytest.mark.asyncio
+    async def test_queued_request_times_out(self):
+        """Test a queued request is rejected after the queue timeout."""
+        admission = AdmissionController(max_concurrent=1, max_queued=5, queue_timeout=0.01)
+        
+        assert await admission.acquire()
+        assert not await admission.acquire()
+        assert admission.waiting == 0
+    
+    @pytest.mark.asyncio
+    async def test_queued_request_admitted_on_release(self):
+        """Test a waiting request gets the slot when it is freed."""
+        admission = AdmissionController(max_concurrent=1, max_queued=5, queue_timeout=1)
+        await admission.acquire()
+        
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.waiting == 1
+        admission.release()
+        
+        assert await waiter
+        assert admission.active == 1
+
+
+class TestServer:
+    """Test session endpoints and streaming."""
+    
+    @pytest.mark.asyncio
+    async def test_message_streams_agent_events(self, app, client):
+        """Test a message streams SSE events and is added to session history."""
+        response = await client.post("/sessions", json={"preferences": {"text_weight": 0.5}})
+        assert response.status_code == 201
+        session_id = response.json()["session_id"]
+        
+        response = await client.post(f"/sessions/{session_id}/messages", json={"message": "What is RAG?"})
+        
+        assert response.status_code == 200
+        assert "event: final" in response.text
+        assert "Found it." in response.text
+        assert '"timings"' in response.text
+        
+        session = app.state.sessions.sessions[session_id]
+        assert session.history.turns == [("What is RAG?", "Found it.")]
+        assert session.deps.user_preferences == {"text_weight": 0.5}
+        assert app.state.admission.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_sessions_are_isolated(self, app, client):
+        """Test each session gets its own dependencies."""
+        first = (await client.post("/sessions")).json()["session_id"]
+        second = (await client.post("/sessions")).json()["session_id"]
+        
+        sessions = app.state.sessions.sessions
+        assert sessions[first].deps is not sessions[second].deps
+        assert sessions[first].deps.session_id == first
+    
+    @pytest.mark.asyncio
+    async def test_unknown_session(self, client):
+        """Test messages to unknown sessions return 404."""
+        response = await client.post("/sessions/missing/messages", json={"message": "hi"})
+        
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_busy_server_returns_503(self, app, client):
+        """Test requests are rejected when admission control is saturated."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        app.state.admission.acquire = AsyncMock(return_value=False)
+        
+        response = await client.post(f"/sessions/{session_id}/messages", json={"message": "hi"})
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    
+    @pytest.mark.asyncio
+    async def test_unstarted_stream_releases_slot(self, app, client):
+        """Test the run slot is freed when the response ends before its stream starts."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        send_message = next(route.endpoint for route in app.routes if route.path.endswith("/messages"))
+        
+        response = await send_message(session_id, MessageRequest(message="hi"))
+        assert app.state.admission.active == 1
+        await response.background()
+        
+        assert app.state.admission.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_delete_waits_for_running_message(self, app, client):
+        """Test a session is closed only after the run holding its lock finishes."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        session = app.state.sessions.sessions[session_id]
+        
+        await session.lock.acquire()
+        closing = asyncio.create_task(app.state.sessions.close(session_id))
+        await asyncio.sleep(0)
+        assert not session.closed
+        session.lock.release()
+        await closing
+        
+        assert session.closed
+        AgentDependencies.cleanup.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_releases_lock_and_slot(self, app, client):
+        """Test closing a stream paused mid-run frees the session and run slot."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        session = app.state.sessions.sessions[session_id]
+        send_message = next(route.endpoint for route in app.routes if route.path.endswith("/messages"))
+        
+        response = await send_message(session_id, MessageRequest(message="hi"))
+        await response.body_iterator.__anext__()
+        assert session.lock.locked()
+        # As after a client disconnect
+        await response.background()
+        
+        assert not session.lock.locked()
+        assert app.state.admission.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_creates_respect_limit(self, app):
+        """Test sessions still initializing count against the session limit."""
+        sessions = app.state.sessions
+        sessions.max_sessions = 2
+        
+        async def slow_initialize():
+            await asyncio.sleep(0.01)
+        AgentDependencies.initialize.side_effect = slow_initialize
+        
+        results = await asyncio.gather(*(sessions.create() for _ in range(4)), return_exceptions=True)
+        
+        assert len(sessions.sessions) == 2
+        assert sum(isinstance(r, HTTPException) for r in results) == 2
+        assert sessions._reserved == 0
+    
+    @pytest.mark.asyncio
+    async def test_idle_sessions_expire_periodically(self, app, client):
+        """Test idle sessions are closed without new sessions being created."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        sessions = app.state.sessions
+        sessions.ttl = 0
+        
+        expiry = asyncio.create_task(sessions.expire_periodically(0.01))
+        await asyncio.sleep(0.05)
+        expiry.cancel()
+        
+        assert session_id not in sessions.sessions
+    
+    @pytest.mark.asyncio
+    async def test_delete_session(self, app, client):
+        """Test deleting a session releases its dependencies."""
+        session_id = (await client.post("/sessions")).json()["session_id"]
+        
+        response = await client.delete(f"/sessions/{session_id}")
+        
+        assert response.status_code == 204
+        assert session_id not in app.state.sessions.sessions
+        AgentDependencies.cleanup.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_metrics(self, client):
+        """Test the metrics endpoint serves Prometheus text."""
+        response = await client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "rag_stage_latency_seconds" in response.text
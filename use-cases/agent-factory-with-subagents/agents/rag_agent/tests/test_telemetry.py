@@ -0,0 +1,136 @@
+"""Test request path latency instrumentation."""
+
+import asyncio
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from ..dependencies import AgentDependencies
+from ..streaming import stream_agent_events
+from ..tools import hybrid_search
+from ..utils.telemetry import LatencyHistogram, recorder, span, timed_connection, track_request
+
+
+@pytest.fixture(autouse=True)
+def reset_recorder():
+    """Start every test with empty histograms."""
+    recorder.reset()
+    yield
+    recorder.reset()
+
+
+class TestLatencyHistogram:
+    """Test percentile summaries."""
+    
+    def test_percentiles(self):
+        """Test nearest-rank p50/p95/p99."""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+        
+        snapshot = histogram.snapshot()
+        assert snapshot['count'] == 100
+        assert snapshot['p50_ms'] == 50
+        assert snapshot['p95_ms'] == 95
+        assert snapshot['p99_ms'] == 99
+    
+    def test_sliding_window(self):
+        """Test percentiles use only the most recent samples."""
+        histogram = LatencyHistogram(max_samples=10)
+        for _ in range(100):
+            histogram.observe(1.0)
+        for _ in range(10):
+            histogram.observe(0.001)
+        
+        assert histogram.snapshot()['p99_ms'] == 1
+        assert histogram.count == 110
+
+
+class TestSpans:
+    """Test stage timing helpers."""
+    
+    def test_span_records_errors(self):
+        """Test a failing block is timed and counted as an error."""
+        with pytest.raises(ValueError):
+            with span("embedding"):
+                raise ValueError("boom")
+        
+        stats = recorder.snapshot()['embedding']
+        assert stats['count'] == 1
+        assert stats['errors'] == 1
+    
+    def test_track_request_collects_stages(self):
+        """Test stage timings are collected per request."""
+        with track_request() as timings:
+            with span("db.query"):
+                pass
+            with span("db.query"):
+                pass
+        with span("db.query"):
+            pass
+        
+        assert set(timings) == {"db.query"}
+        assert recorder.snapshot()['db.query']['count'] == 3
+    
+    @pytest.mark.asyncio
+    async def test_timed_connection(self, mock_db_pool):
+        """Test pool wait and query time are recorded separately."""
+        pool, connection = mock_db_pool
+        
+        async with timed_connection(pool) as conn:
+            assert conn is connection
+        
+        assert {"db.pool_acquire", "db.query"} <= set(recorder.snapshot())
+    
+    def test_prometheus_output(self):
+        """Test exposition format has quantiles, sum and count."""
+        with span("embedding"):
+            pass
+        
+        text = recorder.render_prometheus()
+        assert '# TYPE rag_stage_latency_seconds summary' in text
+        assert 'rag_stage_latency_seconds{stage="embedding",quantile="0.99"}' in text
+        assert 'rag_stage_latency_seconds_count{stage="embedding"} 1' in text
+        assert 'rag_stage_errors_total{stage="embedding"} 0' in text
+
+
+class TestSearchInstrumentation:
+    """Test the search path reports its stages."""
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_stages(self, test_dependencies, make_run_context):
+        """Test embedding, pool, SQL and decode stages are timed."""
+        deps, connection = test_dependencies
+        deps.settings.search_prefetch = False
+        connection.fetch.return_value = []
+        
+        with track_request() as timings:
+            await hybrid_search(make_run_context(deps), "test query")
+        
+        assert {"embedding", "db.pool_acquire", "db.query", "db.decode"} <= set(timings)
+    
+    @pytest.mark.asyncio
+    async def test_failures_are_logged(self, test_dependencies, make_run_context, caplog):
+        """Test tool failures are logged with a traceback instead of printed."""
+        deps, connection = test_dependencies
+        connection.fetch.side_effect = RuntimeError("connection lost")
+        
+        result = await hybrid_search(make_run_context(deps), "test query")
+        
+        assert "connection lost" in result
+        assert "Hybrid search failed" in caplog.text
+        assert recorder.snapshot()['db.query']['errors'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_closes_in_another_task(self, test_dependencies):
+        """Test a stream left at a yield can be finalized from a different task."""
+        deps, _ = test_dependencies
+        deps.settings.search_prefetch = False
+        agent = Agent(TestModel(custom_output_text="Found it."), deps_type=AgentDependencies)
+        
+        stream = stream_agent_events("What is RAG?", None, deps, agent)
+        await stream.__anext__()
+        # As the event loop's async generator finalizer does
+        await asyncio.create_task(stream.aclose())
+        
+        assert recorder.snapshot()['agent.run']['count'] == 1
@@ -0,0 +1,145 @@
+"""Test continuous ingestion of a watched folder."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from ..ingestion import watcher as watcher_module
+from ..ingestion.scanner import DocumentScanner
+from ..ingestion.watcher import DocumentWatcher, _EventHandler
+from ..utils.models import IngestionResult
+
+
+@asynccontextmanager
+async def fake_acquire():
+    yield AsyncMock()
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    """Pipeline stand-in over an empty folder."""
+    result = IngestionResult(
+        document_id="doc-1", title="t", chunks_created=1, entities_extracted=0,
+        relationships_created=0, processing_time_ms=1.0, errors=[]
+    )
+    with patch.object(watcher_module, "db_pool", SimpleNamespace(acquire=fake_acquire)), \
+         patch.object(watcher_module, "get_manifest_entry", AsyncMock(return_value=None)):
+        yield SimpleNamespace(
+            documents_folder=str(tmp_path),
+            scanner=DocumentScanner(str(tmp_path)),
+            ingest_file=AsyncMock(return_value=result),
+            remove_file=AsyncMock(return_value=True),
+            record_failure=AsyncMock(),
+            collection="default"
+        )
+
+
+async def wait_for(condition, timeout=3.0):
+    """Poll until condition() is true."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+class TestDebounce:
+    """Test event debouncing."""
+    
+    @pytest.mark.asyncio
+    async def test_burst_of_events_syncs_once(self, pipeline):
+        """Test repeated events for one file trigger a single ingest after the quiet period."""
+        watcher = DocumentWatcher(pipeline, debounce_seconds=0.1)
+        path = f"{pipeline.documents_folder}/a.md"
+        open(path, "w").write("# A")
+        
+        for _ in range(5):
+            watcher.notify(path)
+        await watcher._sync_due()
+        assert pipeline.ingest_file.await_count == 0
+        
+        await asyncio.sleep(0.15)
+        await watcher._sync_due()
+        pipeline.ingest_file.assert_awaited_once_with(path, "a.md", None)
+        assert watcher.ingested == 1
+    
+    @pytest.mark.asyncio
+    async def test_busy_file_is_not_starved(self, pipeline):
+        """Test a file that keeps changing is still synced after the maximum delay."""
+        watcher = DocumentWatcher(pipeline, debounce_seconds=0.05)
+        path = f"{pipeline.documents_folder}/log.txt"
+        open(path, "w").write("line")
+        
+        # Events arrive faster than the debounce period for longer than the maximum delay
+        for _ in range(40):
+            watcher.notify(path)
+            await watcher._sync_due()
+            await asyncio.sleep(0.02)
+        
+        assert pipeline.ingest_file.await_count >= 1
+
+
+class TestPolling:
+    """Test end-to-end change detection with the polling fallback."""
+    
+    @pytest.mark.asyncio
+    async def test_new_changed_and_deleted_files(self, pipeline, tmp_path):
+        """Test files are ingested when created or changed and removed when deleted."""
+        watcher = DocumentWatcher(pipeline, debounce_seconds=0.05, poll_interval=0.05, use_polling=True)
+        task = asyncio.create_task(watcher.run(initial_sync=False))
+        await asyncio.sleep(0.1)
+        
+        doc = tmp_path / "new.md"
+        doc.write_text("# New\n\nFirst version.")
+        await wait_for(lambda: pipeline.ingest_file.await_count == 1)
+        
+        doc.write_text("# New\n\nSecond, longer version.")
+        await wait_for(lambda: pipeline.ingest_file.await_count == 2)
+        
+        doc.unlink()
+        await wait_for(lambda: pipeline.remove_file.await_count == 1)
+        
+        watcher.stop()
+        await asyncio.wait_for(task, timeout=2)
+        assert watcher.ingested == 2
+        assert watcher.removed == 1
+
+
+class TestDirectoryEvents:
+    """Test folders that are renamed, moved or deleted."""
+    
+    @pytest.mark.asyncio
+    async def test_moved_folder_syncs_old_and_new_files(self, pipeline, tmp_path):
+        """Test documents under the old path are synced for removal and the new path is scanned."""
+        (tmp_path / "new").mkdir()
+        (tmp_path / "new" / "a.md").write_text("A")
+        manifest = {"old/a.md": None, "old/sub/b.md": None, "older.md": None}
+        watcher = DocumentWatcher(pipeline, use_polling=True)
+        handler = _EventHandler(watcher, asyncio.get_running_loop())
+        
+        with patch.object(watcher_module, "load_manifest", AsyncMock(return_value=manifest)):
+            handler.dispatch(SimpleNamespace(
+                is_directory=True, event_type="moved",
+                src_path=str(tmp_path / "old"), dest_path=str(tmp_path / "new")
+            ))
+            await wait_for(lambda: watcher._pending and not watcher._directory_tasks)
+        
+        assert set(watcher._pending) == {
+            str(tmp_path / "old" / "a.md"),
+            str(tmp_path / "old" / "sub" / "b.md"),
+            str(tmp_path / "new" / "a.md")
+        }
+    
+    @pytest.mark.asyncio
+    async def test_deleted_folder_removes_documents(self, pipeline, tmp_path):
+        """Test deleting a folder removes the documents that were under it."""
+        watcher = DocumentWatcher(pipeline, debounce_seconds=0, use_polling=True)
+        
+        with patch.object(watcher_module, "load_manifest", AsyncMock(return_value={"old/a.md": None})):
+            watcher.notify_directory(str(tmp_path / "old"))
+            await wait_for(lambda: not watcher._directory_tasks)
+        await watcher._sync_due()
+        
+        pipeline.remove_file.assert_awaited_once_with(str(tmp_path / "old" / "a.md"))
@@ -0,0 +1,130 @@
+"""Test the distributed ingestion worker."""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from ..ingestion import work_queue
+from ..ingestion.loaders import DocumentLoader
+from ..ingestion.work_queue import IngestionWorker, QueueTask, claim
+from ..utils.models import IngestionResult
+
+
+def make_result(document_id="doc-1", errors=None):
+    """Ingestion result for one file."""
+    return IngestionResult(
+        document_id=document_id, title="t", chunks_created=1, entities_extracted=0,
+        relationships_created=0, processing_time_ms=1.0, errors=errors or []
+    )
+
+
+@asynccontextmanager
+async def fake_acquire():
+    yield AsyncMock()
+
+
+@pytest.fixture
+def queue():
+    """Patch the queue's database calls."""
+    with patch.object(work_queue, "db_pool", SimpleNamespace(acquire=fake_acquire)), \
+         patch.object(work_queue, "get_manifest_entry", AsyncMock(return_value=None)), \
+         patch.object(work_queue, "complete", AsyncMock()) as complete, \
+         patch.object(work_queue, "fail", AsyncMock()) as fail:
+        yield SimpleNamespace(complete=complete, fail=fail)
+
+
+def make_worker(ingest_file):
+    """Worker over a pipeline whose ingest_file is mocked."""
+    pipeline = SimpleNamespace(
+        ingest_file=ingest_file, record_failure=AsyncMock(), loader=DocumentLoader(workers=0), collection="tenant-a"
+    )
+    return IngestionWorker(pipeline, worker_id="w1", batch_size=2, poll_interval=0)
+
+
+class TestWorkerProcess:
+    """Test how a worker releases each claimed file."""
+    
+    @pytest.mark.asyncio
+    async def test_success_completes_with_document(self, queue):
+        """Test an ingested file is marked done with its document."""
+        worker = make_worker(AsyncMock(return_value=make_result("doc-9")))
+        
+        await worker._process(QueueTask(id=1, file_path="/docs/a.md", source="a.md", attempts=1))
+        
+        queue.complete.assert_awaited_once()
+        assert queue.complete.await_args.args[1:] == (1, "w1", "doc-9")
+        assert len(worker.results) == 1
+    
+    @pytest.mark.asyncio
+    async def test_already_ingested_completes_without_work(self, queue):
+        """Test a file saved by an earlier attempt is completed, not re-ingested."""
+        worker = make_worker(AsyncMock(return_value=None))
+        
+        await worker._process(QueueTask(id=2, file_path="/docs/a.md", source="a.md", attempts=2))
+        
+        queue.complete.assert_awaited_once()
+        assert worker.results == []
+    
+    @pytest.mark.asyncio
+    async def test_exception_is_retried(self, queue):
+        """Test a crash releases the file for another attempt and records it."""
+        worker = make_worker(AsyncMock(side_effect=RuntimeError("embedding API down")))
+        
+        await worker._process(QueueTask(id=3, file_path="/docs/a.md", source="a.md", attempts=1))
+        
+        queue.fail.assert_awaited_once()
+        assert queue.fail.await_args.args[3] == "embedding API down"
+        assert queue.fail.await_args.kwargs == {}
+        worker.pipeline.record_failure.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_empty_document_is_not_retried(self, queue):
+        """Test deterministic failures are marked failed straight away."""
+        worker = make_worker(AsyncMock(return_value=make_result("", ["No chunks created"])))
+        
+        await worker._process(QueueTask(id=4, file_path="/docs/e.md", source="e.md", attempts=1))
+        
+        assert queue.fail.await_args.kwargs == {"retry": False}
+
+
+class TestWorkerRun:
+    """Test the claim loop."""
+    
+    @pytest.mark.asyncio
+    async def test_runs_until_drained(self, queue):
+        """Test batches are processed until nothing is pending or running."""
+        batches = [
+            [QueueTask(1, "/d/a.md", "a.md", 1), QueueTask(2, "/d/b.md", "b.md", 1)],
+            [QueueTask(3, "/d/c.md", "c.md", 1)],
+            []
+        ]
+        claim = AsyncMock(side_effect=batches)
+        stats = AsyncMock(return_value={"pending": 0, "running": 0, "done": 3, "failed": 0})
+        worker = make_worker(AsyncMock(return_value=make_result()))
+        
+        with patch.object(work_queue, "claim", claim), patch.object(work_queue, "queue_stats", stats):
+            results = await worker.run()
+        
+        assert len(results) == 3
+        assert claim.await_count == 3
+        assert claim.await_args.args[1:] == ("w1", 2, 300.0, 3)
+        # Workers only claim files of their pipeline's collection
+        assert claim.await_args.kwargs == {"collection": "tenant-a"}
+        assert stats.await_args.args[1] == "tenant-a"
+        assert worker._held == []
+    
+    @pytest.mark.asyncio
+    async def test_expired_leases_failed_only_in_own_collection(self):
+        """Test exhausted expired leases are failed within the worker's collection, skipping locked rows."""
+        conn = AsyncMock()
+        conn.transaction = MagicMock()
+        conn.fetch.return_value = []
+        
+        await claim(conn, "w1", 2, 300.0, 3, collection="tenant-a")
+        
+        sql, *args = conn.execute.await_args.args
+        assert "collection = $2" in sql
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert args == [3, "tenant-a"]
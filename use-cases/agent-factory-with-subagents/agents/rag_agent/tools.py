@@ -1,15 +1,27 @@
 """Search tools for Semantic Search Agent."""
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
+from datetime import datetime, timezone
 from pydantic_ai import RunContext
-from pydantic import BaseModel, Field
+from dataclasses import dataclass
 import asyncpg
-import json
+import asyncio
+import logging
 from dependencies import AgentDependencies
+from packing import pack_results
+from prefetch import PrefetchedSearch
+from utils.telemetry import recorder, span, timed_connection
 
+logger = logging.getLogger(__name__)
 
-class SearchResult(BaseModel):
-    """Model for search results."""
+
+@dataclass
+class SearchResult:
+    """Semantic search result."""
+    __slots__ = (
+        'chunk_id', 'document_id', 'content', 'similarity',
+        'metadata', 'document_title', 'document_source'
+    )
     chunk_id: str
     document_id: str
     content: str
@@ -19,11 +31,102 @@ class SearchResult(BaseModel):
     document_source: str
 
 
+def _parse_filter_date(value: Any) -> Optional[datetime]:
+    """Parse an ISO date filter value, treating naive values as UTC."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _filter_params(
+    filters: Optional[Dict[str, Any]],
+    collection: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[str], Optional[datetime], Optional[datetime], Optional[str]]:
+    """
+    Split search filters into match_chunks()/hybrid_search() arguments.
+    
+    'source' is a document source pattern ('*' wildcards), 'created_after'
+    and 'created_before' bound the document ingestion date, 'collection'
+    names the collection to search, and any other key must match the
+    document metadata (YAML frontmatter) exactly.
+    
+    Args:
+        filters: Tool filters
+        collection: Collection searches are pinned to (settings
+            search_collection); overrides a 'collection' filter
+    
+    Returns:
+        (metadata filter, source pattern, created_after, created_before, collection)
+    """
+    filters = dict(filters or {})
+    
+    requested_collection = filters.pop('collection', None)
+    if collection is None and requested_collection is not None:
+        collection = str(requested_collection)
+    
+    source = filters.pop('source', None)
+    if source is not None:
+        # Only '*' is a wildcard; LIKE's own metacharacters match literally
+        source = str(source).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '%')
+    
+    created_after = _parse_filter_date(filters.pop('created_after', None))
+    created_before = _parse_filter_date(filters.pop('created_before', None))
+    
+    return filters, source, created_after, created_before, collection
+
+
+async def _exact_match_chunks(
+    deps: AgentDependencies,
+    query_embedding: List[float],
+    match_count: int
+) -> List[Dict[str, Any]]:
+    """
+    Run semantic search against the in-memory exact index.
+    
+    Returns rows shaped like the output of match_chunks().
+    """
+    with span("exact_search"):
+        matches = deps.exact_index.search(query_embedding, match_count)
+    if not matches:
+        return []
+    
+    async with timed_connection(deps.db_pool) as conn:
+        rows = await conn.fetch(
+            """
+            SELECT
+                c.id::text AS chunk_id,
+                c.document_id,
+                c.content,
+                c.metadata,
+                d.title AS document_title,
+                d.source AS document_source
+            FROM chunks c
+            JOIN documents d ON c.document_id = d.id
+            WHERE c.id = ANY($1::uuid[])
+            """,
+            [chunk_id for chunk_id, _ in matches]
+        )
+    
+    with span("db.decode"):
+        rows_by_id = {row['chunk_id']: row for row in rows}
+        return [
+            {**dict(rows_by_id[chunk_id]), 'similarity': similarity}
+            for chunk_id, similarity in matches
+            if chunk_id in rows_by_id
+        ]
+
+
 async def semantic_search(
     ctx: RunContext[AgentDependencies],
     query: str,
-    match_count: Optional[int] = None
-) -> List[SearchResult]:
+    match_count: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    context_window: int = 0
+) -> Union[List[SearchResult], List[Dict[str, Any]]]:
     """
     Perform pure semantic search using vector similarity.
     
@@ -31,9 +134,15 @@ async def semantic_search(
         ctx: Agent runtime context with dependencies
         query: Search query text
         match_count: Number of results to return (default: 10)
+        filters: Optional filters: 'source' (pattern, '*' wildcard),
+            'created_after'/'created_before' (ISO dates), 'collection', or
+            any document frontmatter field for exact match
+        context_window: Neighbouring chunks to include on each side of every
+            hit (0-3); overlapping passages are merged
     
     Returns:
-        List of search results ordered by similarity
+        List of search results ordered by similarity, or merged context
+        passages when context_window > 0
     """
     try:
         deps = ctx.deps
@@ -45,37 +154,71 @@ async def semantic_search(
         # Validate match count
         match_count = min(match_count, deps.settings.max_match_count)
         
+        # Fetch a wider candidate pool when results will be re-ranked
+        candidate_count = _candidate_count(deps, match_count)
+        
         # Generate embedding for query
         query_embedding = await deps.get_embedding(query)
         
-        # Convert embedding to PostgreSQL vector string format
-        embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-        
-        # Execute semantic search
-        async with deps.db_pool.acquire() as conn:
-            results = await conn.fetch(
-                """
-                SELECT * FROM match_chunks($1::vector, $2)
-                """,
-                embedding_str,
-                match_count
-            )
+        # Filtered and collection-pinned queries are pushed down to match_chunks()
+        unfiltered = not filters and deps.settings.search_collection is None
+        if deps.exact_index is not None and unfiltered:
+            results = await _exact_match_chunks(deps, query_embedding, candidate_count)
+        else:
+            # Convert embedding to PostgreSQL vector string format
+            embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+            
+            # Execute semantic search
+            async with timed_connection(deps.db_pool) as conn:
+                if deps.settings.search_quantization != "none" and unfiltered:
+                    # Coarse search on the quantized index, exact re-rank in SQL
+                    results = await conn.fetch(
+                        """
+                        SELECT * FROM match_chunks_quantized($1::vector, $2, $3, $4)
+                        """,
+                        embedding_str,
+                        candidate_count,
+                        deps.settings.search_quantization,
+                        deps.settings.quantization_candidate_multiplier
+                    )
+                else:
+                    results = await conn.fetch(
+                        """
+                        SELECT * FROM match_chunks($1::vector, $2, $3::jsonb, $4, $5, $6, $7)
+                        """,
+                        embedding_str,
+                        candidate_count,
+                        *_filter_params(filters, deps.settings.search_collection)
+                    )
         
-        # Convert to SearchResult objects
-        return [
-            SearchResult(
-                chunk_id=str(row['chunk_id']),
-                document_id=str(row['document_id']),
-                content=row['content'],
-                similarity=row['similarity'],
-                metadata=json.loads(row['metadata']) if row['metadata'] else {},
-                document_title=row['document_title'],
-                document_source=row['document_source']
-            )
-            for row in results
-        ]
+        score_key = 'similarity'
+        if deps.reranker is not None:
+            results = await _rerank(deps, query, results, match_count)
+            score_key = 'rerank_score'
+        
+        if context_window > 0:
+            results = await _expand_context(deps, results, score_key, context_window)
+        
+        # Packed output drops metadata, so pack the rows directly
+        if context_window > 0 or deps.settings.result_token_budget > 0:
+            return _maybe_pack(deps, query, results)
+        
+        # Metadata is already decoded by the connection's JSONB codec
+        with span("db.decode"):
+            return [
+                SearchResult(
+                    str(row['chunk_id']),
+                    str(row['document_id']),
+                    row['content'],
+                    row['similarity'],
+                    row['metadata'] or {},
+                    row['document_title'],
+                    row['document_source']
+                )
+                for row in results
+            ]
     except Exception as e:
-        print(e)
+        logger.exception("Semantic search failed")
         return f"Failed to perform a semantic search: {e}"
 
 
@@ -83,7 +226,9 @@ async def hybrid_search(
     ctx: RunContext[AgentDependencies],
     query: str,
     match_count: Optional[int] = None,
-    text_weight: Optional[float] = None
+    text_weight: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    context_window: int = 0
 ) -> List[Dict[str, Any]]:
     """
     Perform hybrid search combining semantic and keyword matching.
@@ -93,57 +238,319 @@ async def hybrid_search(
         query: Search query text
         match_count: Number of results to return (default: 10)
         text_weight: Weight for text matching (0-1, default: 0.3)
+        filters: Optional filters: 'source' (pattern, '*' wildcard),
+            'created_after'/'created_before' (ISO dates), 'collection', or
+            any document frontmatter field for exact match
+        context_window: Neighbouring chunks to include on each side of every
+            hit (0-3); overlapping passages are merged
     
     Returns:
-        List of search results with combined scores
+        List of search results with combined scores, or merged context
+        passages when context_window > 0
     """
     try:
         deps = ctx.deps
+        match_count, text_weight = _hybrid_params(deps, match_count, text_weight)
         
-        # Use defaults if not specified
-        if match_count is None:
-            match_count = deps.settings.default_match_count
-        if text_weight is None:
-            text_weight = deps.user_preferences.get('text_weight', deps.settings.default_text_weight)
+        candidate_count = _candidate_count(deps, match_count)
         
-        # Validate parameters
-        match_count = min(match_count, deps.settings.max_match_count)
-        text_weight = max(0.0, min(1.0, text_weight))
+        # Serve the search started from the user message when it asked for the same thing
+        results = await _take_prefetched(deps, query, candidate_count, text_weight, filters)
+        if results is None:
+            # Generate embedding for query
+            query_embedding = await deps.get_embedding(query)
+            
+            results = await _run_hybrid_search(
+                deps, query, query_embedding, candidate_count, text_weight, filters
+            )
         
-        # Generate embedding for query
-        query_embedding = await deps.get_embedding(query)
+        score_key = 'combined_score'
+        if deps.reranker is not None:
+            results = await _rerank(deps, query, results, match_count)
+            score_key = 'rerank_score'
         
-        # Convert embedding to PostgreSQL vector string format
-        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
-        embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-        
-        # Execute hybrid search
-        async with deps.db_pool.acquire() as conn:
-            results = await conn.fetch(
-                """
-                SELECT * FROM hybrid_search($1::vector, $2, $3, $4)
-                """,
-                embedding_str,
-                query,
-                match_count,
-                text_weight
-            )
+        if context_window > 0:
+            results = await _expand_context(deps, results, score_key, context_window)
+        return _maybe_pack(deps, query, results)
+    except Exception as e:
+        logger.exception("Hybrid search failed")
+        return f"Failed to perform hybrid search: {e}"
+
+
+async def multi_search(
+    ctx: RunContext[AgentDependencies],
+    queries: List[str],
+    match_count: Optional[int] = None,
+    text_weight: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run several hybrid searches at once and fuse their results.
+    
+    Use this instead of repeated hybrid_search calls when a question needs
+    information on multiple sub-topics.
+    
+    Args:
+        ctx: Agent runtime context with dependencies
+        queries: Sub-queries to search for (e.g. one per entity or aspect)
+        match_count: Number of fused results to return (default: 10)
+        text_weight: Weight for text matching (0-1, default: 0.3)
+        filters: Optional filters applied to every sub-query (see hybrid_search)
+    
+    Returns:
+        Deduplicated results ranked by reciprocal rank fusion, each listing
+        the sub-queries that matched it
+    """
+    try:
+        deps = ctx.deps
+        match_count, text_weight = _hybrid_params(deps, match_count, text_weight)
+        
+        # Drop blank and duplicate sub-queries, keeping order
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        queries = queries[:deps.settings.max_multi_search_queries]
+        if not queries:
+            return []
+        
+        # One embeddings request for all sub-queries
+        embeddings = await deps.get_embeddings(queries)
         
-        # Convert to dictionaries with additional scores
+        # Each search acquires its own pool connection and runs concurrently
+        result_sets = await asyncio.gather(*(
+            _run_hybrid_search(deps, query, embedding, match_count, text_weight, filters)
+            for query, embedding in zip(queries, embeddings)
+        ))
+        
+        fused = _fuse_results(queries, result_sets, match_count)
+        return _maybe_pack(deps, ' '.join(queries), fused)
+    except Exception as e:
+        logger.exception("Multi search failed")
+        return f"Failed to perform multi search: {e}"
+
+
+def _fuse_results(
+    queries: List[str],
+    result_sets: List[List[Dict[str, Any]]],
+    match_count: int,
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Merge per-query results with reciprocal rank fusion.
+    
+    Args:
+        queries: Sub-queries, aligned with result_sets
+        result_sets: Ranked results for each sub-query
+        match_count: Number of results to keep
+        k: RRF damping constant
+    
+    Returns:
+        Results deduplicated by chunk_id with 'fused_score' and 'matched_queries'
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    
+    for query, results in zip(queries, result_sets):
+        for rank, result in enumerate(results):
+            entry = fused.get(result['chunk_id'])
+            if entry is None:
+                entry = fused[result['chunk_id']] = {**result, 'fused_score': 0.0, 'matched_queries': []}
+            elif result['combined_score'] > entry['combined_score']:
+                entry.update(result)
+            entry['fused_score'] += 1.0 / (k + rank + 1)
+            entry['matched_queries'].append(query)
+    
+    return sorted(fused.values(), key=lambda r: r['fused_score'], reverse=True)[:match_count]
+
+
+def _hybrid_params(
+    deps: AgentDependencies,
+    match_count: Optional[int],
+    text_weight: Optional[float]
+) -> Tuple[int, float]:
+    """Apply defaults and bounds to hybrid search parameters."""
+    # Use defaults if not specified
+    if match_count is None:
+        match_count = deps.settings.default_match_count
+    if text_weight is None:
+        text_weight = deps.user_preferences.get('text_weight', deps.settings.default_text_weight)
+    
+    # Validate parameters
+    match_count = min(match_count, deps.settings.max_match_count)
+    text_weight = max(0.0, min(1.0, text_weight))
+    return match_count, text_weight
+
+
+def _maybe_pack(
+    deps: AgentDependencies,
+    query: str,
+    results: List[Any]
+) -> List[Any]:
+    """Pack results into the configured token budget, if one is set."""
+    if deps.settings.result_token_budget <= 0:
+        return results
+    return pack_results(
+        results,
+        query,
+        deps.settings.result_token_budget,
+        deps.settings.max_tokens_per_result
+    )
+
+
+def _candidate_count(deps: AgentDependencies, match_count: int) -> int:
+    """Number of first-stage results to fetch for a search returning match_count."""
+    if deps.reranker is None:
+        return match_count
+    return max(match_count, deps.settings.rerank_candidates)
+
+
+async def _rerank(
+    deps: AgentDependencies,
+    query: str,
+    results: List[Dict[str, Any]],
+    match_count: int
+) -> List[Dict[str, Any]]:
+    """Re-order first-stage results with the re-ranking model, adding 'rerank_score'."""
+    with span("rerank"):
+        ranked = await deps.reranker.rerank(query, results, match_count)
+    return [{**dict(row), 'rerank_score': score} for row, score in ranked]
+
+
+def start_prefetch(deps: AgentDependencies, user_input: str) -> Optional[PrefetchedSearch]:
+    """
+    Start a default hybrid search for the raw user message in the background.
+    
+    Embedding and searching overlap with the first model call; hybrid_search
+    serves the rows if the model then asks for a similar query.
+    
+    Args:
+        deps: Session dependencies
+        user_input: User message
+    
+    Returns:
+        The running prefetch, or None if prefetching is disabled
+    """
+    cancel_prefetch(deps)
+    if not deps.settings.search_prefetch or not user_input.strip():
+        return None
+    
+    match_count, text_weight = _hybrid_params(deps, None, None)
+    candidate_count = _candidate_count(deps, match_count)
+    
+    async def search() -> List[Dict[str, Any]]:
+        query_embedding = await deps.get_embedding(user_input)
+        return await _run_hybrid_search(deps, user_input, query_embedding, candidate_count, text_weight)
+    
+    deps.prefetch = PrefetchedSearch(user_input, candidate_count, text_weight, search())
+    return deps.prefetch
+
+
+def cancel_prefetch(deps: AgentDependencies):
+    """Stop and drop the session's prefetched search, counting whether it was used."""
+    if deps.prefetch is not None:
+        # Hit rate = prefetch.hit / (prefetch.hit + prefetch.miss) on /metrics
+        recorder.count("prefetch.hit" if deps.prefetch.hits else "prefetch.miss")
+        deps.prefetch.cancel()
+        deps.prefetch = None
+
+
+async def _take_prefetched(
+    deps: AgentDependencies,
+    query: str,
+    match_count: int,
+    text_weight: float,
+    filters: Optional[Dict[str, Any]]
+) -> Optional[List[Dict[str, Any]]]:
+    """Get prefetched rows for a hybrid search if the prefetch covers it."""
+    prefetch = deps.prefetch
+    if prefetch is None or filters:
+        return None
+    if not prefetch.matches(query, match_count, text_weight, deps.settings.prefetch_similarity_threshold):
+        return None
+    return await prefetch.take(match_count)
+
+
+async def _run_hybrid_search(
+    deps: AgentDependencies,
+    query: str,
+    query_embedding: List[float],
+    match_count: int,
+    text_weight: float,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Execute hybrid_search() for an embedded query on a pooled connection."""
+    # Convert embedding to PostgreSQL vector string format
+    # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
+    embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+    
+    # Execute hybrid search
+    async with timed_connection(deps.db_pool) as conn:
+        results = await conn.fetch(
+            """
+            SELECT * FROM hybrid_search($1::vector, $2, $3, $4, $5::jsonb, $6, $7, $8, $9)
+            """,
+            embedding_str,
+            query,
+            match_count,
+            text_weight,
+            *_filter_params(filters, deps.settings.search_collection)
+        )
+    
+    # Convert to dictionaries; metadata is already decoded by the JSONB codec
+    with span("db.decode"):
         return [
             {
+                **row,
                 'chunk_id': str(row['chunk_id']),
                 'document_id': str(row['document_id']),
-                'content': row['content'],
-                'combined_score': row['combined_score'],
-                'vector_similarity': row['vector_similarity'],
-                'text_similarity': row['text_similarity'],
-                'metadata': json.loads(row['metadata']) if row['metadata'] else {},
-                'document_title': row['document_title'],
-                'document_source': row['document_source']
+                'metadata': row['metadata'] or {}
             }
             for row in results
         ]
-    except Exception as e:
-        print(e)
-        return f"Failed to perform hybrid search: {e}"
+
+
+async def _expand_context(
+    deps: AgentDependencies,
+    results: List[Dict[str, Any]],
+    score_key: str,
+    context_window: int
+) -> List[Dict[str, Any]]:
+    """
+    Replace search hits with merged passages of neighbouring chunks.
+    
+    Args:
+        deps: Agent dependencies
+        results: Search rows with 'chunk_id' and a score column
+        score_key: Name of the score column to rank passages by
+        context_window: Chunks to include on each side of every hit
+    
+    Returns:
+        Passages ordered by their best hit's score
+    """
+    if not results:
+        return []
+    
+    context_window = min(context_window, deps.settings.max_context_window)
+    scores = {str(row['chunk_id']): row[score_key] for row in results}
+    
+    async with timed_connection(deps.db_pool) as conn:
+        passages = await conn.fetch(
+            """
+            SELECT * FROM expand_chunk_context($1::uuid[], $2)
+            """,
+            list(scores),
+            context_window
+        )
+    
+    expanded = []
+    for row in passages:
+        hit_ids = [str(chunk_id) for chunk_id in row['hit_chunk_ids']]
+        expanded.append({
+            'document_id': str(row['document_id']),
+            'document_title': row['document_title'],
+            'document_source': row['document_source'],
+            'start_chunk_index': row['start_chunk_index'],
+            'end_chunk_index': row['end_chunk_index'],
+            'content': row['content'],
+            'hit_chunk_ids': hit_ids,
+            'score': max(scores[chunk_id] for chunk_id in hit_ids)
+        })
+    
+    return sorted(expanded, key=lambda passage: passage['score'], reverse=True)
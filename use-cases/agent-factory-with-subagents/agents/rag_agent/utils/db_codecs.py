@@ -0,0 +1,46 @@
+"""
+Type codecs registered on every database connection.
+"""
+
+import json
+from typing import Any
+
+import asyncpg
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+
+def json_dumps(value: Any) -> str:
+    """Encode a value as JSON text, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+def json_loads(value: str) -> Any:
+    """Decode JSON text, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+async def init_connection(conn: asyncpg.Connection):
+    """
+    Prepare a new pool connection.
+    
+    Registers JSON/JSONB codecs so metadata columns are decoded once by the
+    driver and JSONB parameters accept Python objects directly.
+    
+    Args:
+        conn: New asyncpg connection
+    """
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json_dumps,
+            decoder=json_loads,
+            schema="pg_catalog"
+        )
@@ -3,9 +3,12 @@ Database utilities for PostgreSQL connection and operations.
 """
 
 import os
+import re
 import json
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
 from uuid import UUID
@@ -15,11 +18,25 @@ import asyncpg
 from asyncpg.pool import Pool
 from dotenv import load_dotenv
 
+try:
+    from .resources import registry
+except ImportError:
+    from utils.resources import registry
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Directory holding schema.sql and optional SQL extensions
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+
+# Dimension the SQL files are written for
+SCHEMA_EMBEDDING_DIMENSION = 1536
+
+# Collection documents belong to unless one is given
+DEFAULT_COLLECTION = "default"
+
 
 class DatabasePool:
     """Manages PostgreSQL connection pool."""
@@ -38,23 +55,22 @@ class DatabasePool:
         self.pool: Optional[Pool] = None
     
     async def initialize(self):
-        """Create connection pool."""
+        """Acquire the shared connection pool."""
         if not self.pool:
-            self.pool = await asyncpg.create_pool(
+            # Shared with agent sessions in the same process
+            self.pool = await registry.acquire_pool(
                 self.database_url,
-                min_size=5,
-                max_size=20,
                 max_inactive_connection_lifetime=300,
                 command_timeout=60
             )
             logger.info("Database connection pool initialized")
     
     async def close(self):
-        """Close connection pool."""
+        """Release the shared connection pool."""
         if self.pool:
-            await self.pool.close()
             self.pool = None
-            logger.info("Database connection pool closed")
+            await registry.release_pool(self.database_url)
+            logger.info("Database connection pool released")
     
     @asynccontextmanager
     async def acquire(self):
@@ -70,6 +86,16 @@ class DatabasePool:
 db_pool = DatabasePool()
 
 
+@asynccontextmanager
+async def _connection(conn: Optional[Any] = None):
+    """The given connection, else one acquired from the pool."""
+    if conn is not None:
+        yield conn
+    else:
+        async with db_pool.acquire() as pooled:
+            yield pooled
+
+
 async def initialize_database():
     """Initialize database connection pool."""
     await db_pool.initialize()
@@ -113,7 +139,7 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
                 "title": result["title"],
                 "source": result["source"],
                 "content": result["content"],
-                "metadata": json.loads(result["metadata"]),
+                "metadata": result["metadata"],
                 "created_at": result["created_at"].isoformat(),
                 "updated_at": result["updated_at"].isoformat()
             }
@@ -156,7 +182,7 @@ async def list_documents(
         
         if metadata_filter:
             conditions.append(f"d.metadata @> ${len(params) + 1}::jsonb")
-            params.append(json.dumps(metadata_filter))
+            params.append(metadata_filter)
         
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
@@ -176,7 +202,7 @@ async def list_documents(
                 "id": row["id"],
                 "title": row["title"],
                 "source": row["source"],
-                "metadata": json.loads(row["metadata"]),
+                "metadata": row["metadata"],
                 "created_at": row["created_at"].isoformat(),
                 "updated_at": row["updated_at"].isoformat(),
                 "chunk_count": row["chunk_count"]
@@ -184,6 +210,311 @@ async def list_documents(
             for row in results
         ]
 
+async def delete_document(
+    source: str,
+    collection: str = DEFAULT_COLLECTION,
+    conn: Optional[Any] = None
+) -> Optional[str]:
+    """
+    Delete a document and, by cascade, its chunks.
+    
+    Args:
+        source: Document source
+        collection: Collection the document belongs to
+        conn: Connection to use, e.g. inside a caller's transaction
+            (default: one from the pool)
+    
+    Returns:
+        ID of the deleted document, or None if there was none
+    """
+    async with _connection(conn) as conn:
+        return await conn.fetchval(
+            "DELETE FROM documents WHERE collection = $1 AND source = $2 RETURNING id::text",
+            collection,
+            source
+        )
+
+
+def chunk_hash(content: str) -> str:
+    """Hash that identifies chunk content; equals md5(content) in Postgres."""
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+async def stored_chunk_hashes(
+    source: str,
+    collection: str = DEFAULT_COLLECTION,
+    conn: Optional[Any] = None
+) -> Set[str]:
+    """
+    Hashes of the chunks stored for a document.
+    
+    Chunks whose embedding failed are left out, so they are embedded again.
+    
+    Args:
+        source: Document source
+        collection: Collection the document belongs to
+        conn: Connection to use (default: one from the pool)
+    
+    Returns:
+        chunk_hash() of every reusable chunk, empty if the document is new
+    """
+    async with _connection(conn) as conn:
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT md5(c.content) AS hash
+            FROM chunks c
+            JOIN documents d ON c.document_id = d.id
+            WHERE d.collection = $1 AND d.source = $2
+                AND c.collection = $1 AND NOT c.metadata ? 'embedding_error'
+            """,
+            collection,
+            source
+        )
+    return {row["hash"] for row in rows}
+
+
+async def upsert_document(
+    source: str,
+    content: str,
+    chunks: List[Dict[str, Any]],
+    title: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    collection: str = DEFAULT_COLLECTION,
+    conn: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Insert or update the document with this source, rewriting only changed chunks.
+    
+    The document keeps its ID. A stored chunk whose content is unchanged keeps
+    its ID and embedding, and only its chunk_index, metadata and token_count
+    are updated; metadata keys starting with "embedding_" are kept, since they
+    describe the stored embedding. New chunk contents are inserted and stored
+    chunks no longer present are deleted. Only new contents need an embedding,
+    so call stored_chunk_hashes() first and embed the rest.
+    
+    Args:
+        source: Document source (unique within the collection)
+        content: Full document content
+        chunks: Chunks in order, as dicts with content, chunk_index, and
+            optionally metadata, token_count and embedding
+        title: Document title (default: the source)
+        metadata: Document metadata
+        collection: Collection the document and its chunks belong to
+        conn: Connection to use, e.g. to record more in the same transaction
+            (default: one from the pool)
+    
+    Returns:
+        document_id, created (whether the document is new), and counts of
+        chunks_inserted, chunks_kept and chunks_deleted
+    
+    Raises:
+        ValueError: A new chunk content has no embedding
+    """
+    async with _connection(conn) as conn:
+        async with conn.transaction():
+            row = await conn.fetchrow(
+                """
+                INSERT INTO documents (title, source, content, metadata, collection)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (collection, source) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    content = EXCLUDED.content,
+                    metadata = EXCLUDED.metadata,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING id::text, (xmax = 0) AS created
+                """,
+                title or source,
+                source,
+                content,
+                metadata or {},
+                collection
+            )
+            document_id = row["id"]
+            
+            # Stored chunks by content hash, in order; failed embeddings are never reused
+            stored = defaultdict(list)
+            if not row["created"]:
+                for chunk_row in await conn.fetch(
+                    """
+                    SELECT id::text, md5(content) AS hash
+                    FROM chunks
+                    WHERE collection = $2 AND document_id = $1::uuid AND NOT metadata ? 'embedding_error'
+                    ORDER BY chunk_index
+                    FOR UPDATE
+                    """,
+                    document_id,
+                    collection
+                ):
+                    stored[chunk_row["hash"]].append(chunk_row["id"])
+            
+            kept = []
+            inserted = []
+            for chunk in chunks:
+                ids = stored.get(chunk_hash(chunk["content"]))
+                if ids:
+                    kept.append((ids.pop(0), chunk))
+                elif chunk.get("embedding"):
+                    inserted.append(chunk)
+                else:
+                    raise ValueError(f"Chunk {chunk['chunk_index']} of {source} is new and has no embedding")
+            kept_ids = [chunk_id for chunk_id, _ in kept]
+            
+            # The collection predicates prune a partitioned chunks table to one partition
+            deleted = await conn.execute(
+                "DELETE FROM chunks WHERE collection = $3 AND document_id = $1::uuid AND NOT (id = ANY($2::uuid[]))",
+                document_id,
+                kept_ids,
+                collection
+            )
+            await conn.executemany(
+                """
+                UPDATE chunks c
+                SET chunk_index = $2,
+                    metadata = $3::jsonb || coalesce(
+                        (SELECT jsonb_object_agg(key, value) FROM jsonb_each(c.metadata) WHERE key LIKE 'embedding\\_%'),
+                        '{}'::jsonb
+                    ),
+                    token_count = $4
+                WHERE collection = $5 AND id = $1::uuid
+                """,
+                [
+                    (chunk_id, chunk["chunk_index"], chunk.get("metadata") or {}, chunk.get("token_count"), collection)
+                    for chunk_id, chunk in kept
+                ]
+            )
+            await conn.executemany(
+                """
+                INSERT INTO chunks (document_id, content, embedding, chunk_index, metadata, token_count, collection)
+                VALUES ($1::uuid, $2, $3::vector, $4, $5, $6, $7)
+                """,
+                [
+                    (
+                        document_id,
+                        chunk["content"],
+                        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
+                        '[' + ','.join(map(str, chunk["embedding"])) + ']',
+                        chunk["chunk_index"],
+                        chunk.get("metadata") or {},
+                        chunk.get("token_count"),
+                        collection
+                    )
+                    for chunk in inserted
+                ]
+            )
+    
+    return {
+        "document_id": document_id,
+        "created": row["created"],
+        "chunks_inserted": len(inserted),
+        "chunks_kept": len(kept),
+        "chunks_deleted": int(deleted.split()[-1])
+    }
+
+
+# Schema Functions
+async def ensure_unique_sources(conn: Any):
+    """
+    Add collection columns and the unique (collection, source) constraint to
+    a database created before them.
+    
+    Existing documents and chunks are put in DEFAULT_COLLECTION.
+    
+    Raises:
+        RuntimeError: Some sources have several documents; re-ingest with
+            --clean or delete the duplicates first
+    """
+    if await conn.fetchval("SELECT to_regclass('documents_collection_source_key') IS NOT NULL"):
+        return
+    duplicates = await conn.fetchval(
+        "SELECT count(*) FROM (SELECT source FROM documents GROUP BY source HAVING count(*) > 1) d"
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} sources have more than one document; "
+            "re-ingest with --clean or delete the older duplicates before upserting"
+        )
+    async with conn.transaction():
+        await conn.execute(f"""
+            ALTER TABLE documents ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT '{DEFAULT_COLLECTION}';
+            ALTER TABLE chunks ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT '{DEFAULT_COLLECTION}';
+            ALTER TABLE documents DROP CONSTRAINT IF EXISTS documents_source_key;
+            ALTER TABLE documents ADD CONSTRAINT documents_collection_source_key UNIQUE (collection, source);
+        """)
+    logger.info("Added collection columns and unique constraint on documents (collection, source)")
+
+
+async def ensure_collection_partition(conn: Any, collection: str):
+    """
+    Give a collection its own chunks partition if chunks is partitioned.
+    
+    Does nothing unless sql/partitioned_chunks.sql was applied, or for
+    DEFAULT_COLLECTION, which lives in the default partition.
+    
+    Args:
+        conn: Database connection
+        collection: Collection about to be ingested
+    """
+    if collection == DEFAULT_COLLECTION:
+        return
+    if not await conn.fetchval("SELECT to_regprocedure('create_collection_partition(text)') IS NOT NULL"):
+        return
+    partition = await conn.fetchval("SELECT create_collection_partition($1)", collection)
+    logger.debug(f"Chunks of collection {collection} are stored in {partition}")
+
+
+def render_schema(sql: str, embedding_dimension: int) -> str:
+    """
+    Rewrite schema SQL for a different embedding dimension.
+    
+    Args:
+        sql: SQL text written for SCHEMA_EMBEDDING_DIMENSION
+        embedding_dimension: Target embedding dimension
+    
+    Returns:
+        SQL with vector, halfvec and bit column types resized
+    """
+    return re.sub(
+        r"\b(vector|halfvec|bit)\(%d\)" % SCHEMA_EMBEDDING_DIMENSION,
+        lambda m: f"{m.group(1)}({embedding_dimension})",
+        sql
+    )
+
+
+async def apply_schema(
+    embedding_dimension: int,
+    files: Tuple[str, ...] = ("schema.sql",),
+    drop_existing: bool = True
+):
+    """
+    Create the database schema for the given embedding dimension.
+    
+    Note that schema.sql drops and recreates the documents and chunks tables.
+    
+    Args:
+        embedding_dimension: Embedding dimension for vector columns
+        files: SQL files in SQL_DIR to apply, in order
+        drop_existing: Run the files' DROP ... IF EXISTS statements. Pass
+            False when creating tables in a fresh schema, where an
+            unqualified DROP would fall through the search_path to the same
+            table in public. Plain DROPs of objects an earlier file created
+            always run.
+    """
+    if embedding_dimension > 2000:
+        logger.warning(
+            f"pgvector cannot index vector columns above 2000 dimensions ({embedding_dimension}); "
+            "reduce EMBEDDING_DIMENSION or use a quantized index (--quantized-indexes)"
+        )
+    
+    async with db_pool.acquire() as conn:
+        for name in files:
+            with open(os.path.join(SQL_DIR, name), encoding="utf-8") as f:
+                sql = render_schema(f.read(), embedding_dimension)
+            if not drop_existing:
+                sql = re.sub(r"^DROP [^;]*IF EXISTS[^;]*;\s*$", "", sql, flags=re.MULTILINE)
+            await conn.execute(sql)
+            logger.info(f"Applied {name} with {embedding_dimension}-dimensional embeddings")
+
+
 # Utility Functions
 async def execute_query(query: str, *params) -> List[Dict[str, Any]]:
     """
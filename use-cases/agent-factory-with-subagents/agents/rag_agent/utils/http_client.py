@@ -0,0 +1,96 @@
+"""
+Shared HTTP transport for embedding and LLM API calls.
+
+All OpenAI-compatible clients in the process use one ``httpx.AsyncClient``
+so TCP/TLS connections are pooled and kept alive across requests, and
+HTTP/2 multiplexes concurrent requests over a single connection when the
+optional ``h2`` package is installed.
+"""
+
+import os
+import logging
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def http2_available() -> bool:
+    """Check whether the h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_http_client(
+    http2: bool = HTTP2_ENABLED,
+    timeout: float = HTTP_TIMEOUT,
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+    max_connections: int = HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY
+) -> httpx.AsyncClient:
+    """
+    Create a pooled, keep-alive HTTP client.
+    
+    Args:
+        http2: Use HTTP/2 if h2 is installed
+        timeout: Read/write/pool timeout in seconds
+        connect_timeout: Connection timeout in seconds
+        max_connections: Maximum open connections
+        max_keepalive_connections: Idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+    
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    if http2 and not http2_available():
+        logger.info("h2 is not installed; using HTTP/1.1 (pip install h2 to enable HTTP/2)")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client, creating it on first use.
+    
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -8,6 +8,11 @@ from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from enum import Enum
 
+try:
+    from .providers import get_embedding_dimension
+except ImportError:
+    from utils.providers import get_embedding_dimension
+
 # Enums
 class SearchType(str, Enum):
     """Search type enum."""
@@ -68,7 +73,6 @@ class SearchResponse(BaseModel):
     results: List[ChunkResult] = Field(default_factory=list)
     total_results: int = 0
     search_type: SearchType
-    query_time_ms: float
 
 
 class ToolCall(BaseModel):
@@ -120,9 +124,10 @@ class Chunk(BaseModel):
     @field_validator('embedding')
     @classmethod
     def validate_embedding(cls, v: Optional[List[float]]) -> Optional[List[float]]:
-        """Validate embedding dimensions."""
-        if v is not None and len(v) != 1536:  # OpenAI text-embedding-3-small
-            raise ValueError(f"Embedding must have 1536 dimensions, got {len(v)}")
+        """Validate embedding dimensions against the configured embedding dimension."""
+        dimension = get_embedding_dimension()
+        if v is not None and len(v) != dimension:
+            raise ValueError(f"Embedding must have {dimension} dimensions, got {len(v)}")
         return v
 
 
@@ -3,15 +3,52 @@ Simplified provider configuration for OpenAI models only.
 """
 
 import os
-from typing import Optional
+from typing import Optional, Dict
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 import openai
 from dotenv import load_dotenv
 
+try:
+    from .http_client import get_http_client
+except ImportError:
+    from utils.http_client import get_http_client
+
 # Load environment variables
 load_dotenv()
 
+# Native output dimensions of known embedding models
+EMBEDDING_MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Models that accept the `dimensions` request parameter (Matryoshka truncation)
+REDUCIBLE_EMBEDDING_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+
+def create_openai_provider(api_key: Optional[str], base_url: Optional[str] = None) -> OpenAIProvider:
+    """
+    Create an OpenAI provider whose client uses the shared HTTP transport.
+    
+    The provider is bound to the transport open now; once it is closed,
+    build a new provider (and model) rather than reusing this one.
+    
+    Args:
+        api_key: API key
+        base_url: Optional API base URL
+    
+    Returns:
+        Configured OpenAIProvider
+    """
+    # Same placeholder OpenAIProvider uses for keyless OpenAI-compatible servers
+    if api_key is None and 'OPENAI_API_KEY' not in os.environ and base_url is not None:
+        api_key = 'api-key-not-set'
+    
+    client = openai.AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=get_http_client())
+    return OpenAIProvider(openai_client=client)
+
 
 def get_llm_model() -> OpenAIModel:
     """
@@ -26,7 +63,7 @@ def get_llm_model() -> OpenAIModel:
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable is required")
     
-    return OpenAIModel(llm_choice, provider=OpenAIProvider(api_key=api_key))
+    return OpenAIModel(llm_choice, provider=create_openai_provider(api_key))
 
 
 def get_embedding_client() -> openai.AsyncOpenAI:
@@ -41,7 +78,8 @@ def get_embedding_client() -> openai.AsyncOpenAI:
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable is required")
     
-    return openai.AsyncOpenAI(api_key=api_key)
+    # Share pooled keep-alive connections with all other API clients
+    return openai.AsyncOpenAI(api_key=api_key, http_client=get_http_client())
 
 
 def get_embedding_model() -> str:
@@ -54,6 +92,54 @@ def get_embedding_model() -> str:
     return os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
 
 
+def get_embedding_dimension(model: Optional[str] = None) -> int:
+    """
+    Get the configured embedding dimension.
+    
+    This is the one place the default is decided; settings, models and the
+    embedder all call it.
+    
+    Args:
+        model: Embedding model (default: EMBEDDING_MODEL)
+    
+    Returns:
+        EMBEDDING_DIMENSION if set, otherwise the model's native dimension
+    """
+    dimension = os.getenv('EMBEDDING_DIMENSION')
+    if dimension:
+        return int(dimension)
+    return EMBEDDING_MODEL_DIMENSIONS.get(model or get_embedding_model(), 1536)
+
+
+def get_dimensions_param(model: str, dimensions: Optional[int]) -> Dict[str, int]:
+    """
+    Get the extra embeddings request arguments for a target dimension.
+    
+    Args:
+        model: Embedding model name
+        dimensions: Requested embedding dimension
+    
+    Returns:
+        {"dimensions": n} when the model must be asked for reduced output,
+        otherwise an empty dict
+    """
+    native = EMBEDDING_MODEL_DIMENSIONS.get(model)
+    
+    # Unknown (e.g. self-hosted) models are assumed to already emit `dimensions`
+    if dimensions is None or native is None or dimensions == native:
+        return {}
+    
+    if model not in REDUCIBLE_EMBEDDING_MODELS:
+        raise ValueError(
+            f"Embedding model {model} produces {native} dimensions and does not support "
+            f"reducing them to {dimensions}"
+        )
+    if dimensions > native:
+        raise ValueError(f"Embedding model {model} supports at most {native} dimensions, got {dimensions}")
+    
+    return {"dimensions": dimensions}
+
+
 def get_ingestion_model() -> OpenAIModel:
     """
     Get model for ingestion tasks (uses same model as main LLM).
@@ -100,4 +186,5 @@ def get_model_info() -> dict:
         "llm_model": os.getenv('LLM_CHOICE', 'gpt-4.1-mini'),
         "embedding_provider": "openai",
         "embedding_model": get_embedding_model(),
+        "embedding_dimension": get_embedding_dimension(),
     }
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Process-wide registry of shared database pools and API clients.
+
+Every agent session and the ingestion pipeline acquire their connection
+pool and OpenAI client here, so a process holds one pool per database and
+one HTTP client per API endpoint no matter how many sessions are running.
+Resources are created lazily on first acquire and closed gracefully when
+the last holder releases them.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import asyncpg
+import openai
+from asyncpg.pool import Pool
+
+try:
+    from .db_codecs import init_connection
+    from .http_client import get_http_client, close_http_client
+except ImportError:
+    from utils.db_codecs import init_connection
+    from utils.http_client import get_http_client, close_http_client
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing used when no Settings are available (e.g. ingestion scripts);
+# reads the same environment variables as Settings
+DEFAULT_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+DEFAULT_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+
+
+class ResourceRegistry:
+    """Refcounted, lazily created shared resources."""
+    
+    def __init__(self, close_timeout: float = 10.0):
+        """
+        Initialize registry.
+        
+        Args:
+            close_timeout: Seconds to wait for borrowed connections before
+                terminating a pool on release
+        """
+        self.close_timeout = close_timeout
+        self._pools: Dict[str, Pool] = {}
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], openai.AsyncOpenAI] = {}
+        self._refcounts: Dict[Any, int] = {}
+        self._shared: Dict[Any, Any] = {}
+        self._shared_locks: Dict[Any, asyncio.Lock] = {}
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def _get_lock(self) -> asyncio.Lock:
+        # Created on first use so the registry can be built at import time
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    def _retain(self, key: Any) -> int:
+        self._refcounts[key] = self._refcounts.get(key, 0) + 1
+        return self._refcounts[key]
+    
+    def _release(self, key: Any) -> int:
+        count = self._refcounts.get(key, 0) - 1
+        if count <= 0:
+            self._refcounts.pop(key, None)
+            return 0
+        self._refcounts[key] = count
+        return count
+    
+    async def acquire_pool(
+        self,
+        database_url: str,
+        min_size: int = DEFAULT_POOL_MIN_SIZE,
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        **pool_kwargs
+    ) -> Pool:
+        """
+        Get the shared pool for a database, creating it on first use.
+        
+        Sizing only applies when the pool is created; later callers share it.
+        
+        Args:
+            database_url: PostgreSQL connection URL
+            min_size: Minimum pool size
+            max_size: Maximum pool size
+            **pool_kwargs: Extra asyncpg.create_pool arguments
+        
+        Returns:
+            Shared asyncpg pool
+        """
+        async with self._get_lock():
+            pool = self._pools.get(database_url)
+            if pool is None:
+                pool = await asyncpg.create_pool(
+                    database_url,
+                    min_size=min_size,
+                    max_size=max_size,
+                    init=init_connection,
+                    **pool_kwargs
+                )
+                self._pools[database_url] = pool
+                logger.info(f"Created shared database pool (min={min_size}, max={max_size})")
+            self._retain(("pool", database_url))
+            return pool
+    
+    async def release_pool(self, database_url: str):
+        """
+        Release a pool; the last release closes it.
+        
+        Args:
+            database_url: PostgreSQL connection URL used to acquire it
+        """
+        async with self._get_lock():
+            if self._release(("pool", database_url)) > 0:
+                return
+            pool = self._pools.pop(database_url, None)
+        
+        if pool is not None:
+            await self._close_pool(pool)
+    
+    async def _close_pool(self, pool: Pool):
+        try:
+            # Waits for borrowed connections to be returned
+            await asyncio.wait_for(pool.close(), timeout=self.close_timeout)
+            logger.info("Closed shared database pool")
+        except asyncio.TimeoutError:
+            logger.warning("Timed out closing database pool; terminating connections")
+            pool.terminate()
+    
+    async def acquire_openai_client(
+        self,
+        api_key: Optional[str],
+        base_url: Optional[str] = None
+    ) -> openai.AsyncOpenAI:
+        """
+        Get the shared OpenAI-compatible client for an endpoint.
+        
+        Args:
+            api_key: API key
+            base_url: Optional API base URL
+        
+        Returns:
+            Shared AsyncOpenAI client
+        """
+        key = (api_key, base_url)
+        async with self._get_lock():
+            client = self._clients.get(key)
+            if client is None:
+                client = openai.AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=get_http_client()
+                )
+                self._clients[key] = client
+            self._retain(("client", key))
+            return client
+    
+    async def release_openai_client(self, api_key: Optional[str], base_url: Optional[str] = None):
+        """
+        Release a client; the last release drops it from the registry.
+        
+        Its HTTP connections belong to the shared transport, which stays
+        open for other clients until ``close``.
+        
+        Args:
+            api_key: API key used to acquire it
+            base_url: API base URL used to acquire it
+        """
+        key = (api_key, base_url)
+        async with self._get_lock():
+            if self._release(("client", key)) == 0:
+                self._clients.pop(key, None)
+    
+    async def get_shared(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a process-lifetime object (e.g. a search index or local model),
+        creating it once with ``factory``.
+        
+        Args:
+            key: Cache key
+            factory: Coroutine function that builds the object
+        
+        Returns:
+            Shared object
+        """
+        async with self._get_lock():
+            lock = self._shared_locks.setdefault(key, asyncio.Lock())
+        
+        # Per-key lock: building a slow object must not block pool acquisition
+        async with lock:
+            if key not in self._shared:
+                self._shared[key] = await factory()
+            return self._shared[key]
+    
+    async def close(self):
+        """Close every shared resource regardless of holders (process shutdown)."""
+        async with self._get_lock():
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._clients.clear()
+            self._refcounts.clear()
+            self._shared.clear()
+            self._shared_locks.clear()
+        
+        for pool in pools:
+            await self._close_pool(pool)
+        # Closing the shared transport closes every client using it
+        await close_http_client()
+
+
+# Global registry instance
+registry = ResourceRegistry()
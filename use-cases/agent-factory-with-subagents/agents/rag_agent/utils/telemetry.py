@@ -0,0 +1,248 @@
+"""
+Latency instrumentation for the request path.
+
+Every stage (embedding call, pool acquire, SQL, row decode, LLM first
+token and total) is timed with ``span()``. Timings are kept in in-process
+histograms with p50/p95/p99, exposed in Prometheus text format by the HTTP
+server's ``/metrics`` endpoint, and mirrored to OpenTelemetry spans and
+histograms when ``opentelemetry-api`` is installed and configured.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import metrics as otel_metrics, trace as otel_trace
+    _tracer = otel_trace.get_tracer("rag_agent")
+    _otel_histogram = otel_metrics.get_meter("rag_agent").create_histogram(
+        "rag.stage.duration", unit="ms", description="Duration of a RAG request stage"
+    )
+except ImportError:
+    _tracer = None
+    _otel_histogram = None
+
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_MAX_SAMPLES = 10000
+
+# Stage durations (ms) of the request being handled in this context
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class LatencyHistogram:
+    """Latency samples for one stage over a sliding window."""
+    
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        """
+        Initialize histogram.
+        
+        Args:
+            max_samples: Most recent samples kept for percentiles
+        """
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+    
+    def observe(self, seconds: float, error: bool = False):
+        """Record one duration."""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+    
+    def percentiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        """Nearest-rank percentiles in seconds over the sample window."""
+        if not self.samples:
+            return {q: 0.0 for q in quantiles}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {q: ordered[min(last, max(0, round(q * len(ordered)) - 1))] for q in quantiles}
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Summary in milliseconds."""
+        p50, p95, p99 = (self.percentiles()[q] for q in QUANTILES)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(p50 * 1000, 3),
+            'p95_ms': round(p95 * 1000, 3),
+            'p99_ms': round(p99 * 1000, 3)
+        }
+
+
+class LatencyRecorder:
+    """Per-stage latency histograms for the process."""
+    
+    def __init__(self, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        # Event counts, e.g. prefetch hits and misses
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, stage: str, seconds: float, error: bool = False):
+        """Record a stage duration."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram(self.max_samples)
+            histogram.observe(seconds, error)
+        
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 3)
+        
+        if _otel_histogram is not None:
+            _otel_histogram.record(seconds * 1000, {"stage": stage, "error": error})
+    
+    def count(self, event: str, n: int = 1):
+        """Count an event."""
+        with self._lock:
+            self.counters[event] = self.counters.get(event, 0) + n
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Summaries of every stage, in milliseconds."""
+        with self._lock:
+            return {stage: h.snapshot() for stage, h in sorted(self.histograms.items())}
+    
+    def render_prometheus(self) -> str:
+        """Render the histograms in Prometheus text exposition format."""
+        lines = [
+            "# HELP rag_stage_latency_seconds Latency of RAG request stages",
+            "# TYPE rag_stage_latency_seconds summary"
+        ]
+        errors = []
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                for q, value in histogram.percentiles().items():
+                    lines.append(f'rag_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'rag_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'rag_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+                errors.append(f'rag_stage_errors_total{{stage="{stage}"}} {histogram.errors}')
+            events = [f'rag_events_total{{event="{event}"}} {n}' for event, n in sorted(self.counters.items())]
+        lines += [
+            "# HELP rag_stage_errors_total Failed RAG request stages",
+            "# TYPE rag_stage_errors_total counter",
+            *errors,
+            "# HELP rag_events_total RAG request events, e.g. prefetch hits and misses",
+            "# TYPE rag_events_total counter",
+            *events
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        """Drop all samples and counts."""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+recorder = LatencyRecorder()
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[None]:
+    """
+    Time a block as one stage; usable around awaits in async code.
+    
+    Args:
+        stage: Stage name, e.g. 'embedding' or 'db.query'
+        attributes: Extra OpenTelemetry span attributes
+    """
+    otel_span = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else nullcontext()
+    with otel_span:
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            recorder.observe(stage, time.perf_counter() - start, error)
+
+
+@asynccontextmanager
+async def timed_connection(pool: Any) -> AsyncIterator[Any]:
+    """
+    Acquire a pool connection and time its use.
+    
+    The wait for a connection is recorded as 'db.pool_acquire' and the
+    block run on it as 'db.query'.
+    """
+    start = time.perf_counter()
+    async with pool.acquire() as conn:
+        recorder.observe("db.pool_acquire", time.perf_counter() - start)
+        with span("db.query"):
+            yield conn
+
+
+@contextmanager
+def track_request() -> Iterator[Dict[str, float]]:
+    """
+    Collect the stage timings of one request.
+    
+    Yields:
+        Dict of stage name to total milliseconds, filled as stages finish
+    """
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+class RequestTracker:
+    """
+    Stage timings and span of a request that runs in steps, e.g. an async
+    generator.
+    
+    ``track_request()`` and ``span()`` must not stay open across a
+    ``yield``: a generator abandoned there is finalized in another task,
+    where resetting their context fails. Instead, wrap each step between
+    yields in ``step()`` and call ``finish()`` once at the end.
+    """
+    
+    def __init__(self, stage: str):
+        """
+        Start tracking.
+        
+        Args:
+            stage: Stage recorded for the whole request, e.g. 'agent.run'
+        """
+        self.stage = stage
+        self.timings: Dict[str, float] = {}
+        self.error = False
+        self._start = time.perf_counter()
+        self._span = _tracer.start_span(stage) if _tracer else None
+    
+    @contextmanager
+    def step(self) -> Iterator[None]:
+        """Run a block with this request's timings and span as current."""
+        token = _request_timings.set(self.timings)
+        otel_span = otel_trace.use_span(self._span, end_on_exit=False) if self._span else nullcontext()
+        try:
+            with otel_span:
+                yield
+        except BaseException:
+            self.error = True
+            raise
+        finally:
+            _request_timings.reset(token)
+    
+    def finish(self):
+        """Record the request's total duration and end its span."""
+        recorder.observe(self.stage, time.perf_counter() - self._start, self.error)
+        if self._span is not None:
+            self._span.end()
@@ -6,6 +6,7 @@ import logging
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+import httpx
 from pydantic_ai import Agent, RunContext
 
 from .providers import get_llm_model
@@ -46,6 +47,9 @@ class ResearchAgentDependencies:
     gmail_credentials_path: str
     gmail_token_path: str
     session_id: Optional[str] = None
+    # Owned and closed by the caller; when unset the shared client from
+    # tools.get_http_client() is used, closed by tools.close_http_client()
+    http_client: Optional[httpx.AsyncClient] = None
 
 
 # Initialize the research agent
@@ -79,7 +83,8 @@ async def search_web(
         results = await search_web_tool(
             api_key=ctx.deps.brave_api_key,
             query=query,
-            count=max_results
+            count=max_results,
+            http_client=ctx.deps.http_client
         )
         
         logger.info(f"Found {len(results)} results for query: {query}")
@@ -14,6 +14,46 @@ from agents.models import BraveSearchResult
 
 logger = logging.getLogger(__name__)
 
+# Shared across calls so searches reuse pooled keep-alive connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for outbound API calls, creating it on first use.
+    
+    Uses HTTP/2 when the optional h2 package is installed.
+    
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=20,
+                max_keepalive_connections=10,
+                keepalive_expiry=30.0
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections (call on shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 # Brave Search Tool Function
 async def search_web_tool(
@@ -22,7 +62,8 @@ async def search_web_tool(
     count: int = 10,
     offset: int = 0,
     country: Optional[str] = None,
-    lang: Optional[str] = None
+    lang: Optional[str] = None,
+    http_client: Optional[httpx.AsyncClient] = None
 ) -> List[Dict[str, Any]]:
     """
     Pure function to search the web using Brave Search API.
@@ -34,6 +75,7 @@ async def search_web_tool(
         offset: Offset for pagination
         country: Country code for localized results
         lang: Language code for results
+        http_client: Optional HTTP client (defaults to the shared client)
         
     Returns:
         List of search results as dictionaries
@@ -69,52 +111,52 @@ async def search_web_tool(
     
     logger.info(f"Searching Brave for: {query}")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                "https://api.search.brave.com/res/v1/web/search",
-                headers=headers,
-                params=params,
-                timeout=30.0
-            )
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                raise Exception("Rate limit exceeded. Check your Brave API quota.")
-            
-            # Handle authentication errors
-            if response.status_code == 401:
-                raise Exception("Invalid Brave API key")
-            
-            # Handle other errors
-            if response.status_code != 200:
-                raise Exception(f"Brave API returned {response.status_code}: {response.text}")
-            
-            data = response.json()
-            
-            # Extract web results
-            web_results = data.get("web", {}).get("results", [])
-            
-            # Convert to our format
-            results = []
-            for idx, result in enumerate(web_results):
-                # Calculate a simple relevance score based on position
-                score = 1.0 - (idx * 0.05)  # Decrease by 0.05 for each position
-                score = max(score, 0.1)  # Minimum score of 0.1
-                
-                results.append({
-                    "title": result.get("title", ""),
-                    "url": result.get("url", ""),
-                    "description": result.get("description", ""),
-                    "score": score
-                })
-            
-            logger.info(f"Found {len(results)} results for query: {query}")
-            return results
+    client = http_client or get_http_client()
+    
+    try:
+        response = await client.get(
+            "https://api.search.brave.com/res/v1/web/search",
+            headers=headers,
+            params=params
+        )
+        
+        # Handle rate limiting
+        if response.status_code == 429:
+            raise Exception("Rate limit exceeded. Check your Brave API quota.")
+        
+        # Handle authentication errors
+        if response.status_code == 401:
+            raise Exception("Invalid Brave API key")
+        
+        # Handle other errors
+        if response.status_code != 200:
+            raise Exception(f"Brave API returned {response.status_code}: {response.text}")
+        
+        data = response.json()
+        
+        # Extract web results
+        web_results = data.get("web", {}).get("results", [])
+        
+        # Convert to our format
+        results = []
+        for idx, result in enumerate(web_results):
+            # Calculate a simple relevance score based on position
+            score = 1.0 - (idx * 0.05)  # Decrease by 0.05 for each position
+            score = max(score, 0.1)  # Minimum score of 0.1
             
-        except httpx.RequestError as e:
-            logger.error(f"Request error during Brave search: {e}")
-            raise Exception(f"Request failed: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error during Brave search: {e}")
-            raise
+            results.append({
+                "title": result.get("title", ""),
+                "url": result.get("url", ""),
+                "description": result.get("description", ""),
+                "score": score
+            })
+        
+        logger.info(f"Found {len(results)} results for query: {query}")
+        return results
+        
+    except httpx.RequestError as e:
+        logger.error(f"Request error during Brave search: {e}")
+        raise Exception(f"Request failed: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error during Brave search: {e}")
+        raise
@@ -18,6 +18,7 @@ from rich.text import Text
 from pydantic_ai import Agent
 from agents.research_agent import research_agent
 from agents.dependencies import ResearchAgentDependencies
+from agents.tools import close_http_client
 from agents.settings import settings
 
 console = Console()
@@ -168,46 +169,50 @@ async def main():
     
     conversation_history = []
     
-    while True:
-        try:
-            # Get user input
-            user_input = Prompt.ask("[bold green]You").strip()
-            
-            # Handle exit
-            if user_input.lower() in ['exit', 'quit']:
-                console.print("\n[yellow]👋 Goodbye![/yellow]")
-                break
+    try:
+        while True:
+            try:
+                # Get user input
+                user_input = Prompt.ask("[bold green]You").strip()
+                
+                # Handle exit
+                if user_input.lower() in ['exit', 'quit']:
+                    console.print("\n[yellow]👋 Goodbye![/yellow]")
+                    break
+                    
+                if not user_input:
+                    continue
+                
+                # Add to history
+                conversation_history.append(f"User: {user_input}")
+                
+                # Stream the interaction and get response
+                streamed_text, final_response = await stream_agent_interaction(user_input, conversation_history)
+                
+                # Handle the response display
+                if streamed_text:
+                    # Response was streamed, just add spacing
+                    console.print()
+                    conversation_history.append(f"Assistant: {streamed_text}")
+                elif final_response and final_response.strip():
+                    # Response wasn't streamed, display with proper formatting
+                    console.print(f"[bold blue]Assistant:[/bold blue] {final_response}")
+                    console.print()
+                    conversation_history.append(f"Assistant: {final_response}")
+                else:
+                    # No response
+                    console.print()
                 
-            if not user_input:
+            except KeyboardInterrupt:
+                console.print("\n[yellow]Use 'exit' to quit[/yellow]")
                 continue
-            
-            # Add to history
-            conversation_history.append(f"User: {user_input}")
-            
-            # Stream the interaction and get response
-            streamed_text, final_response = await stream_agent_interaction(user_input, conversation_history)
-            
-            # Handle the response display
-            if streamed_text:
-                # Response was streamed, just add spacing
-                console.print()
-                conversation_history.append(f"Assistant: {streamed_text}")
-            elif final_response and final_response.strip():
-                # Response wasn't streamed, display with proper formatting
-                console.print(f"[bold blue]Assistant:[/bold blue] {final_response}")
-                console.print()
-                conversation_history.append(f"Assistant: {final_response}")
-            else:
-                # No response
-                console.print()
-            
-        except KeyboardInterrupt:
-            console.print("\n[yellow]Use 'exit' to quit[/yellow]")
-            continue
-            
-        except Exception as e:
-            console.print(f"[red]Error: {e}[/red]")
-            continue
+                
+            except Exception as e:
+                console.print(f"[red]Error: {e}[/red]")
+                continue
+    finally:
+        # Release pooled search connections before the event loop closes
+        await close_http_client()
 
 
 if __name__ == "__main__":